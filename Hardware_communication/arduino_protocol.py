@@ -0,0 +1,53 @@
+# 젯슨 ↔ 아두이노 시리얼 프레임 프로토콜
+#
+# 요청:  "<seq>:<command>\n"          예) "12:plastic", "13:check:metal", "14:move:-1600"
+# 응답:  "<seq>:STARTED\n"            명령 수신 및 동작 시작
+#        "<seq>:DONE\n"               동작 완료 (모터 정지)
+#        "<seq>:ERR:<reason>\n"       알 수 없는 명령 등 오류
+#        "READY\n"                    부팅 완료 (seq 없음)
+
+STARTED = "STARTED"
+DONE = "DONE"
+ERR = "ERR"
+READY = "READY"
+
+MAX_SEQ = 9999
+
+
+class ArduinoReply:
+    """아두이노 응답 한 줄"""
+
+    def __init__(self, seq, event, detail=""):
+        self.seq = seq
+        self.event = event
+        self.detail = detail
+
+    def __repr__(self):
+        return f"ArduinoReply(seq={self.seq}, event={self.event!r}, detail={self.detail!r})"
+
+
+def next_seq(seq):
+    """1 ~ MAX_SEQ 범위에서 순환하는 시퀀스 번호"""
+    return seq % MAX_SEQ + 1
+
+
+def format_command(seq, command):
+    return f"{seq}:{command.strip().lower()}\n".encode("utf-8")
+
+
+def parse_reply(line):
+    """응답 한 줄을 파싱 - 형식이 맞지 않으면 None"""
+    line = line.strip()
+    if not line:
+        return None
+    if line == READY:
+        return ArduinoReply(None, READY)
+
+    parts = line.split(":", 2)
+    if len(parts) < 2 or not parts[0].isdigit():
+        return None
+    event = parts[1].upper()
+    if event not in (STARTED, DONE, ERR):
+        return None
+    detail = parts[2] if len(parts) > 2 else ""
+    return ArduinoReply(int(parts[0]), event, detail)
@@ -5,6 +5,10 @@ int ENA = 5;  // Enable
 const int FULL_ROTATION_STEPS = 6400;
 const int PULSE_DELAY = 200; // μs
 
+// 젯슨 프레임 프로토콜
+// 요청: "<seq>:<command>"  응답: "<seq>:STARTED" → "<seq>:DONE" (오류 시 "<seq>:ERR:<reason>")
+String currentSeq = "0";
+
 void setup() {
   pinMode(PUL, OUTPUT);
   pinMode(DIR, OUTPUT);
@@ -13,19 +17,57 @@ void setup() {
   digitalWrite(PUL, LOW);
   digitalWrite(DIR, LOW);
   digitalWrite(ENA, HIGH);
-  
+
   Serial.begin(9600);
+  Serial.println("READY");  // 젯슨은 고정 대기 대신 이 신호를 기다림
+}
+
+void reply(const char* event) {
+  Serial.print(currentSeq);
+  Serial.print(':');
+  Serial.println(event);
+}
+
+// "<seq>:" 접두사 분리 (없으면 seq = 0)
+String splitSeq(String line) {
+  int sep = line.indexOf(':');
+  if (sep > 0) {
+    String head = line.substring(0, sep);
+    bool numeric = true;
+    for (unsigned int i = 0; i < head.length(); i++) {
+      if (!isDigit(head.charAt(i))) {
+        numeric = false;
+        break;
+      }
+    }
+    if (numeric) {
+      currentSeq = head;
+      return line.substring(sep + 1);
+    }
+  }
+  currentSeq = "0";
+  return line;
 }
 
 void loop() {
   if (Serial.available()) {
-    String cmd = Serial.readStringUntil('\n');
-    cmd.trim();
-    cmd.toLowerCase();
+    String line = Serial.readStringUntil('\n');
+    line.trim();
+    line.toLowerCase();
+    if (line.length() == 0) {
+      return;
+    }
+    String cmd = splitSeq(line);
+
+    reply("STARTED");
 
-    // 비움 확인 명령들
-    if (cmd == "check:general trash") {
-      handleEmptyCheckStart();
+    // 연결 확인
+    if (cmd == "ping" || cmd == "test") {
+      // 동작 없음
+    }
+    // 비움 확인 명령들 (측정 대기는 젯슨이 라즈베리파이 응답으로 처리)
+    else if (cmd == "check:general trash") {
+      // 0도에서 측정 (회전 없음)
     } else if (cmd == "check:plastic") {
       handleEmptyCheck(1600);
     } else if (cmd == "check:metal") {
@@ -35,15 +77,32 @@ void loop() {
     } else if (cmd == "empty_check_home") {
       handleEmptyCheckHome();
     }
-    // 일반 분류 명령들
+    // 일반 분류 명령들: 해당 통 위치로 회전만 하고 DONE
     else if (cmd == "plastic") {
-      handleRotationWithWait(1600);
+      rotateSteps(1600, true);
     } else if (cmd == "metal") {
-      handleRotationWithWait(3200);
+      rotateSteps(3200, true);
     } else if (cmd == "glass") {
-      handleRotationWithWait(4800);
+      rotateSteps(4800, true);
     } else if (cmd == "general trash") {
-      handleGeneralTrash();
+      // 회전 없음
+    }
+    // 투입 완료 후 원점 복귀
+    else if (cmd == "return:plastic") {
+      rotateSteps(1600, false);
+    } else if (cmd == "return:metal") {
+      rotateSteps(3200, false);
+    } else if (cmd == "return:glass") {
+      rotateSteps(4800, false);
+    } else if (cmd == "return:general trash") {
+      // 회전 없음
+    }
+    // 상대 이동: "move:<+/-스텝>" (+ 반시계 / - 시계) - 젯슨이 현재 위치를 추적해 최단 경로로 보냄
+    else if (cmd.startsWith("move:")) {
+      if (!handleMove(cmd.substring(5))) {
+        reply("ERR:bad steps");
+        return;
+      }
     }
     // 입구 제어 명령들
     else if (cmd == "return_home") {
@@ -52,20 +111,13 @@ void loop() {
       handleBlockEntrance();
     } else if (cmd == "unblock_entrance") {
       handleUnblockEntrance();
+    } else {
+      reply("ERR:unknown command");
+      return;
     }
-  }
-}
-
-// 분류용 회전 처리: 회전 → 대기 → 복귀
-void handleRotationWithWait(int steps) {
-  rotateSteps(steps, true);     // 반시계 방향 회전
-  delay(8000);                  // 라즈베리파이 동작 대기
-  rotateSteps(steps, false);    // 시계 방향 복귀
-}
 
-// 일반쓰레기 처리: 회전 없이 대기만
-void handleGeneralTrash() {
-  delay(5000);  // 라즈베리파이 동작 대기
+    reply("DONE");
+  }
 }
 
 // 홈 위치로 복귀
@@ -83,15 +135,9 @@ void handleUnblockEntrance() {
   rotateSteps(1600, false);  // 90도 시계 회전
 }
 
-// 비움 확인 시작: 0도에서 측정
-void handleEmptyCheckStart() {
-  delay(2500);  // 라즈베리파이 측정 대기
-}
-
-// 비움 확인: 해당 위치로 이동 후 측정
+// 비움 확인: 해당 위치로 이동
 void handleEmptyCheck(int steps) {
   rotateSteps(steps, true);  // 반시계 방향 회전
-  delay(2500);               // 라즈베리파이 측정 대기
 }
 
 // 비움 확인 완료: 홈으로 복귀
@@ -99,6 +145,22 @@ void handleEmptyCheckHome() {
   rotateSteps(4800, false);  // 270도 복귀
 }
 
+// 상대 이동 - 한 바퀴 이내만 허용
+bool handleMove(String arg) {
+  arg.trim();
+  if (arg.startsWith("+")) {
+    arg = arg.substring(1);
+  }
+  long steps = arg.toInt();
+  if ((steps == 0 && arg != "0" && arg != "-0") || abs(steps) > FULL_ROTATION_STEPS) {
+    return false;
+  }
+  if (steps != 0) {
+    rotateSteps((int)abs(steps), steps > 0);
+  }
+  return true;
+}
+
 // 스테퍼 모터 회전 실행
 void rotateSteps(int steps, bool counterClockwise) {
   digitalWrite(DIR, counterClockwise ? LOW : HIGH);
@@ -110,4 +172,4 @@ void rotateSteps(int steps, bool counterClockwise) {
     digitalWrite(PUL, LOW);
     delayMicroseconds(PULSE_DELAY);
   }
-}
\ No newline at end of file
+}
@@ -0,0 +1,204 @@
+import time
+import logging
+import threading
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# 감지 상태
+EMPTY = "empty"        # 슈트 비어 있음 (배경 갱신)
+MOVING = "moving"      # 물체가 들어와 움직이는 중
+SETTLED = "settled"    # 멈춤 → 분류 요청함, 물체가 사라질 때까지 다시 세지 않음
+
+
+class ArrivalDetector:
+    """축소 프레임 차분으로 물체 도착을 감지 - 장면이 멈춘 뒤 한 번만 알림
+
+    - 프레임을 step 간격으로 건너뛴 격자만 사용 (기본: 가로 80픽셀, 640x480 → 80x60)
+    - 배경(지수 평균)과 어느 채널이든 다른 픽셀 비율 = 전경, 직전 프레임과 다른 비율 = 움직임
+    - 배경은 전경이 아닌 픽셀만 갱신 - 물체가 오래 있어도 조명 변화를 따라감
+    - 전경이 생기면 MOVING, 움직임이 settle_time 동안 없으면 SETTLED 로 바꾸며 알림
+    - SETTLED 에서는 전경이 clear_time 동안 사라져야 EMPTY 로 돌아감 (같은 물체 중복 방지)
+
+    update() 는 프레임과 시각만 받는 순수 계산이라 녹화 클립으로 그대로 벤치마크할 수 있다.
+    """
+
+    def __init__(self, step=None, diff_threshold=25, enter_fraction=0.01, exit_fraction=0.005,
+                 still_fraction=0.002, settle_time=0.3, clear_time=0.5, cooldown=1.0, bg_alpha=0.05):
+        self.step = step
+        self.diff_threshold = diff_threshold
+        self.enter_fraction = enter_fraction
+        self.exit_fraction = exit_fraction
+        self.still_fraction = still_fraction
+        self.settle_time = settle_time
+        self.clear_time = clear_time
+        self.cooldown = cooldown
+        self.bg_alpha = bg_alpha
+
+        self.state = EMPTY
+        self.background = None
+        self.prev = None
+        self.still_since = None
+        self.clear_since = None
+        self.last_trigger = -1e9
+        self.foreground = 0.0
+        self.motion = 0.0
+        self.triggers = 0
+
+    def downscale(self, frame):
+        step = self.step or max(1, frame.shape[1] // 80)
+        return frame[::step, ::step].astype(np.int16)
+
+    def changed(self, a, b):
+        """두 축소 프레임에서 diff_threshold 넘게 다른 픽셀 마스크 (채널 중 최대 차이)"""
+        diff = np.abs(a - b)
+        if diff.ndim == 3:
+            diff = diff.max(axis=2)
+        return diff > self.diff_threshold
+
+    def update(self, frame, timestamp):
+        """프레임 1장 처리 - 도착으로 판단한 순간 True"""
+        small = self.downscale(frame)
+        if self.background is None or self.background.shape != small.shape:
+            self.background = small.astype(np.float32)
+            self.prev = small
+            return False
+
+        mask = self.changed(small, self.background)
+        self.foreground = float(mask.mean())
+        self.motion = float(self.changed(small, self.prev).mean())
+        self.prev = small
+        rate = self.bg_alpha * ~mask
+        self.background += (rate[..., None] if small.ndim == 3 else rate) * (small - self.background)
+
+        if self.state == EMPTY:
+            if self.foreground >= self.enter_fraction:
+                self.state = MOVING
+                self.still_since = None
+            return False
+
+        if self.state == MOVING:
+            if self.foreground < self.exit_fraction:
+                self.state = EMPTY  # 손 등이 지나간 경우
+                return False
+            if self.motion > self.still_fraction:
+                self.still_since = None
+                return False
+            if self.still_since is None:
+                self.still_since = timestamp
+            if timestamp - self.still_since >= self.settle_time and timestamp - self.last_trigger >= self.cooldown:
+                self.state = SETTLED
+                self.clear_since = None
+                self.last_trigger = timestamp
+                self.triggers += 1
+                return True
+            return False
+
+        # SETTLED - 물체가 빠질 때까지 대기
+        if self.foreground < self.exit_fraction:
+            if self.clear_since is None:
+                self.clear_since = timestamp
+            if timestamp - self.clear_since >= self.clear_time:
+                self.state = EMPTY
+        elif self.clear_since is not None and self.motion > self.still_fraction:
+            # 빠지자마자 다음 물체가 들어옴 - 배경 갱신 없이 바로 MOVING
+            self.state = MOVING
+            self.still_since = None
+            self.clear_since = None
+        else:
+            self.clear_since = None
+        return False
+
+    def reject(self):
+        """분류 요청이 거절됨 - cooldown 후 같은 물체로 다시 알림"""
+        if self.state == SETTLED:
+            self.state = MOVING
+            self.triggers -= 1
+
+    def stats(self):
+        return {"state": self.state, "foreground": round(self.foreground, 4),
+                "motion": round(self.motion, 4), "triggers": self.triggers}
+
+
+class ArrivalWatcher:
+    """카메라 스트림에서 최대 fps 장씩 꺼내 감지기에 넣고, 도착하면 on_arrival(캡처 시각) 호출
+
+    ready() 가 False 인 동안(파이프라인이 작업을 받을 수 없음)은 도착을 보류했다가 받을 수 있게 되면
+    그 물체의 멈춘 프레임 시각으로 요청한다 (그 사이 물체가 빠지면 보류 취소).
+    on_arrival 이 False 를 반환하면 감지기에 알려 다시 시도한다.
+    """
+
+    def __init__(self, camera, detector, on_arrival, fps=10.0, ready=None):
+        self.camera = camera
+        self.detector = detector
+        self.on_arrival = on_arrival
+        self.ready = ready
+        self.period = 1.0 / fps
+        self.running = False
+        self.thread = None
+        self.pending = None  # 보류 중인 도착의 멈춘 프레임 캡처 시각
+
+        self.frames = 0
+        self.cpu_time = 0.0
+        self.rejected = 0
+        self.deferred = 0
+        self.started_at = None
+        self.last_arrival = None
+
+    def start(self):
+        self.running = True
+        self.started_at = time.time()
+        self.thread = threading.Thread(target=self._run, name="arrival", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def _run(self):
+        last = 0.0
+        while self.running:
+            fresh = self.camera.read_burst(1, after=last + self.period, timeout=1.0)
+            if not fresh:
+                continue
+            captured, frame = fresh[0]
+            last = captured
+            t0 = time.thread_time()
+            arrived = self.detector.update(frame, captured)
+            self.cpu_time += time.thread_time() - t0
+            self.frames += 1
+            if arrived:
+                self.last_arrival = captured
+                self.pending = captured
+                if self.ready is not None and not self.ready():
+                    self.deferred += 1
+                    log.debug("물체 도착 - 파이프라인이 받을 수 있을 때까지 보류")
+            elif self.pending is not None and self.detector.state != SETTLED:
+                self.pending = None  # 보류 중 물체가 빠짐
+            if self.pending is None or (self.ready is not None and not self.ready()):
+                continue
+
+            requested, self.pending = self.pending, None
+            try:
+                accepted = self.on_arrival(requested)
+            except Exception as e:
+                log.warning(f"자동 분류 요청 실패: {e}")
+                accepted = False
+            if accepted:
+                log.info("📷 물체 도착 감지 → 분류 시작")
+            else:
+                self.rejected += 1
+                self.detector.reject()
+
+    def stats(self):
+        elapsed = time.time() - self.started_at if self.started_at else 0.0
+        return {
+            **self.detector.stats(),
+            "frames": self.frames,
+            "rejected": self.rejected,
+            "deferred": self.deferred,
+            "cpu_ms_per_frame": round(self.cpu_time / self.frames * 1000, 3) if self.frames else None,
+            "cpu_percent_of_core": round(self.cpu_time / elapsed * 100, 2) if elapsed else None,
+        }
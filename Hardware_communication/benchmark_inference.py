@@ -0,0 +1,92 @@
+"""추론 백엔드 벤치마크 - 저장된 image/*.jpg 로 지연 시간 백분위수와 분류 일치율 비교
+
+예)
+  python benchmark_inference.py --backends ultralytics,onnx --device cpu
+  python benchmark_inference.py --export-onnx --imgsz 320
+"""
+import argparse
+import glob
+import time
+
+import cv2
+import numpy as np
+
+from inference_backends import create_backend, export_onnx
+from inference_engine import to_result
+
+
+def percentile_report(latencies):
+    ms = np.array(latencies) * 1000
+    return {
+        "mean": float(ms.mean()),
+        "p50": float(np.percentile(ms, 50)),
+        "p90": float(np.percentile(ms, 90)),
+        "p99": float(np.percentile(ms, 99)),
+        "max": float(ms.max()),
+    }
+
+
+def run_backend(backend, frames, warmup):
+    backend.load()
+    for frame in frames[:warmup]:
+        backend.predict(frame)
+
+    latencies, classes = [], []
+    for frame in frames:
+        t0 = time.perf_counter()
+        detections = backend.predict(frame)
+        latencies.append(time.perf_counter() - t0)
+        classes.append(to_result(detections).class_name)
+    return latencies, classes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="추론 백엔드 벤치마크")
+    parser.add_argument("--images", default="image/*.jpg", help="입력 이미지 glob (결과 이미지 *_result.jpg 제외)")
+    parser.add_argument("--backends", default="ultralytics,onnx", help="쉼표로 구분 (첫 번째가 기준)")
+    parser.add_argument("--pt", default="best.pt")
+    parser.add_argument("--onnx", default="best.onnx")
+    parser.add_argument("--imgsz", type=int, default=320)
+    parser.add_argument("--precision", default="fp32", choices=["fp16", "fp32"])
+    parser.add_argument("--device", default="cpu", help="cpu 또는 GPU 번호")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--export-onnx", action="store_true", help="best.pt → ONNX export 후 종료")
+    args = parser.parse_args()
+
+    if args.export_onnx:
+        path = export_onnx(args.pt, imgsz=args.imgsz, half=args.precision == "fp16")
+        print(f"ONNX export 완료: {path}")
+        return
+
+    paths = sorted(p for p in glob.glob(args.images) if not p.endswith("_result.jpg"))[:args.limit]
+    frames = [f for f in (cv2.imread(p) for p in paths) if f is not None]
+    if not frames:
+        print(f"이미지 없음: {args.images}")
+        return
+    print(f"이미지 {len(frames)}장, imgsz={args.imgsz}, precision={args.precision}, device={args.device}")
+
+    reference = None
+    for kind in args.backends.split(","):
+        kind = kind.strip()
+        model_path = args.pt if kind == "ultralytics" else args.onnx
+        backend = create_backend(kind, model_path, args.imgsz, args.precision, args.device)
+        try:
+            latencies, classes = run_backend(backend, frames, args.warmup)
+        except Exception as e:
+            print(f"[{kind}] 실행 실패: {e}")
+            continue
+
+        report = percentile_report(latencies)
+        line = (f"[{kind:11s}] mean {report['mean']:.1f}ms  p50 {report['p50']:.1f}  "
+                f"p90 {report['p90']:.1f}  p99 {report['p99']:.1f}  max {report['max']:.1f}")
+        if reference is None:
+            reference = (kind, classes)
+        else:
+            agree = sum(a == b for a, b in zip(reference[1], classes)) / len(classes)
+            line += f"  일치율({reference[0]} 기준) {agree * 100:.1f}%"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
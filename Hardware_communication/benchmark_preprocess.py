@@ -0,0 +1,162 @@
+"""전처리 벤치마크 - 기존 경로(640x480 전체 프레임) vs ROI 경로의 프레임당 CPU 시간 / 메모리 이동량
+
+예)
+  python benchmark_preprocess.py --calibrate "image/*.jpg" --save roi.json   # ROI 자동 보정
+  python benchmark_preprocess.py --images "image/*.jpg"                       # 오프라인 비교
+  python benchmark_preprocess.py --gst --seconds 10                           # 젯슨 카메라로 실제 파이프라인 비교
+"""
+import argparse
+import glob
+import time
+
+import cv2
+import numpy as np
+
+import preprocess
+from inference_backends import fill_input, letterbox
+
+
+def legacy_path(frame_bgrx, imgsz):
+    """기존: CPU videoconvert(640x480) → letterbox → 텐서 변환(여러 번 복사) - (텐서, 이동 바이트)"""
+    moved = frame_bgrx.nbytes
+    frame = cv2.cvtColor(frame_bgrx, cv2.COLOR_BGRA2BGR)
+    moved += frame.nbytes
+    img, _, _ = letterbox(frame, imgsz)
+    moved += frame.nbytes + img.nbytes  # resize 읽기/쓰기 + 패딩 캔버스
+    chw = np.ascontiguousarray(np.stack([img[:, :, ::-1].transpose(2, 0, 1)]))
+    moved += img.nbytes + chw.nbytes
+    tensor = chw.astype(np.float32)
+    moved += chw.nbytes + tensor.nbytes
+    tensor = tensor / 255.0
+    moved += tensor.nbytes * 2
+    return tensor, moved
+
+
+def roi_path(frame_bgrx, imgsz, buffer):
+    """ROI: (nvvidconv 가 잘라 축소한) 작은 프레임 변환 → 입력 버퍼에 한 번에 기록"""
+    moved = frame_bgrx.nbytes
+    frame = cv2.cvtColor(frame_bgrx, cv2.COLOR_BGRA2BGR)
+    moved += frame.nbytes
+    tensor, _ = fill_input([frame], imgsz, np.float32, buffer)
+    moved += frame.nbytes + tensor.nbytes
+    return tensor, moved
+
+
+def cpu_crop_path(frame_bgrx, imgsz, buffer, crop):
+    """CAMERA_CROP=cpu: 전체 프레임 변환 후 파이썬에서 자르기/축소 → 입력 버퍼"""
+    moved = frame_bgrx.nbytes
+    frame = cv2.cvtColor(frame_bgrx, cv2.COLOR_BGRA2BGR)
+    moved += frame.nbytes
+    small = crop(frame)
+    moved += frame.nbytes * crop.roi.w * crop.roi.h + small.nbytes
+    tensor, _ = fill_input([small], imgsz, np.float32, buffer)
+    moved += small.nbytes + tensor.nbytes
+    return tensor, moved
+
+
+def to_bgrx(frame):
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+
+
+def measure(fn, frames, repeat):
+    """프레임당 CPU 시간(ms) / 벽시계(ms) / 이동 바이트"""
+    moved = 0
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            _, m = fn(frame)
+            moved += m
+    n = repeat * len(frames)
+    return {"cpu_ms": (time.process_time() - cpu0) / n * 1000,
+            "wall_ms": (time.perf_counter() - wall0) / n * 1000,
+            "bytes": moved / n}
+
+
+def load_frames(pattern, limit):
+    paths = sorted(p for p in glob.glob(pattern) if not p.endswith("_result.jpg"))[:limit]
+    frames = [cv2.resize(f, (640, 480)) for f in (cv2.imread(p) for p in paths) if f is not None]
+    if not frames:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(8)]
+        print(f"이미지 없음: {pattern} → 합성 프레임 {len(frames)}장 사용")
+    return frames
+
+
+def offline(args, roi):
+    frames = load_frames(args.images, args.limit)
+    crop = preprocess.FramePreprocessor(roi, args.imgsz)
+    legacy_frames = [to_bgrx(f) for f in frames]
+    # nvvidconv 출력 흉내 - 자르기/축소는 VIC 에서 하므로 CPU 시간에 넣지 않음
+    roi_frames = [to_bgrx(crop(f)) for f in frames]
+    buffer = np.empty((1, 3, args.imgsz, args.imgsz), dtype=np.float32)
+
+    print(f"프레임 {len(frames)}장 x {args.repeat}회, imgsz={args.imgsz}, ROI {roi} → "
+          f"{roi_frames[0].shape[1]}x{roi_frames[0].shape[0]}")
+    results = {
+        "legacy": measure(lambda f: legacy_path(f, args.imgsz), legacy_frames, args.repeat),
+        "roi": measure(lambda f: roi_path(f, args.imgsz, buffer), roi_frames, args.repeat),
+        "roi_cpu_crop": measure(lambda f: cpu_crop_path(f, args.imgsz, buffer, crop),
+                                legacy_frames, args.repeat),
+    }
+    base = results["legacy"]
+    for name, r in results.items():
+        print(f"[{name:12s}] CPU {r['cpu_ms']:.3f}ms/프레임  벽시계 {r['wall_ms']:.3f}ms  "
+              f"메모리 이동 {r['bytes'] / 1e6:.2f}MB/프레임  "
+              f"(기존 대비 CPU {r['cpu_ms'] / base['cpu_ms'] * 100:.0f}%, "
+              f"이동량 {r['bytes'] / base['bytes'] * 100:.0f}%)")
+
+
+def live(args, roi):
+    """실제 카메라 파이프라인을 차례로 열어 프레임당 프로세스 CPU 시간 비교 (젯슨 전용)"""
+    from inference_engine import CameraStream
+    for name, pipeline_roi in (("legacy", None), ("roi", roi)):
+        pipeline = preprocess.gstreamer_pipeline(pipeline_roi, target=args.imgsz)
+        camera = CameraStream(pipeline)
+        camera.start()
+        time.sleep(1.0)  # 자동 노출 안정화
+        count, last = 0, time.time()
+        cpu0, t_end = time.process_time(), time.time() + args.seconds
+        while time.time() < t_end:
+            if camera.read_fresh(after=last, timeout=1.0) is not None:
+                count += 1
+                last = camera.frames[-1][0]
+        cpu = time.process_time() - cpu0
+        shape = camera.frames[-1][1].shape if camera.frames else None
+        camera.stop()
+        print(f"[{name:6s}] {shape} {count / args.seconds:.1f}fps  CPU {cpu / max(count, 1) * 1000:.2f}ms/프레임")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ROI 전처리 벤치마크")
+    parser.add_argument("--images", default="image/*.jpg", help="640x480 캡처 이미지 glob")
+    parser.add_argument("--imgsz", type=int, default=320)
+    parser.add_argument("--roi", default=None, help="x,y,w,h 비율 (없으면 CAMERA_ROI / roi.json)")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--calibrate", default=None, help="보정에 쓸 이미지 glob (물체가 투입된 프레임들)")
+    parser.add_argument("--save", default=None, help="보정 결과 저장 경로 (예: roi.json)")
+    parser.add_argument("--gst", action="store_true", help="젯슨 카메라로 실제 파이프라인 비교")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.calibrate:
+        frames = load_frames(args.calibrate, args.limit)
+        roi = preprocess.calibrate_roi(frames)
+        print(f"보정 결과: {roi} (이미지 {len(frames)}장)")
+        if args.save:
+            preprocess.save_roi(roi, args.save)
+            print(f"저장: {args.save}")
+    else:
+        roi = preprocess.Roi.parse(args.roi) if args.roi else preprocess.load_roi()
+    if roi.full:
+        roi = preprocess.Roi(0.25, 0.125, 0.5, 0.75)  # 비교용 기본 영역 (640x480 기준 320x360)
+        print(f"ROI 미설정 → 비교용 {roi}")
+
+    if args.gst:
+        live(args, roi)
+    else:
+        offline(args, roi)
+
+
+if __name__ == "__main__":
+    main()
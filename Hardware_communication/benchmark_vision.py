@@ -0,0 +1,199 @@
+"""캡처/추론 분리 벤치마크 - 한 프로세스(스레드) vs 캡처·추론 프로세스 분리의 정상 상태 처리량과 분류 지연
+
+메인 프로세스에는 Flask/업로드/주석 같은 파이썬 작업(--io-load)을 함께 돌려 GIL 경쟁을 재현한다.
+
+예)
+  python benchmark_vision.py                          # 합성 카메라 + CPU 부하 백엔드
+  python benchmark_vision.py --mode single --seconds 20
+  python benchmark_vision.py --real                   # 젯슨: 실제 카메라 파이프라인 + INFER_* 모델
+"""
+import argparse
+import functools
+import json
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import preprocess
+from inference_backends import Detection, InferenceBackend, create_backend, fill_input
+from inference_engine import CameraStream, InferenceEngine
+from temporal_voting import TemporalVoter
+
+
+class SyntheticCamera(CameraStream):
+    """1280x720 센서 프레임을 만들어 640x480 으로 변환 (videoconvert 흉내) - fps 고정"""
+
+    def __init__(self, fps=30, **kwargs):
+        super().__init__(pipeline=None, **kwargs)
+        self.fps = fps
+        self.count = 0
+
+    def _open(self):
+        self.open_time = 0.0
+
+    def _reader(self):
+        rng = np.random.default_rng(0)
+        sensor = rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+        period = 1.0 / self.fps
+        next_at = time.time()
+        while self.running:
+            x = int(500 + 300 * np.sin(next_at))
+            sensor[200:500, x:x + 200] = (self.count * 7) % 255
+            frame = cv2.cvtColor(cv2.cvtColor(cv2.resize(sensor, (640, 480)), cv2.COLOR_BGR2BGRA),
+                                 cv2.COLOR_BGRA2BGR)
+            self.count += 1
+            self._publish(time.time(), frame)
+            next_at += period
+            time.sleep(max(0.0, next_at - time.time()))
+
+
+class BusyBackend(InferenceBackend):
+    """GPU 없이 추론 부하 흉내 - 입력 텐서 변환 + 행렬 곱(GIL 해제) + 파이썬 후처리(GIL 점유)"""
+
+    name = "busy"
+
+    def __init__(self, layers=3, anchors=2100, **kwargs):
+        super().__init__(**kwargs)
+        self.layers = layers
+        self.anchors = anchors
+        self.weights = None
+
+    def load(self):
+        self.names = {0: "plastic"}
+        self.weights = np.random.default_rng(1).random((self.imgsz, self.imgsz), dtype=np.float32)
+
+    def predict_batch(self, frames):
+        tensor, _ = fill_input(frames, self.imgsz, np.float32)
+        out = []
+        for i in range(len(frames)):
+            feat = tensor[i, 0]
+            for _ in range(self.layers):
+                feat = feat @ self.weights
+            scores = feat.mean(axis=1).tolist()
+            best, best_score = 0, -1.0
+            for k in range(self.anchors):  # ultralytics 후처리처럼 파이썬 루프
+                score = scores[k % len(scores)] * 0.5
+                if score > best_score:
+                    best, best_score = k, score
+            out.append([Detection(0, "plastic", 0.8, np.array([100, 100, 300, 300], dtype=np.float32))])
+        return out
+
+
+def io_load(stop, load_ms, frame_source):
+    """메인 프로세스의 파이썬 작업 흉내 - 10ms 마다 주석 그리기 + JSON + 순수 파이썬 루프"""
+    while not stop.is_set():
+        t_end = time.perf_counter() + load_ms / 1000.0
+        frame = frame_source()
+        if frame is not None:
+            annotated = np.array(frame)
+            cv2.rectangle(annotated, (100, 100), (300, 300), (255, 0, 255), 2)
+            cv2.putText(annotated, "plastic 0.80", (100, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        while time.perf_counter() < t_end:
+            json.dumps({"levels": {str(i): i * 0.5 for i in range(50)}})
+        time.sleep(max(0.0, 0.01 - load_ms / 1000.0))
+
+
+def percentile(values, p):
+    return sorted(values)[min(len(values) - 1, int(len(values) * p))] if values else None
+
+
+def run(name, camera, engine, args, captured):
+    voter = TemporalVoter(engine, burst_size=6)
+    stop = threading.Event()
+    if args.io_load > 0:
+        loader = threading.Thread(target=io_load, args=(stop, args.io_load,
+                                                        lambda: camera.read_fresh(after=0, timeout=0.1)),
+                                  daemon=True)
+        loader.start()
+
+    time.sleep(args.warmup)
+    latencies = []
+    frames0, t0 = captured(), time.time()
+    while time.time() - t0 < args.seconds:
+        requested = time.time()
+        if args.mode == "vote":
+            vote = voter.classify(camera, after=requested)
+            ok = vote is not None
+        else:
+            frame = camera.read_fresh(after=requested, timeout=1.0)
+            ok = frame is not None and engine.classify(frame) is not None
+        if ok:
+            latencies.append(time.time() - requested)
+    elapsed = time.time() - t0
+    capture_fps = (captured() - frames0) / elapsed
+    stop.set()
+
+    result = {
+        "classifications_per_s": round(len(latencies) / elapsed, 2),
+        "capture_fps": round(capture_fps, 1),
+        "latency_ms_p50": round(percentile(latencies, 0.5) * 1000, 1) if latencies else None,
+        "latency_ms_p90": round(percentile(latencies, 0.9) * 1000, 1) if latencies else None,
+    }
+    print(f"[{name:8s}] 분류 {result['classifications_per_s']}/s, 캡처 {result['capture_fps']}fps, "
+          f"지연 p50 {result['latency_ms_p50']}ms p90 {result['latency_ms_p90']}ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="캡처/추론 프로세스 분리 벤치마크")
+    parser.add_argument("--mode", choices=("vote", "single"), default="vote")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--imgsz", type=int, default=320)
+    parser.add_argument("--io-load", type=float, default=6.0, help="메인 프로세스 파이썬 작업 (10ms 당 ms)")
+    parser.add_argument("--real", action="store_true", help="실제 카메라 파이프라인 + INFER_* 모델 (젯슨)")
+    parser.add_argument("--report", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    if args.real:
+        roi = preprocess.load_roi()
+        camera_factory = functools.partial(CameraStream, preprocess.gstreamer_pipeline(roi, target=args.imgsz))
+        backend_factory = create_backend
+        shape = preprocess.frame_shape(roi, args.imgsz)
+    else:
+        camera_factory = functools.partial(SyntheticCamera, fps=args.fps)
+        backend_factory = functools.partial(BusyBackend, imgsz=args.imgsz)
+        shape = (480, 640, 3)
+    results = {}
+
+    # 기존: 한 프로세스 안의 스레드
+    camera = camera_factory()
+    count = [0]
+    camera_publish = camera._publish
+
+    def counted(captured, frame):
+        count[0] += 1
+        camera_publish(captured, frame)
+
+    camera._publish = counted
+    engine = InferenceEngine(backend_factory())
+    engine.load(warmup_shape=shape)
+    camera.start()
+    results["thread"] = run("thread", camera, engine, args, lambda: count[0])
+    camera.stop()
+
+    # 분리: 캡처 프로세스 + 추론 프로세스 + 공유 메모리 링 버퍼
+    from vision_processes import VisionProcesses
+    vision = VisionProcesses(camera_factory, backend_factory, shape)
+    try:
+        vision.engine.load()
+        vision.camera.start()
+        results["process"] = run("process", vision.camera, vision.engine, args, lambda: vision.ring.latest)
+        results["process"]["stale_frames"] = vision.engine.stale
+    finally:
+        vision.close()
+
+    base, split = results["thread"], results["process"]
+    if base["classifications_per_s"] and base["latency_ms_p50"]:
+        print(f"처리량 x{split['classifications_per_s'] / base['classifications_per_s']:.2f}, "
+              f"지연 p50 {base['latency_ms_p50']} → {split['latency_ms_p50']}ms")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
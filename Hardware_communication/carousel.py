@@ -0,0 +1,229 @@
+import os
+import json
+import logging
+import itertools
+import threading
+
+log = logging.getLogger(__name__)
+
+STEPS_PER_REV = 6400  # arduino_with_jet.ino FULL_ROTATION_STEPS
+
+# 통 위치 (원점 기준 반시계 스텝) - get_rotation_angle 과 같은 배치
+BIN_POSITIONS = {
+    "general trash": 0,
+    "plastic": 1600,
+    "metal": 3200,
+    "glass": 4800,
+}
+BLOCK_OFFSET = 1600  # block_entrance / unblock_entrance 회전량
+
+# 기존 고정 명령의 회전량 (스케치 loop() 와 같은 값) - 직접 보낸 명령도 위치 추적에 반영
+LEGACY_STEPS = {
+    "check:plastic": 1600, "check:metal": 1600, "check:glass": 1600,
+    "empty_check_home": -4800,
+    "plastic": 1600, "metal": 3200, "glass": 4800,
+    "return:plastic": -1600, "return:metal": -3200, "return:glass": -4800,
+    "return_home": -4800,
+    "block_entrance": BLOCK_OFFSET, "unblock_entrance": -BLOCK_OFFSET,
+}
+
+
+def move_command(steps):
+    """상대 이동 명령 - + 반시계 / - 시계"""
+    return f"move:{steps:+d}"
+
+
+def command_steps(command):
+    """명령이 만드는 회전량 (위치 변화 없는 명령은 0, 알 수 없으면 None)"""
+    command = command.strip().lower()
+    if command.startswith("move:"):
+        try:
+            return int(command[5:])
+        except ValueError:
+            return None
+    return LEGACY_STEPS.get(command, 0)
+
+
+class CarouselPlanner:
+    """회전판 현재 위치를 추적하고 다음 통까지 최소 상대 이동만 보내는 계획기
+
+    - 투입 후 원점으로 돌아가지 않고 그 자리에 머묾 (같은 통이 이어지면 이동 0)
+    - wrap=True 면 양방향 최단 경로 (270도 → 0도 는 +90도), False 면 0~270도 범위 안에서만 이동
+    - 원점 복귀는 입구를 막을 때와 종료할 때만
+    - 위치는 state_path 에 저장해 젯슨 재시작 후에도 이어서 사용 (아두이노 리셋은 모터를 움직이지 않음)
+    - 입구가 막혀 있으면 이동하지 않음 (꽉 찬 통 보호) - 해제는 비움 확인에서 unblock() 으로만
+
+    send 는 명령 문자열 → 성공 시 결과, 실패 시 None (send_arduino_command).
+    실패한 이동은 위치를 갱신하지 않는다.
+    """
+
+    def __init__(self, send, positions=None, steps_per_rev=STEPS_PER_REV, wrap=True, state_path=None):
+        self.send = send
+        self.positions = dict(positions or BIN_POSITIONS)
+        self.steps_per_rev = steps_per_rev
+        self.wrap = wrap
+        self.state_path = state_path
+        self.lock = threading.RLock()
+        self.position = 0
+        self.blocked = False
+
+        self.moves = 0
+        self.skipped = 0
+        self.steps_moved = 0
+        self.homes = 0
+        self.failed = 0
+        self.load()
+
+    # ------------------ 위치 계산 ------------------
+    def delta(self, target, start=None):
+        """start(기본 현재 위치) → target 스텝까지의 부호 있는 최소 이동량"""
+        start = self.position if start is None else start
+        if not self.wrap:
+            return target - start
+        d = (target - start) % self.steps_per_rev
+        return d - self.steps_per_rev if d > self.steps_per_rev // 2 else d
+
+    def plan(self, bin_name):
+        """bin_name 까지 보낼 이동량 (입구가 막혀 있으면 해제한 뒤 기준)"""
+        start = self.position - BLOCK_OFFSET if self.blocked else self.position
+        return self.delta(self.positions[bin_name], start)
+
+    def order(self, bin_names):
+        """현재 위치에서 출발해 모든 통을 도는 총 이동량이 최소인 방문 순서"""
+        start = self.position - BLOCK_OFFSET if self.blocked else self.position
+        best, best_cost = list(bin_names), None
+        for perm in itertools.permutations(bin_names):
+            position, cost = start, 0
+            for name in perm:
+                target = self.positions[name]
+                if self.wrap:
+                    d = (target - position) % self.steps_per_rev
+                    cost += min(d, self.steps_per_rev - d)
+                else:
+                    cost += abs(target - position)
+                position = target
+            if best_cost is None or cost < best_cost:
+                best, best_cost = list(perm), cost
+        return best
+
+    def current_bin(self):
+        for name, target in self.positions.items():
+            if not self.blocked and target % self.steps_per_rev == self.position:
+                return name
+        return None
+
+    # ------------------ 이동 ------------------
+    def move_to(self, bin_name):
+        """bin_name 위치로 최소 이동 - (성공 여부, 이동 스텝, 명령 결과), 입구가 막혀 있으면 실패"""
+        with self.lock:
+            if self.blocked:
+                log.warning(f"입구가 막혀 있어 {bin_name} 위치로 이동하지 않음")
+                return False, 0, None
+            steps = self.plan(bin_name)
+            if steps == 0:
+                self.skipped += 1
+                return True, 0, {"ack": 0.0, "motion": 0.0, "queue": 0.0}
+            result = self._move(steps)
+            return result is not None, steps, result
+
+    def home(self):
+        """원점(일반쓰레기 위치)으로 - 이미 원점이면 이동 없음, 입구가 막혀 있으면 실패"""
+        with self.lock:
+            if self.blocked:
+                return False
+            if self.position == 0:
+                return True
+            ok = self._move(self.delta(0)) is not None
+            if ok:
+                self.homes += 1
+            return ok
+
+    def block(self):
+        """원점 복귀 후 입구 막기 (block_entrance 는 원점 기준 동작)"""
+        with self.lock:
+            if self.blocked:
+                return True
+            if not self.home():
+                return False
+            if self.command("block_entrance") is None:
+                return False
+            self.blocked = True
+            self.save()
+            return True
+
+    def unblock(self):
+        with self.lock:
+            if not self.blocked:
+                return True
+            if self.command("unblock_entrance") is None:
+                return False
+            self.blocked = False
+            self.save()
+            return True
+
+    def command(self, message):
+        """임의 명령 전송 (테스트 API 등) - 회전하는 명령이면 위치에 반영"""
+        with self.lock:
+            result = self.send(message)
+            steps = command_steps(message)
+            if result is None:
+                self.failed += 1
+            elif steps:
+                self._advance(steps)
+            return result
+
+    def _move(self, steps):
+        result = self.send(move_command(steps))
+        if result is None:
+            self.failed += 1
+            log.error(f"회전판 이동 실패 ({steps:+d} 스텝) - 위치 {self.position} 유지")
+            return None
+        self._advance(steps)
+        return result
+
+    def _advance(self, steps):
+        self.position = (self.position + steps) % self.steps_per_rev if self.wrap else self.position + steps
+        self.moves += 1
+        self.steps_moved += abs(steps)
+        self.save()
+
+    # ------------------ 상태 저장 ------------------
+    def load(self):
+        if not self.state_path:
+            return
+        try:
+            with open(self.state_path) as f:
+                data = json.load(f)
+            self.position = int(data.get("position", 0))
+            self.blocked = bool(data.get("blocked", False))
+            if self.position or self.blocked:
+                log.info(f"회전판 위치 복원: {self.position} 스텝{' (입구 막힘)' if self.blocked else ''}")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            log.warning(f"회전판 위치 파일 읽기 실패 ({self.state_path}): {e} - 원점으로 가정")
+
+    def save(self):
+        if not self.state_path:
+            return
+        tmp = self.state_path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump({"position": self.position, "blocked": self.blocked}, f)
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            log.warning(f"회전판 위치 저장 실패: {e}")
+
+    def stats(self):
+        return {
+            "position": self.position,
+            "angle": round(self.position * 360.0 / self.steps_per_rev, 1),
+            "bin": self.current_bin(),
+            "blocked": self.blocked,
+            "wrap": self.wrap,
+            "moves": self.moves,
+            "skipped_moves": self.skipped,
+            "steps_moved": self.steps_moved,
+            "homes": self.homes,
+            "failed": self.failed,
+        }
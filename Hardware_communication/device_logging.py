@@ -0,0 +1,141 @@
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+
+# 설정값 (환경 변수로 변경 가능)
+#   LOG_LEVEL     : DEBUG | INFO | WARNING ... (기본 INFO - 사이클 요약/경고/오류만)
+#   LOG_VERBOSE   : 1 이면 개발용 - 단계별 메시지(DEBUG)까지 출력 (LOG_LEVEL 이 있으면 그쪽 우선)
+#   LOG_FILE      : JSON Lines 로그 파일 경로 (크기 기준 회전)
+#   LOG_MAX_BYTES : 회전 기준 크기 (기본 5MB), 백업 3개 유지
+STRUCTURED_FIELDS = ("cycle", "bin", "phase", "duration", "job")
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """한 줄에 JSON 하나 - 시각, 레벨, 로거, 메시지 + 구조화 필드(cycle, bin, phase, duration)"""
+
+    def format(self, record):
+        data = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """사람이 읽는 한 줄 - 구조화 필드는 뒤에 key=value 로"""
+
+    def format(self, record):
+        text = f"{time.strftime('%H:%M:%S', time.localtime(record.created))} " \
+               f"{record.levelname[0]} {record.getMessage()}"
+        fields = [f"{f}={getattr(record, f)}" for f in STRUCTURED_FIELDS
+                  if getattr(record, f, None) is not None]
+        if fields:
+            text += "  [" + " ".join(fields) + "]"
+        if record.exc_info:
+            text += "\n" + self.formatException(record.exc_info)
+        return text
+
+
+def _level(level=None, verbose=None):
+    if verbose is None:
+        verbose = os.environ.get("LOG_VERBOSE", "0") == "1"
+    return (level or os.environ.get("LOG_LEVEL") or ("DEBUG" if verbose else "INFO")).upper()
+
+
+def setup_logging(name, log_file=None, level=None, verbose=None, max_bytes=None, backups=3):
+    """큐 기반 비동기 로깅 설정 - 호출 스레드는 큐에 넣기만 하고 출력은 리스너 스레드가 처리"""
+    global _listener
+    level = _level(level, verbose)
+    log_file = log_file or os.environ.get("LOG_FILE")
+    max_bytes = max_bytes or int(os.environ.get("LOG_MAX_BYTES", 5 * 1024 * 1024))
+
+    handlers = []
+    console = logging.StreamHandler()
+    console.setFormatter(ConsoleFormatter())
+    handlers.append(console)
+    if log_file:
+        os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+        rotating = logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes,
+                                                        backupCount=backups, encoding="utf-8")
+        rotating.setFormatter(JsonFormatter())
+        handlers.append(rotating)
+
+    if _listener is not None:
+        _listener.stop()
+    log_queue = queue.Queue(maxsize=10000)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DroppingQueueHandler(log_queue))
+    root.setLevel(level)
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return logging.getLogger(name)
+
+
+def shutdown_logging():
+    """남은 로그를 모두 출력하고 리스너 종료"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def child_logging(log_queue, level=None):
+    """자식 프로세스 - 모든 기록을 부모 프로세스로 보냄 (파일/콘솔 출력은 부모 설정 하나만 사용)"""
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(_level(level))
+
+
+def forward_child_logs(log_queue):
+    """부모 프로세스 - 자식이 보낸 기록을 같은 이름의 로거로 다시 흘려보내는 리스너 (start/stop)"""
+    return logging.handlers.QueueListener(log_queue, _ForwardHandler())
+
+
+class _ForwardHandler(logging.Handler):
+    def emit(self, record):
+        logger = logging.getLogger(record.name)
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
+
+
+class CycleLogger(logging.LoggerAdapter):
+    """사이클 ID / 통 같은 공통 필드를 모든 기록에 붙이는 어댑터 (호출 시 extra 와 병합)"""
+
+    def process(self, msg, kwargs):
+        kwargs["extra"] = {**self.extra, **kwargs.get("extra", {})}
+        return msg, kwargs
+
+
+def cycle_logger(logger, **fields):
+    return CycleLogger(logger, {k: v for k, v in fields.items() if v is not None})
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """큐가 가득 차면 기다리지 않고 버림 - 로깅이 분류 경로를 막지 않도록"""
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DroppingQueueHandler.dropped += 1
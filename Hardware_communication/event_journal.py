@@ -0,0 +1,249 @@
+import logging
+import gzip
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+import metrics
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT UNIQUE NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created REAL NOT NULL,
+    synced INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS events_pending ON events (synced, seq);
+"""
+
+
+class EventJournal:
+    """장치 이벤트를 먼저 로컬 SQLite 에 기록하는 append-only 저널
+
+    - 기록은 네트워크와 무관하게 바로 끝남 (WAL, 재부팅 후에도 미전송분 유지)
+    - 이벤트 ID 는 장치 이름 + uuid 라 같은 이벤트를 여러 번 보내도 서버에서 한 번만 반영
+    - 전송 완료분은 최근 keep_synced 건만 남기고 정리
+    """
+
+    def __init__(self, path="events.db", device_id="device", keep_synced=1000):
+        self.path = path
+        self.device_id = device_id
+        self.keep_synced = keep_synced
+        self.lock = threading.Lock()
+        self.appended = threading.Event()  # 전송 스레드 깨우기용
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def append(self, kind, payload, created=None):
+        """이벤트 기록 후 ID 반환"""
+        event_id = f"{self.device_id}-{uuid.uuid4().hex}"
+        with self.lock:
+            self.db.execute("INSERT INTO events (id, kind, payload, created) VALUES (?, ?, ?, ?)",
+                            (event_id, kind, json.dumps(payload, ensure_ascii=False),
+                             created or time.time()))
+        self.appended.set()
+        return event_id
+
+    def pending(self, limit=100):
+        """미전송 이벤트를 기록 순서대로 [{id, kind, created, payload}]"""
+        with self.lock:
+            rows = self.db.execute("SELECT id, kind, created, payload FROM events WHERE synced = 0 "
+                                   "ORDER BY seq LIMIT ?", (limit,)).fetchall()
+        return [{"id": i, "kind": k, "created": c, "payload": json.loads(p)} for i, k, c, p in rows]
+
+    def mark_synced(self, ids):
+        if not ids:
+            return
+        with self.lock:
+            self.db.executemany("UPDATE events SET synced = 1 WHERE id = ?", [(i,) for i in ids])
+
+    def prune(self):
+        """전송 완료분 중 최근 keep_synced 건만 남김 - 지운 개수 반환"""
+        with self.lock:
+            cur = self.db.execute(
+                "DELETE FROM events WHERE synced = 1 AND seq NOT IN "
+                "(SELECT seq FROM events WHERE synced = 1 ORDER BY seq DESC LIMIT ?)", (self.keep_synced,))
+        return cur.rowcount
+
+    def backlog(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM events WHERE synced = 0").fetchone()[0]
+
+    def oldest_pending(self):
+        """가장 오래된 미전송 이벤트의 기록 시각 (없으면 None)"""
+        with self.lock:
+            return self.db.execute("SELECT MIN(created) FROM events WHERE synced = 0").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class JournalSyncer:
+    """저널의 미전송 이벤트를 묶어서 EC2 로 보내는 백그라운드 스레드
+
+    - 기록되면 바로 깨어나 linger 초 동안 더 모은 뒤 최대 batch_size 건을 gzip JSON 으로 한 번에 전송
+    - 실패하면 지수 백오프 (interval → max_backoff), 이벤트는 저널에 남아 있다가 복구 후 순서대로 전송
+    - 서버가 /events/batch 를 모르면(404) 기존 단건 API (/update, /begin) 로 전환
+    """
+
+    def __init__(self, journal, api, endpoint="/events/batch", batch_size=50, linger=0.2,
+                 interval=2.0, max_backoff=60.0):
+        self.journal = journal
+        self.api = api
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.linger = linger
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.batch_supported = True
+        self.running = False
+        self.thread = None
+        self.failures = 0  # 연속 실패 횟수
+        self.next_attempt = 0
+
+        self.synced = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.batches = 0
+        self.bytes_raw = 0
+        self.bytes_sent = 0
+        self.last_lag = None
+        self.last_success = None
+        self.last_error = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="event-sync", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=5.0):
+        """남은 이벤트를 한 번 더 보내 보고 종료 (실패분은 다음 실행 때 전송)"""
+        self.running = False
+        self.journal.appended.set()
+        if self.thread:
+            self.thread.join(timeout=timeout)
+
+    def stats(self):
+        oldest = self.journal.oldest_pending()
+        return {
+            "backlog": self.journal.backlog(),
+            "sync_lag_s": round(time.time() - oldest, 2) if oldest else 0.0,
+            "last_lag_s": round(self.last_lag, 3) if self.last_lag is not None else None,
+            "synced": self.synced,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "bytes_raw": self.bytes_raw,
+            "bytes_sent": self.bytes_sent,
+            "failures": self.failures,
+            "batch_supported": self.batch_supported,
+            "last_success": self.last_success,
+            "last_error": self.last_error,
+        }
+
+    # ------------------ 전송 스레드 ------------------
+    def _run(self):
+        # 기록이 없어도 interval 마다 깨어나 재부팅 전 미전송분 / 백오프가 끝난 이벤트를 보냄
+        while self.running:
+            self.journal.appended.wait(self.interval)
+            if not self.running:
+                break
+            wait = self.next_attempt - time.time()
+            if wait > 0:
+                time.sleep(min(wait, 0.5))
+                continue
+            time.sleep(self.linger)  # 연달아 기록되는 이벤트를 한 묶음으로
+            self.journal.appended.clear()
+            self._drain()
+        if not self.failures:
+            self._drain()
+
+    def _drain(self):
+        """미전송분이 없거나 전송이 실패할 때까지 묶음 단위로 전송"""
+        while True:
+            events = self.journal.pending(self.batch_size)
+            if not events:
+                return
+            try:
+                done = self._send(events)
+            except Exception as e:
+                done = None
+                self.last_error = str(e)
+            if done is None:
+                self.failures += 1
+                delay = min(self.max_backoff, self.interval * 2 ** (self.failures - 1))
+                self.next_attempt = time.time() + delay
+                log.warning(f"이벤트 전송 실패 ({self.last_error}) - 미전송 {self.journal.backlog()}건, "
+                            f"{delay:.0f}초 후 재시도")
+                return
+            self.journal.mark_synced(done)
+            self.last_lag = time.time() - min(e["created"] for e in events)
+            self.last_success = time.time()
+            self.failures = 0
+            self.next_attempt = 0
+            self.journal.prune()
+
+    def _send(self, events):
+        """전송 후 저널에서 완료 처리할 ID 목록 반환 (실패 시 None)"""
+        if not self.batch_supported:
+            return self._send_legacy(events)
+        body = json.dumps({"device_id": self.journal.device_id, "events": events},
+                          ensure_ascii=False).encode("utf-8")
+        data = gzip.compress(body)
+        t0 = time.time()
+        res = self.api.post(self.endpoint, data=data, retries=0,
+                            headers={"Content-Type": "application/json", "Content-Encoding": "gzip"})
+        metrics.observe("event_sync", time.time() - t0)
+        if res.status_code == 404:
+            log.info(f"서버가 {self.endpoint} 미지원 - 단건 전송으로 전환")
+            self.batch_supported = False
+            return self._send_legacy(events)
+        if res.status_code != 200:
+            self.last_error = f"{res.status_code} - {res.text[:200]}"
+            return None
+
+        reply = res.json()
+        accepted = reply.get("accepted", [])
+        duplicates = reply.get("duplicates", [])
+        rejected = reply.get("rejected", [])
+        if rejected:
+            # 서버가 처리할 수 없는 이벤트는 다시 보내도 같으므로 완료 처리 (뒤 이벤트가 막히지 않도록)
+            log.warning(f"서버가 거부한 이벤트 {len(rejected)}건: {rejected[:3]}")
+        self.synced += len(accepted)
+        self.duplicates += len(duplicates)
+        self.rejected += len(rejected)
+        self.batches += 1
+        self.bytes_raw += len(body)
+        self.bytes_sent += len(data)
+        return accepted + duplicates + rejected
+
+    def _send_legacy(self, events):
+        """구버전 서버 - 이벤트마다 기존 API 호출 (앞에서부터 성공한 것까지 완료 처리)"""
+        done = []
+        for event in events:
+            payload = event["payload"]
+            if event["kind"] == "level":
+                res = self.api.post("/update", json={"class": payload["class"], "level": payload["level"],
+                                                     "device_id": self.journal.device_id})
+            elif event["kind"] == "begin":
+                res = self.api.post("/begin")
+            else:
+                done.append(event["id"])  # 단건 API 가 없는 종류는 보내지 않음
+                continue
+            if res.status_code != 200:
+                self.last_error = f"{res.status_code} - {res.text[:200]}"
+                break
+            done.append(event["id"])
+            self.synced += 1
+        if not done:
+            return None
+        return done
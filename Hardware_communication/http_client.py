@@ -0,0 +1,127 @@
+import time
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 재시도 대상 HTTP 상태 코드 (게이트웨이/일시적 오류)
+RETRY_STATUS = (502, 503, 504)
+
+
+class EndpointStats:
+    """엔드포인트별 지연 시간 / 오류 카운터"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_status = None
+        self.last_error = None
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_ms": (self.total_latency / self.count) * 1000 if self.count else None,
+            "max_ms": self.max_latency * 1000,
+            "last_status": self.last_status,
+            "last_error": self.last_error,
+        }
+
+
+class ApiClient:
+    """EC2 서버용 공용 HTTP 클라이언트 - keep-alive 세션 풀, 엔드포인트별 타임아웃, 백오프 재시도
+
+    GET 은 연결 오류/타임아웃/5xx 에서 재시도하고, 그 외 메서드는 요청이 서버에
+    도달하지 않은 것이 확실한 연결 타임아웃에서만 재시도한다 (중복 INSERT 방지).
+    """
+
+    def __init__(self, base_url, timeouts=None, default_timeout=(3.05, 5),
+                 retries=2, backoff=0.3, pool_size=4):
+        self.base_url = base_url.rstrip("/")
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.retries = retries
+        self.backoff = backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def url(self, path):
+        return f"{self.base_url}{path}"
+
+    def _stats(self, path):
+        with self.lock:
+            if path not in self.endpoints:
+                self.endpoints[path] = EndpointStats()
+            return self.endpoints[path]
+
+    def _should_retry(self, method, error=None, status=None):
+        if method == "GET":
+            if error is not None:
+                return isinstance(error, (requests.ConnectionError, requests.Timeout))
+            return status in RETRY_STATUS
+        return isinstance(error, requests.exceptions.ConnectTimeout)
+
+    def request(self, method, path, retries=None, **kwargs):
+        """요청 실행 - 재시도 후에도 실패하면 requests 예외 발생"""
+        method = method.upper()
+        retries = self.retries if retries is None else retries
+        kwargs.setdefault("timeout", self.timeouts.get(path, self.default_timeout))
+        stats = self._stats(path)
+
+        attempt = 0
+        while True:
+            t0 = time.time()
+            try:
+                res = self.session.request(method, self.url(path), **kwargs)
+            except requests.RequestException as e:
+                self._record(stats, time.time() - t0, error=e)
+                if attempt < retries and self._should_retry(method, error=e):
+                    attempt += 1
+                    stats.retries += 1
+                    time.sleep(self.backoff * (2 ** (attempt - 1)))
+                    continue
+                raise
+
+            self._record(stats, time.time() - t0, status=res.status_code)
+            if attempt < retries and self._should_retry(method, status=res.status_code):
+                attempt += 1
+                stats.retries += 1
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+                continue
+            return res
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def _record(self, stats, latency, status=None, error=None):
+        with self.lock:
+            stats.count += 1
+            stats.total_latency += latency
+            stats.max_latency = max(stats.max_latency, latency)
+            if error is not None:
+                stats.errors += 1
+                stats.last_error = str(error)
+            else:
+                stats.last_status = status
+                if status >= 400:
+                    stats.errors += 1
+
+    def stats(self):
+        with self.lock:
+            return {path: s.as_dict() for path, s in self.endpoints.items()}
+
+    def close(self):
+        self.session.close()
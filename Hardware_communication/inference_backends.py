@@ -0,0 +1,239 @@
+import os
+import ast
+
+import cv2
+import numpy as np
+
+# 설정값 (환경 변수로 변경 가능)
+#   INFER_BACKEND   : ultralytics | onnx | tensorrt
+#   INFER_MODEL     : best.pt / best.onnx / best.engine
+#   INFER_IMGSZ     : 입력 크기 (정사각형)
+#   INFER_PRECISION : fp16 | fp32
+#   INFER_DEVICE    : 0 (GPU) | cpu
+BACKENDS = ("ultralytics", "onnx", "tensorrt")
+
+
+class Detection:
+    """검출 1건 (원본 프레임 좌표 기준)"""
+
+    def __init__(self, class_id, class_name, confidence, xyxy):
+        self.class_id = class_id
+        self.class_name = class_name
+        self.confidence = confidence
+        self.xyxy = xyxy
+
+    def __repr__(self):
+        return f"Detection({self.class_name!r}, {self.confidence:.2f})"
+
+
+class InferenceBackend:
+    """추론 백엔드 공통 인터페이스"""
+
+    name = "base"
+
+    def __init__(self, imgsz=320, half=True, device=0):
+        self.imgsz = imgsz
+        self.half = half
+        self.device = device
+        self.names = {}
+
+    def load(self):
+        raise NotImplementedError
+
+    def predict(self, frame):
+        """프레임 1장 → Detection 목록 (신뢰도 내림차순)"""
+        return self.predict_batch([frame])[0]
+
+    def predict_batch(self, frames):
+        raise NotImplementedError
+
+
+class UltralyticsBackend(InferenceBackend):
+    """기존 Ultralytics(PyTorch, 또는 export 된 .engine) 경로"""
+
+    name = "ultralytics"
+
+    def __init__(self, model_path="best.pt", **kwargs):
+        super().__init__(**kwargs)
+        self.model_path = model_path
+        self.model = None
+
+    def load(self):
+        from ultralytics import YOLO
+        self.model = YOLO(self.model_path)
+        self.names = self.model.names
+
+    def predict_batch(self, frames):
+        use_half = self.half and self.device != "cpu"
+        results = self.model.predict(source=list(frames), imgsz=self.imgsz, device=self.device,
+                                     half=use_half, verbose=False)
+        out = []
+        for r in results:
+            dets = []
+            if len(r.boxes):
+                confs = r.boxes.conf.cpu().numpy()
+                clss = r.boxes.cls.cpu().numpy().astype(int)
+                xyxys = r.boxes.xyxy.cpu().numpy()
+                for i in np.argsort(-confs):
+                    dets.append(Detection(int(clss[i]), self.names[int(clss[i])], float(confs[i]), xyxys[i]))
+            out.append(dets)
+        return out
+
+
+def letterbox(frame, size):
+    """비율 유지 리사이즈 + 회색 패딩 - (이미지, 배율, (pad_x, pad_y))"""
+    h, w = frame.shape[:2]
+    if h == size and w == size:
+        return frame, 1.0, (0, 0)  # 이미 모델 입력 크기 (GStreamer 에서 잘라 축소한 프레임)
+    gain = min(size / h, size / w)
+    nh, nw = int(round(h * gain)), int(round(w * gain))
+    pad_x, pad_y = (size - nw) // 2, (size - nh) // 2
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    canvas[pad_y:pad_y + nh, pad_x:pad_x + nw] = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    return canvas, gain, (pad_x, pad_y)
+
+
+def fill_input(frames, size, dtype, out=None):
+    """letterbox 후 BGR→RGB, HWC→CHW, 0~1 정규화를 입력 버퍼에 한 번에 기록 - (버퍼, 변환 목록)
+
+    out 이 맞는 모양이면 그대로 재사용해 프레임마다 새 텐서를 만들지 않는다.
+    """
+    shape = (len(frames), 3, size, size)
+    if out is None or out.shape != shape or out.dtype != dtype:
+        out = np.empty(shape, dtype=dtype)
+    transforms = []
+    for i, frame in enumerate(frames):
+        img, gain, pad = letterbox(frame, size)
+        np.multiply(img[:, :, ::-1].transpose(2, 0, 1), 1.0 / 255.0, out=out[i], casting="unsafe")
+        transforms.append((gain, pad, frame.shape[:2]))
+    return out, transforms
+
+
+def nms(boxes, scores, iou_thres):
+    """탐욕적 NMS - 남길 인덱스 반환"""
+    order = np.argsort(-scores)
+    keep = []
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        xx1 = np.maximum(boxes[i, 0], boxes[order[1:], 0])
+        yy1 = np.maximum(boxes[i, 1], boxes[order[1:], 1])
+        xx2 = np.minimum(boxes[i, 2], boxes[order[1:], 2])
+        yy2 = np.minimum(boxes[i, 3], boxes[order[1:], 3])
+        inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+        iou = inter / (areas[i] + areas[order[1:]] - inter + 1e-9)
+        order = order[1:][iou <= iou_thres]
+    return keep
+
+
+class OnnxBackend(InferenceBackend):
+    """best.pt 에서 export 한 ONNX 모델을 ONNX Runtime 으로 실행 (TensorRT EP 선택 가능)"""
+
+    name = "onnx"
+
+    def __init__(self, model_path="best.onnx", use_tensorrt=False, conf_thres=0.25, iou_thres=0.7, **kwargs):
+        super().__init__(**kwargs)
+        self.model_path = model_path
+        self.use_tensorrt = use_tensorrt
+        self.conf_thres = conf_thres
+        self.iou_thres = iou_thres
+        if use_tensorrt:
+            self.name = "tensorrt"
+        self.session = None
+        self.input_name = None
+        self.input_dtype = np.float32
+        self.input_buffer = None
+
+    def providers(self):
+        import onnxruntime as ort
+        available = ort.get_available_providers()
+        chosen = []
+        if self.use_tensorrt and "TensorrtExecutionProvider" in available:
+            chosen.append(("TensorrtExecutionProvider", {
+                "trt_fp16_enable": bool(self.half),
+                "trt_engine_cache_enable": True,
+                "trt_engine_cache_path": os.path.dirname(os.path.abspath(self.model_path)),
+            }))
+        if self.device != "cpu" and "CUDAExecutionProvider" in available:
+            chosen.append("CUDAExecutionProvider")
+        chosen.append("CPUExecutionProvider")
+        return chosen
+
+    def load(self):
+        import onnxruntime as ort
+        self.session = ort.InferenceSession(self.model_path, providers=self.providers())
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        self.input_dtype = np.float16 if inp.type == "tensor(float16)" else np.float32
+
+        # Ultralytics export 는 클래스 이름을 메타데이터에 저장함
+        meta = self.session.get_modelmeta().custom_metadata_map
+        if "names" in meta:
+            self.names = {int(k): v for k, v in ast.literal_eval(meta["names"]).items()}
+        if "imgsz" in meta:
+            self.imgsz = ast.literal_eval(meta["imgsz"])[0]
+
+    def predict_batch(self, frames):
+        batch, transforms = fill_input(frames, self.imgsz, self.input_dtype, self.input_buffer)
+        self.input_buffer = batch
+
+        # 고정 배치(1) 로 export 된 모델은 한 장씩 실행
+        if self.session.get_inputs()[0].shape[0] == 1 and len(frames) > 1:
+            outputs = np.concatenate([self.session.run(None, {self.input_name: batch[i:i + 1]})[0]
+                                      for i in range(len(frames))])
+        else:
+            outputs = self.session.run(None, {self.input_name: batch})[0]
+        return [self._decode(out, *t) for out, t in zip(outputs, transforms)]
+
+    def _decode(self, output, gain, pad, shape):
+        # YOLOv8 출력: (4 + 클래스 수, 후보 수) - cx, cy, w, h, 클래스 점수
+        pred = output.astype(np.float32).T
+        scores = pred[:, 4:]
+        cls = scores.argmax(axis=1)
+        conf = scores[np.arange(len(cls)), cls]
+        mask = conf >= self.conf_thres
+        if not mask.any():
+            return []
+        pred, cls, conf = pred[mask], cls[mask], conf[mask]
+
+        boxes = np.empty((len(pred), 4), dtype=np.float32)
+        boxes[:, 0] = pred[:, 0] - pred[:, 2] / 2
+        boxes[:, 1] = pred[:, 1] - pred[:, 3] / 2
+        boxes[:, 2] = pred[:, 0] + pred[:, 2] / 2
+        boxes[:, 3] = pred[:, 1] + pred[:, 3] / 2
+        boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad[0]) / gain
+        boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad[1]) / gain
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, shape[1])
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, shape[0])
+
+        # 클래스별 NMS (클래스마다 좌표를 띄워 한 번에 처리)
+        keep = nms(boxes + cls[:, None] * 4096.0, conf, self.iou_thres)
+        return [Detection(int(cls[i]), self.names.get(int(cls[i]), str(cls[i])), float(conf[i]), boxes[i])
+                for i in sorted(keep, key=lambda i: -conf[i])]
+
+
+def create_backend(kind=None, model_path=None, imgsz=None, precision=None, device=None):
+    """설정(인자 또는 환경 변수)에 맞는 백엔드 생성"""
+    kind = (kind or os.environ.get("INFER_BACKEND", "ultralytics")).lower()
+    imgsz = int(imgsz or os.environ.get("INFER_IMGSZ", 320))
+    precision = (precision or os.environ.get("INFER_PRECISION", "fp16")).lower()
+    if device is None:
+        device = os.environ.get("INFER_DEVICE", "0")
+    if device != "cpu":
+        device = int(device)
+    half = precision == "fp16" and device != "cpu"
+
+    if kind == "ultralytics":
+        return UltralyticsBackend(model_path or os.environ.get("INFER_MODEL", "best.pt"),
+                                  imgsz=imgsz, half=half, device=device)
+    if kind in ("onnx", "tensorrt"):
+        return OnnxBackend(model_path or os.environ.get("INFER_MODEL", "best.onnx"),
+                           use_tensorrt=(kind == "tensorrt"), imgsz=imgsz, half=half, device=device)
+    raise ValueError(f"알 수 없는 추론 백엔드: {kind} (가능: {', '.join(BACKENDS)})")
+
+
+def export_onnx(pt_path="best.pt", imgsz=320, half=False, dynamic=True):
+    """best.pt → ONNX export (export 된 파일 경로 반환)"""
+    from ultralytics import YOLO
+    return YOLO(pt_path).export(format="onnx", imgsz=imgsz, half=half, dynamic=dynamic, simplify=True)
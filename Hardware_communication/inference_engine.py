@@ -0,0 +1,215 @@
+import logging
+import time
+import threading
+from collections import deque
+
+import cv2
+import numpy as np
+
+from inference_backends import create_backend
+
+log = logging.getLogger(__name__)
+
+VALID_CLASSES = ["general trash", "plastic", "metal", "glass"]
+DEFAULT_CLASS = "general trash"
+
+
+class ClassificationResult:
+    """분류 결과 (클래스, 신뢰도, 바운딩 박스, 추론 시간)"""
+
+    def __init__(self, class_name, class_name_raw=None, confidence=0.0, xyxy=None, latency=0.0):
+        self.class_name = class_name
+        self.class_name_raw = class_name_raw
+        self.confidence = confidence
+        self.xyxy = xyxy
+        self.latency = latency
+
+    @property
+    def label(self):
+        if self.class_name_raw is None:
+            return None
+        return f"{self.class_name_raw} {self.confidence:.2f}"
+
+
+class CameraStream:
+    """항상 열려 있는 카메라 스트림 - 최근 프레임을 링 버퍼에 보관
+
+    transform 이 있으면 저장 전에 적용 (파이프라인에서 자를 수 없을 때의 ROI 자르기 등)
+    sink 가 있으면 내부 버퍼 대신 sink(캡처 시각, 프레임) 로 넘김 (캡처 프로세스 → 공유 메모리)
+    """
+
+    def __init__(self, pipeline, buffer_size=8, reopen_after=30, transform=None, sink=None):
+        self.pipeline = pipeline
+        self.transform = transform
+        self.sink = sink
+        self.frames = deque(maxlen=buffer_size)  # (캡처 시각, 프레임)
+        self.reopen_after = reopen_after  # 연속 실패 시 재오픈 기준
+        self.cond = threading.Condition()
+        self.cap = None
+        self.running = False
+        self.thread = None
+        self.open_time = None
+
+    def _open(self):
+        t0 = time.time()
+        cap = cv2.VideoCapture(self.pipeline, cv2.CAP_GSTREAMER)
+        if not cap.isOpened():
+            raise RuntimeError("카메라 열기 실패")
+        self.cap = cap
+        self.open_time = time.time() - t0
+
+    def start(self):
+        self._open()
+        self.running = True
+        self.thread = threading.Thread(target=self._reader, daemon=True)
+        self.thread.start()
+        log.info(f"카메라 스트림 시작 ({self.open_time:.2f}초)")
+
+    def _reader(self):
+        failures = 0
+        while self.running:
+            ret, frame = self.cap.read()
+            if not ret:
+                failures += 1
+                if failures >= self.reopen_after:
+                    log.warning("카메라 프레임 연속 실패 → 재연결")
+                    try:
+                        self.cap.release()
+                        self._open()
+                    except Exception as e:
+                        log.error(f"카메라 재연결 실패: {e}")
+                        time.sleep(1)
+                    failures = 0
+                else:
+                    time.sleep(0.01)
+                continue
+            failures = 0
+            if self.transform is not None:
+                frame = self.transform(frame)
+            self._publish(time.time(), frame)
+
+    def _publish(self, captured, frame):
+        if self.sink is not None:
+            self.sink(captured, frame)
+            return
+        with self.cond:
+            self.frames.append((captured, frame))
+            self.cond.notify_all()
+
+    def read_fresh(self, after=None, timeout=1.0):
+        """after 시각 이후에 캡처된 프레임을 반환 (없으면 None)"""
+        if after is None:
+            after = time.time()
+        deadline = time.time() + timeout
+        with self.cond:
+            while True:
+                if self.frames and self.frames[-1][0] >= after:
+                    return self.frames[-1][1]
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self.running:
+                    return None
+                self.cond.wait(remaining)
+
+    def read_burst(self, count, after, timeout=1.0):
+        """after 시각 이후 캡처된 프레임을 최대 count 장 반환 - [(캡처 시각, 프레임)]"""
+        deadline = time.time() + timeout
+        with self.cond:
+            while True:
+                fresh = [item for item in self.frames if item[0] > after]
+                if len(fresh) >= count:
+                    return fresh[:count]
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self.running:
+                    return fresh
+                self.cond.wait(remaining)
+
+    def keep(self, frame):
+        """분류 후에도 쓸 프레임 확보 - 버퍼의 프레임은 덮어쓰지 않으므로 그대로"""
+        return frame
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2)
+        if self.cap:
+            self.cap.release()
+
+
+class InferenceEngine:
+    """추론 백엔드를 한 번만 로드하고 워밍업 후 상주시키는 추론 엔진"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or create_backend()
+        self.loaded = False
+        self.lock = threading.Lock()
+        self.load_time = None
+        self.cold_latency = None
+        self.warm_count = 0
+        self.warm_total = 0.0
+        self.warm_last = None
+
+    @property
+    def ready(self):
+        return self.loaded
+
+    def load(self, warmup_shape=(480, 640, 3)):
+        """모델 로드 + 워밍업 추론 (프로세스 시작 시 1회)"""
+        t0 = time.time()
+        self.backend.load()
+        self.load_time = time.time() - t0
+        log.info(f"모델 로드 완료: {self.backend.name} {getattr(self.backend, 'model_path', '')} "
+                 f"imgsz={self.backend.imgsz} half={self.backend.half} ({self.load_time:.2f}초)")
+
+        dummy = np.zeros(warmup_shape, dtype=np.uint8)
+        t0 = time.time()
+        self.detect(dummy)
+        self.cold_latency = time.time() - t0
+        self.loaded = True
+        log.info(f"워밍업 추론 완료 ({self.cold_latency * 1000:.1f}ms)")
+
+    def detect(self, frame):
+        with self.lock:
+            return self.backend.predict(frame)
+
+    def detect_batch(self, frames):
+        with self.lock:
+            return self.backend.predict_batch(frames)
+
+    def classify(self, frame):
+        """프레임 1장 분류 - 객체가 없으면 일반쓰레기"""
+        t0 = time.time()
+        detections = self.detect(frame)
+        latency = time.time() - t0
+
+        self.warm_count += 1
+        self.warm_total += latency
+        self.warm_last = latency
+        return to_result(detections, latency)
+
+    def stats(self):
+        """콜드/웜 추론 지연 시간 보고"""
+        return {
+            "backend": self.backend.name,
+            "imgsz": self.backend.imgsz,
+            "half": self.backend.half,
+            "model_load_s": self.load_time,
+            "cold_inference_ms": self.cold_latency * 1000 if self.cold_latency is not None else None,
+            "warm_inference_ms_avg": (self.warm_total / self.warm_count) * 1000 if self.warm_count else None,
+            "warm_inference_ms_last": self.warm_last * 1000 if self.warm_last is not None else None,
+            "warm_count": self.warm_count,
+        }
+
+
+def normalize_class(class_name_raw):
+    """모델 클래스명을 분류 대상 4종으로 정규화"""
+    name = class_name_raw.lower()
+    return name if name in VALID_CLASSES else DEFAULT_CLASS
+
+
+def to_result(detections, latency=0.0):
+    """가장 신뢰도 높은 검출을 분류 결과로 변환"""
+    if not detections:
+        return ClassificationResult(DEFAULT_CLASS, latency=latency)
+    best = max(detections, key=lambda d: d.confidence)
+    return ClassificationResult(normalize_class(best.class_name), best.class_name,
+                                best.confidence, best.xyxy, latency)
@@ -1,15 +1,34 @@
-import os
 import time
-import socket
-import serial  
+PROCESS_START = time.time()  # 준비까지 걸린 시간 측정 기준 (무거운 import 전에 기록)
+
+import os
 from datetime import datetime
-import cv2
-from ultralytics import YOLO
-import requests
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, request, jsonify
 from flask_cors import CORS
 import threading
-import Jetson.GPIO as GPIO 
+import uuid
+import logging
+import functools
+# Jetson.GPIO 는 setup_led / cleanup_led 에서, cv2 / 추론 엔진 / 모델 라이브러리는 setup_vision 에서 불러옴 (HTTP 서버를 먼저 띄우기 위해)
+from serial_manager import SerialManager
+from http_client import ApiClient
+from pi_channel import PiChannel, PiError
+from upload_pipeline import UploadPipeline
+from event_journal import EventJournal, JournalSyncer
+from level_store import LevelStore, LevelSync
+import metrics
+from metrics import CycleTrace
+from device_logging import setup_logging, cycle_logger
+from sort_pipeline import SortJob, SortPipeline
+from startup import Startup
+from carousel import CarouselPlanner
+from arrival import ArrivalDetector, ArrivalWatcher
+import preprocess
+
+log = logging.getLogger("jetson")
+
+# 장치 연결 / 파일을 여는 전역 객체는 import 시 만들지 않고 init() 에서 생성
+# (캡처/추론 자식 프로세스는 spawn 이라 이 파일을 __mp_main__ 으로 다시 import 함)
 
 # LED 핀 번호
 LED_PIN = 20
@@ -19,488 +38,738 @@ os.environ['LD_PRELOAD'] = '/usr/lib/aarch64-linux-gnu/libgomp.so.1'
 os.environ["OMP_NUM_THREADS"] = "2"
 
 # Raspberry Pi 정보
-PI_HOST = ''
-PI_PORT = 9999
+PI_HOST = os.environ.get("PI_HOST", '')
+PI_PORT = int(os.environ.get("PI_PORT", 9999))
+PI_REPLY_TIMEOUT = 15.0  # 투입(서보) + 측정 응답 대기 한도
+# 상시 연결 1개로 모든 명령 전송 - 1초마다 하트비트, 3초간 응답 없으면 끊김으로 판단 후 재연결
+pi = None
 
 # 아두이노 시리얼 통신 설정
-ARDUINO_PORT = '/dev/ttyACM0'  # 아두이노 포트 (또는 /dev/ttyUSB0)
+ARDUINO_PORT = os.environ.get("ARDUINO_PORT", '/dev/ttyACM0')  # 아두이노 포트 (또는 /dev/ttyUSB0)
 ARDUINO_BAUD = 9600
-arduino_serial = None
-
-# EC2 주소
-UI_BEGIN_ENDPOINT = "http://EC2_IP:3001/begin"
-UPLOAD_ENDPOINT = "http://EC2_IP:3001/upload"
-
-# Flask 앱
-app = Flask(__name__)
-CORS(app)
+ARDUINO_READY_TIMEOUT = 5.0    # 부팅 READY 신호 대기 한도
+ARDUINO_COMMAND_TIMEOUT = 10.0  # 명령별 DONE 대기 한도 (270도 회전 ≈ 2초)
+arduino = None
+
+# EC2 주소 (keep-alive 세션 공유, 엔드포인트별 타임아웃: (연결, 읽기) 초)
+EC2_BASE_URL = os.environ.get("EC2_BASE_URL", "http://43.202.10.147:3001")
+EC2_TIMEOUTS = {
+    "/begin": (2, 2),
+    "/upload": (3, 10),
+    "/data": (2, 2),
+    "/upload/batch": (3, 20),
+    "/events/batch": (2, 5),
+}
+api = None
+
+# 이미지 저장/업로드 백그라운드 파이프라인 (image/ 500MB, 스풀 200MB 한도)
+uploader = None
+
+# EC2 로 보낼 이벤트(처리 시작 알림)는 로컬 저널(SQLite)에 먼저 기록 → 전송 스레드가 묶어서 gzip 전송
+journal = None
+syncer = None
+
+# 클래스별 채움도 (측정 시각/출처 포함, 재시작 시 파일에서 복원) - 서버 값은 10초마다 동기화
+levels = None
+level_sync = None
+
+# Flask 앱 - 라우트는 블루프린트에 등록, 앱은 init() 에서 생성
+routes = Blueprint("jetson", __name__)
+app = None
 
 # 전역 상태
-is_processing = False   
-is_locked = False   
+is_processing = False   # 비움 확인 진행 중 (분류 요청 거부)
+is_locked = False       # 꽉 찬 통 때문에 입구 잠금 (init 에서 저장된 채움도로 복원)
 last_started_time = 0 
+START_DEBOUNCE = 1.0    # /start 중복 요청 방지 (초) - 도착 감지는 멈춘 프레임 시각으로 중복 판단
+last_arrival_frame = 0.0  # 마지막으로 받아들인 도착 감지의 멈춘 프레임 캡처 시각
+
+# 슈트 비움 대기 - 분류한 물체가 투입(Pi 응답)될 때까지 다음 물체는 분류하지 않음
+# (이전 물체가 아직 보이는 프레임으로 분류하면 그 클래스를 받아 엉뚱한 통으로 감)
+chute_clear = threading.Event()
+chute_clear.set()
+last_drop_done = 0.0    # 마지막 투입 완료 시각 - 다음 분류는 이 이후 프레임만 사용
+CHUTE_CLEAR_TIMEOUT = ARDUINO_COMMAND_TIMEOUT + PI_REPLY_TIMEOUT
+
+# 비움 확인
+EMPTY_CHECK_ORDER = ["general trash", "plastic", "metal", "glass"]  # 0 → 90 → 180 → 270도
+EMPTY_CHECK_FRESH_SECONDS = 30   # 분류 흐름에서 이 시간 안에 측정된 통은 건너뜀 (꽉 찬 값은 항상 재측정)
+empty_check_jobs = {}            # job_id -> EmptyCheckJob (최근 것만 보관)
+current_empty_check = None
+
+# 상주 카메라 / 추론 엔진 (프로세스 시작 시 1회 초기화)
+# 백엔드/입력 크기/정밀도는 INFER_BACKEND, INFER_MODEL, INFER_IMGSZ, INFER_PRECISION 으로 선택
+camera = None
+engine = None
+voter = None
+
+# 카메라 관심 영역 (CAMERA_ROI 또는 roi.json) - 잘라서 모델 입력 크기(INFER_IMGSZ)로 바로 받음
+INFER_IMGSZ = int(os.environ.get("INFER_IMGSZ", 320))
+CAMERA_CROP = os.environ.get("CAMERA_CROP", "gst")
+camera_roi = None  # init 에서 로드
+
+# 물체 도착 자동 감지 (AUTO_TRIGGER=1) - 카메라 스트림에서 직접 분류를 시작해 /start 요청 왕복을 없앰
+AUTO_TRIGGER = os.environ.get("AUTO_TRIGGER", "0") == "1"
+ARRIVAL_FPS = float(os.environ.get("ARRIVAL_FPS", 10))
+arrival = None
+
+# 캡처 / 추론을 별도 프로세스로 (VISION_PROCESSES=0 이면 기존처럼 이 프로세스의 스레드)
+# 프레임은 공유 메모리 링 버퍼(VISION_RING_SLOTS 장)로 복사 없이 전달, 결과만 큐로 돌아옴
+VISION_PROCESSES = os.environ.get("VISION_PROCESSES", "1") == "1"
+VISION_RING_SLOTS = int(os.environ.get("VISION_RING_SLOTS", 32))
+vision = None
+
+# 분류 모드: vote (연속 프레임 투표, 조기 종료) | single (프레임 1장)
+CLASSIFY_MODE = os.environ.get("CLASSIFY_MODE", "vote")
+VOTE_BURST = int(os.environ.get("VOTE_BURST", 6))           # 최대 프레임 수
+VOTE_BUDGET_MS = float(os.environ.get("VOTE_BUDGET_MS", 400))  # 지연 시간 한도
 
 # LED 초기화 
 def setup_led():
+    import Jetson.GPIO as GPIO
     GPIO.setmode(GPIO.BCM)
     GPIO.setup(LED_PIN, GPIO.OUT)
     GPIO.output(LED_PIN, GPIO.HIGH)  # LED 켜기
-    print("LED 켜짐 - 젯슨 시스템 동작 중")
+    log.info("LED 켜짐 - 젯슨 시스템 동작 중")
 
 def cleanup_led():
+    import Jetson.GPIO as GPIO
     GPIO.output(LED_PIN, GPIO.LOW)  # LED 끄기
     GPIO.cleanup()
-    print("LED 꺼짐 - 시스템 종료")
+    log.info("LED 꺼짐 - 시스템 종료")
     
-# 아두이노 연결 및 초기화
+# 아두이노 연결 및 초기화 - 포트는 시리얼 매니저 스레드가 소유하고 끊기면 스스로 재연결
 def setup_arduino():
-    global arduino_serial
-    try:
-        arduino_serial = serial.Serial(ARDUINO_PORT, ARDUINO_BAUD, timeout=2)
-        time.sleep(3)  # 아두이노 초기화 대기
-        print(f"아두이노 연결 성공: {ARDUINO_PORT}")
-        
-        # 연결 테스트
-        send_to_arduino("test")
-        return True
-        
-    except Exception as e:
-        print(f"아두이노 연결 실패: {e}")
-        print(" - USB 케이블 확인")
-        print(" - 권한 설정: sudo chmod 666 /dev/ttyACM0")
-        arduino_serial = None
+    if not arduino.running:
+        arduino.start()
+    if not arduino.wait_connected(ARDUINO_READY_TIMEOUT + 1):
+        log.error(f"아두이노 연결 실패: {arduino.last_error}")
+        log.info(" - USB 케이블 확인")
+        log.info(" - 권한 설정: sudo chmod 666 /dev/ttyACM0")
         return False
 
-def send_to_arduino(message):
-    global arduino_serial
-    if arduino_serial and arduino_serial.is_open:
-        try:
-            message_bytes = (message + '\n').encode('utf-8')
-            arduino_serial.write(message_bytes)
-            print(f"아두이노로 전송: '{message}'")
-            
-            time.sleep(0.1)
-            if arduino_serial.in_waiting > 0:
-                response = arduino_serial.readline().decode('utf-8').strip()
-                print(f"아두이노 응답: {response}")
-                
-            return True
-        except Exception as e:
-            print(f"아두이노 전송 실패: {e}")
-            return False
-    else:
-        print("아두이노가 연결되지 않음")
-        return False
+    # 연결 테스트
+    return send_to_arduino("ping")
 
-def send_class_to_pi(class_name):
-    """라즈베리파이에 소켓 신호 전송"""
+def send_arduino_command(message, timeout=ARDUINO_COMMAND_TIMEOUT):
+    """명령 전송 후 같은 seq의 DONE 까지 대기 - 단계별 소요 시간(dict) 반환, 실패 시 None"""
+    log.debug("아두이노로 전송: '%s'", message)
     try:
-        print(f"라즈베리파이 소켓 연결 시도")
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.connect((PI_HOST, PI_PORT))
-            s.sendall(class_name.encode())
-            print(f"'{class_name}' → 라즈베리파이에 전송 완료")
-            return True
+        timings = arduino.send(message, timeout)
     except Exception as e:
-        print(f"라즈베리파이 전송 실패: {e}")
-        return False
+        log.warning(f"아두이노 명령 실패: '{message}' - {e}")
+        return None
+    log.debug("아두이노 완료: '%s' (ack %.0fms, 동작 %.2f초, 대기열 %.0fms)",
+              message, timings["ack"] * 1000, timings["motion"], timings["queue"] * 1000)
+    return timings
 
+def send_to_arduino(message):
+    """명령 전송 후 완료까지 대기 - 성공 여부 반환"""
+    return send_arduino_command(message) is not None
 
-def notify_ui_begin():
-    """UI 시작 신호 전송"""
-    try:
-        res = requests.post(UI_BEGIN_ENDPOINT)
-        print(f"UI에 처리 시작 알림 전송 완료: {res.status_code}")
-    except Exception as e:
-        print(f"UI 처리 시작 알림 실패: {e}")
+# 회전판 위치 추적 + 최단 경로 이동 (투입 후 원점 복귀 없음, 입구 막을 때/종료 시에만 원점으로)
+# CAROUSEL_WRAP=0 이면 270도 ↔ 0도 를 가로지르지 않음 (배선 등으로 한 바퀴 이상 돌면 안 될 때)
+carousel = None
 
-def send_image_to_server(filepath, class_name, angle):
-    if not os.path.exists(filepath):
-        print(f"이미지 없음: {filepath}")
-        return
+def send_class_to_pi(class_name, timeout=PI_REPLY_TIMEOUT):
+    """라즈베리파이에 명령 전송 후 같은 요청 ID의 측정 결과(dict) 반환 - 실패 시 None"""
     try:
-        files = {"image": open(filepath, "rb")}
-        data = {"class": class_name, "angle": str(angle), "device_id": "jetson"}
-        res = requests.post(UPLOAD_ENDPOINT, files=files, data=data)
-        if res.status_code == 200:
-            print(f"이미지 업로드 성공: {filepath}")
-            print(res.json())
-        else:
-            print(f"업로드 실패: {res.status_code} - {res.text}")
-    except Exception as e:
-        print(f"이미지 업로드 실패: {e}")
-        
-def gstreamer_pipeline(capture_width=1280, capture_height=720,
-                        display_width=640, display_height=480,
-                        framerate=30, flip_method=0):
-    """GStreamer 파이프라인 설정"""
-    return (
-        f"nvarguscamerasrc ! video/x-raw(memory:NVMM), width={capture_width}, height={capture_height}, format=(string)NV12, framerate={framerate}/1 ! "
-        f"nvvidconv flip-method={flip_method} ! video/x-raw, width={display_width}, height={display_height}, format=(string)BGRx ! "
-        f"videoconvert ! video/x-raw, format=(string)BGR ! appsink"
-    )
-
-def check_trash_level(class_name):
-    try:
-        
-         # DB에서 최신 데이터 조회
-        res = requests.get("http://43.202.10.147:3001/api/levels")
-        
-        if not res.ok:
-            print(f"채움률 API 요청 실패: {res.status_code}")
-            return 0
-            
-        level_data = res.json()
-        print(f"DB에서 조회한 전체 레벨 데이터: {level_data}")
-        
-        # API 응답 형식에 맞게 파싱
-        for item in level_data:
-            if item.get('type') == class_name:
-                level = item.get('level', 0)
-                print(f"DB에서 조회: {class_name} = {level}%")
-                return level
-        
-        print(f"DB에서 {class_name} 데이터를 찾을 수 없음")
-        return 0
-        
-    except Exception as e:
-        print(f"채움률 확인 실패: {e}")
-        return 0
+        reply = pi.request(class_name, timeout)
+    except PiError as e:
+        log.warning(f"라즈베리파이 요청 실패: {e}")
+        return None
+    log.debug("라즈베리파이 응답: %s = %s%% (%s초)", reply.get("class"), reply.get("level"), reply.get("elapsed"))
+    return reply
+
+def notify_ui_begin():
+    """UI 시작 신호 - 저널에 기록만 하고 바로 반환 (전송은 syncer 스레드)"""
+    event_id = journal.append("begin", {})
+    log.debug("UI 처리 시작 알림 예약: %s", event_id)
+
+def gstreamer_pipeline(capture_width=1280, capture_height=720, framerate=30, flip_method=0):
+    """GStreamer 파이프라인 설정 - 투입 구간(ROI)만 잘라 모델 입력 크기로 축소
+
+    CAMERA_CROP=gst 면 nvvidconv 에서, cpu 면 전체 프레임(640x480)을 받아 CameraStream 에서 자름
+    """
+    roi = camera_roi if CAMERA_CROP == "gst" else None
+    return preprocess.gstreamer_pipeline(roi, capture_width, capture_height, INFER_IMGSZ,
+                                         framerate=framerate, flip_method=flip_method)
+
+def check_trash_level(class_name, max_age=None):
+    """로컬 채움도 조회 - 없으면 서버에서 한 번 동기화 후 조회 (실패 시 0)"""
+    level = levels.level(class_name, max_age)
+    if level is None:
+        try:
+            level_sync.sync_once()
+        except Exception as e:
+            log.warning(f"채움률 동기화 실패: {e}")
+        level = levels.level(class_name, max_age, default=0)
+    return level
 
-def control_step_motor_arduino_with_blocking(class_name):
+def control_step_motor_arduino_with_blocking(class_name, trace=None):
+    global is_locked
     class_name = class_name.lower().strip()
+    trace = trace or CycleTrace("actuate", bin=class_name)
+    clog = cycle_logger(log, cycle=trace.id, bin=class_name)
+    cycle_start = time.time()
     
-    print(f"[🎯 아두이노 통합 제어] 클래스: {class_name}")
-    
-    # 1단계: 아두이노로 분류 명령 전송 (회전 시작)
-    print(f"📤 아두이노에 분류 신호 전송: {class_name}")
-    arduino_success = send_to_arduino(class_name)
+    clog.debug("[🎯 아두이노 통합 제어] 클래스: %s", class_name)
     
-    if not arduino_success:
-        print("❌ 아두이노 통신 실패 - 시스템 중단")
+    # Pi 가 끊겨 있으면 회전하지 않음 (하트비트로 몇 초 안에 감지됨)
+    if not pi.connected:
+        clog.error(f"❌ 라즈베리파이 미연결 - 투입 중단 ({pi.stats()['last_error']})")
         return False
-    
-    # 2단계: 아두이노 회전 완료 대기
-    if class_name == "general trash":
-        rotation_time = 0  # 일반쓰레기는 회전 없음
-    else:
-        rotation_time = 2.5  # 회전 시간 (90도 기준 약 2.5초)
-    
-    if rotation_time > 0:
-        print(f"⏰ 아두이노 회전 완료 대기 중... ({rotation_time}초)")
-        time.sleep(rotation_time)
-    
-    # 측정 전 현재 레벨 저장 (중요!)
-    old_level = get_current_level_quick(class_name)
-    print(f"측정 전 레벨: {class_name} = {old_level}%")
-    
-    pi_success = send_class_to_pi(class_name)
-    if not pi_success:
+
+    # 꽉 찬 통 때문에 입구를 막은 뒤 대기열에 남아 있던 작업은 투입하지 않음 (해제는 비움 확인에서만)
+    if is_locked or carousel.blocked:
+        clog.error("🚫 입구 잠김 (꽉 찬 통) - 투입 중단, 비움 확인 필요")
         return False
+
+    # 1단계: 현재 위치에서 해당 통까지 최소 회전 (같은 통이면 이동 없음)
+    if clog.isEnabledFor(logging.DEBUG):  # stats()/plan() 은 DEBUG 일 때만 계산
+        clog.debug("📤 회전판 이동: %s → %s (%+d 스텝)",
+                   carousel.stats()["bin"] or "입구 막힘", class_name, carousel.plan(class_name))
+    with trace.span("rotate", bin=class_name) as span:
+        ok, steps, rotate = carousel.move_to(class_name)
+        span["ok"] = ok
+        span["steps"] = steps
+        if rotate:
+            span["motion_s"] = round(rotate["motion"], 4)
     
-    # 4단계: 기존 시간은 유지 (시간 안 늘림)
-    if class_name == "general trash":
-        remaining_time = 4  # 유지
-    else:
-        remaining_time = 5  # 유지
-    
-    print(f"아두이노 전체 동작 완료 대기 중... ({remaining_time}초)")
-    time.sleep(remaining_time)
+    if not ok:
+        clog.error("❌ 아두이노 통신 실패 - 시스템 중단")
+        return False
     
-    # 5단계: 새로운 측정값 확인 (시간 늘리지 않고 똑똑하게)
-    final_level = check_for_new_level(class_name, old_level, max_checks=5)
+    # 2단계: 라즈베리파이 투입 + 측정 (측정 결과가 같은 소켓으로 돌아옴)
+    with trace.span("pi_drop", bin=class_name) as span:
+        pi_reply = send_class_to_pi(class_name)
+        span["ok"] = pi_reply is not None
+        if pi_reply:
+            span["pi_elapsed_s"] = pi_reply.get("elapsed")
+            if pi_reply.get("timing"):
+                span["pi_timing"] = pi_reply["timing"]
+    if pi_reply is None:
+        return False
+    final_level = pi_reply["level"]
+    levels.update(class_name, final_level, "pi")
+    trace.attrs["level"] = final_level
     
-    print(f"{class_name} 최종 채움률: {final_level}%")
+    # 원점 복귀 없이 이 위치에서 다음 물체를 기다림
+    clog.debug("%s 최종 채움률: %s%%", class_name, final_level)
     
-    # 나머지 입구 막기 로직은 기존과 동일
-    if final_level >= 80:
-        print(f"🚫 {class_name} 쓰레기통이 꽉 참 ({final_level}%) - 입구를 막습니다")
-        
-        if class_name == "general trash":
-            block_success = send_to_arduino("block_entrance")
-            if block_success:
-                time.sleep(3)
-                print("일반쓰레기 입구 막기 완료")
-        else:
-            block_success = send_to_arduino("block_entrance")
-            if block_success:
-                time.sleep(3)
-                print(f"{class_name} 입구 막기 완료")
+    # 입구 막기 (측정 실패(-1)는 막지 않음) - 이때만 원점으로 복귀
+    if final_level >= levels.full_level:
+        clog.warning(f"🚫 {class_name} 쓰레기통이 꽉 참 ({final_level}%) - 입구를 막습니다")
+        is_locked = True  # 입구 막기에 실패해도 분류 요청은 거부
+        with trace.span("block", bin=class_name) as span:
+            span["ok"] = carousel.block()
+        if span["ok"]:
+            clog.info(f"{class_name} 입구 막기 완료")
     else:
-        print(f"{class_name} 쓰레기통 정상 ({final_level}%) - 계속 사용 가능")
+        clog.debug("%s 쓰레기통 정상 (%s%%) - 계속 사용 가능", class_name, final_level)
     
+    phases = {k: v for k, v in trace.phases().items() if k in ("rotate", "pi_drop", "block")}
+    phases["total"] = time.time() - cycle_start
+    clog.info("⏱ 단계별 소요 시간: " + ", ".join(f"{k} {v:.2f}s" for k, v in phases.items()),
+              extra={"phase": "actuate", "duration": round(phases["total"], 3)})
     return True
 
-def get_current_level_quick(class_name):
-    try:
-        res = requests.get("http://43.202.10.147:3001/api/levels", timeout=3)
-        if res.ok:
-            level_data = res.json()
-            for item in level_data:
-                if item.get('type') == class_name:
-                    return item.get('level', 0)
-    except:
-        pass
-    return 0
-
-def check_for_new_level(class_name, old_level, max_checks=5):
-    print(f"새로운 측정값 확인 중... (기준값: {old_level}%)")
-    
-    for i in range(max_checks):
-        current_level = get_current_level_quick(class_name)
-        print(f"체크 {i+1}: {current_level}%")
-        
-        # 새로운 값이 감지되면 즉시 반환
-        if current_level != old_level:
-            print(f"새로운 값 감지: {old_level}% → {current_level}%")
-            return current_level
-        
-        # 마지막 체크가 아니면 2초 대기
-        if i < max_checks - 1:
-            time.sleep(2)
-    
-    print(f"새로운 값 감지되지 않음 - 현재값 사용: {current_level}%")
-    return current_level
+def setup_vision(camera_stream=None, backend=None):
+    """카메라 스트림 시작 및 모델 로드 + 워밍업 (시뮬레이션은 카메라/백엔드를 주입)
+
+    VISION_PROCESSES 면 캡처/추론 프로세스를 띄우고 camera / engine 을 그 대리자로 바꿈
+    (주입된 카메라/백엔드 객체는 프로세스로 넘길 수 없으므로 스레드 방식).
+    """
+    global camera, engine, voter, vision
+    from inference_engine import CameraStream, InferenceEngine
+    from inference_backends import create_backend
+    from temporal_voting import TemporalVoter
+
+    cleanup_vision()  # 재시도 시 이전 카메라/프로세스 정리
+    camera_factory = None
+    if camera_stream is None:
+        transform = None
+        if CAMERA_CROP == "cpu" and not camera_roi.full:
+            transform = preprocess.FramePreprocessor(camera_roi, INFER_IMGSZ)
+        camera_factory = functools.partial(CameraStream, gstreamer_pipeline(), transform=transform)
+        log.info(f"카메라 ROI {camera_roi} ({CAMERA_CROP}) → 출력 {INFER_IMGSZ}px")
+
+    if VISION_PROCESSES and camera_factory is not None and backend is None:
+        from vision_processes import VisionProcesses
+        vision = VisionProcesses(camera_factory, create_backend,
+                                 preprocess.frame_shape(camera_roi, INFER_IMGSZ), slots=VISION_RING_SLOTS)
+        engine = vision.engine
+    else:
+        engine = InferenceEngine(backend or create_backend())
+    engine.load()
+    metrics.observe("model_load", engine.load_time)
+    if engine.cold_latency is not None:
+        metrics.observe("warmup_inference", engine.cold_latency)
+    voter = TemporalVoter(engine, burst_size=VOTE_BURST, latency_budget=VOTE_BUDGET_MS / 1000.0)
+    camera = vision.camera if vision else (camera_stream or camera_factory())
+    camera.start()
+    if camera.open_time is not None:
+        metrics.observe("camera_open", camera.open_time)
+    log.info(f"추론 엔진 준비 완료: {engine.stats()}")
+    if AUTO_TRIGGER:
+        start_arrival()
+
+def start_arrival():
+    """물체 도착 감지 시작 - 장면이 멈추면 캡처 시각 기준으로 분류 요청"""
+    global arrival
+    arrival = ArrivalWatcher(camera, ArrivalDetector(), lambda captured: request_sort(captured)[0] == 200,
+                             fps=ARRIVAL_FPS, ready=can_accept_sort)
+    arrival.start()
+    log.info(f"물체 도착 자동 감지 시작 ({ARRIVAL_FPS:.0f}fps)")
+
+def cleanup_vision():
+    global camera, arrival, vision
+    if arrival:
+        arrival.stop()
+        arrival = None
+    if vision:
+        vision.close()
+        vision = None
+    elif camera:
+        camera.stop()
+    camera = None
+
+def get_rotation_angle(class_name):
+    """분류에 따른 회전 각도 반환"""
+    angle_map = {
+        "general trash": 0,    # 0도 (회전 없음)
+        "plastic": 90,         # 90도 회전
+        "metal": 180,          # 180도 회전  
+        "glass": 270           # 270도 회전
+    }
+    return angle_map.get(class_name, 0)
+
+def annotate(frame, result):
+    """바운딩 박스 + 라벨을 그린 복사본 반환"""
+    import cv2
+    annotated = frame.copy()
+    if result.xyxy is None:
+        return annotated
+    label = result.label
+    x1, y1, x2, y2 = map(int, result.xyxy)
+    cv2.rectangle(annotated, (x1, y1), (x2, y2), (255, 0, 255), 2)
+    (tw, th), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
+    text_y = y1 - 10 if y1 - 10 > th + 4 else y1 + th + 10
+    cv2.rectangle(annotated, (x1, text_y - th - 4), (x1 + tw, text_y), (0, 0, 0), -1)
+    cv2.putText(annotated, label, (x1, text_y - 2), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+    return annotated
+
+def end_cycle(job, ok, **attrs):
+    """사이클 트레이스 마무리 - 단계별 (대기, 처리) 시간 포함"""
+    stages = {name: {"wait_s": round(w, 4), "service_s": round(t, 4)}
+              for name, (w, t) in job.stage_times.items() if not name.startswith("_")}
+    return job["trace"].finish(ok=ok, stages=stages, **attrs)
+
+def classify_stage(job):
+    """1단계: 캡처 + 분류"""
+    trace = job["trace"] = CycleTrace("sort", cycle_id=job.id)
+    trace.started_at = job.requested_at
+    clog = cycle_logger(log, cycle=job.id)
+    if engine is None or not engine.ready or camera is None:
+        clog.error("🚨 추론 엔진/카메라 준비 안 됨")
+        end_cycle(job, False, error="vision not ready")
+        return False
 
+    # 앞 물체가 투입될 때까지 대기 (회전/투입과 겹치는 것은 이미지 저장/업로드 등 슈트와 무관한 작업만)
+    with trace.span("wait_chute") as span:
+        span["ok"] = chute_clear.wait(CHUTE_CLEAR_TIMEOUT)
+    if not span["ok"]:
+        clog.error("🚨 이전 물체 투입이 끝나지 않음 - 분류 중단")
+        end_cycle(job, False, error="chute not clear")
+        return False
 
-def run_once():
-    """메인 분류 처리 함수"""
-    global is_processing
-    print("📦 모델 로드 중...")
-    try:
-        model = YOLO("best.pt")
-        print("모델 로드 완료")
-    except Exception as e:
-        print(f"모델 로드 실패: {e}")
-        is_processing = False
-        return
+    with trace.span("notify_begin"):
+        notify_ui_begin()
 
-    cap = cv2.VideoCapture(gstreamer_pipeline(), cv2.CAP_GSTREAMER)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    # 요청 이후, 그리고 앞 물체 투입 이후에 캡처된 프레임만 사용
+    after = max(job.requested_at, last_drop_done)
+    if CLASSIFY_MODE == "vote":
+        with trace.span("classify_vote") as span:
+            vote = voter.classify(camera, after=after)
+            span["ok"] = vote is not None
+            if vote:
+                span["frames"] = vote.frames_used
+                span["early_exit"] = vote.early_exit
+        if vote is None:
+            clog.warning("프레임 캡처 실패")
+            end_cycle(job, False, error="capture failed")
+            return False
+        frame, result = vote.frame, vote.result
+        if clog.isEnabledFor(logging.DEBUG):  # 점수 문자열은 DEBUG 일 때만 만듦
+            clog.debug("투표 분류: %d프레임, %.1fms%s - %s", vote.frames_used, vote.elapsed * 1000,
+                       " (조기 종료)" if vote.early_exit else "",
+                       ", ".join(f"{k} {v:.2f}" for k, v in vote.scores.items()))
+    else:
+        with trace.span("capture") as span:
+            frame = camera.read_fresh(after=after, timeout=1.0)
+            span["ok"] = frame is not None
+        if frame is None:
+            clog.warning("프레임 캡처 실패")
+            end_cycle(job, False, error="capture failed")
+            return False
+        with trace.span("inference"):
+            result = engine.classify(frame)
+        clog.debug("추론 시간: %.1fms", result.latency * 1000)
+
+    # 공유 메모리 뷰는 곧 덮어써지므로 저장/업로드할 프레임 1장만 복사
+    frame = camera.keep(frame)
+    if frame is None:
+        clog.warning("프레임이 분류 중 덮어써짐 (링 버퍼 부족 - VISION_RING_SLOTS 확인)")
+        end_cycle(job, False, error="frame overwritten")
+        return False
 
-    if not cap.isOpened():
-        print("🚨 카메라 열기 실패")
-        is_processing = False
-        return
+    # 원본 이미지 저장 (백그라운드 인코딩/저장)
+    # 같은 초에 여러 건이 처리될 수 있어 밀리초 + job ID 를 붙여 이름 충돌 방지
+    job["timestamp"] = f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]}_{job.id}"
+    uploader.submit(job["timestamp"], frame, upload=False)
 
-    try:
-        time.sleep(3)
-        notify_ui_begin()
-        
-        # 초기 프레임 버퍼 비우기
-        for _ in range(5): 
-            cap.read()
-            
-        ret, frame = cap.read()
-        if not ret:
-            print("프레임 캡처 실패")
-            return
-
-        # 이미지 저장
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        img_path = f"image/{timestamp}.jpg"
-        os.makedirs("image", exist_ok=True)
-        cv2.imwrite(img_path, frame)
-        print(f"원본 이미지 저장 완료: {img_path}")
-
-        # AI 모델 예측
-        results = model.predict(source=frame, imgsz=320, device=0, half=True, verbose=False)
-        r = results[0]
-
-        # 기본값 설정
-        class_name = "general trash"
-        annotated = frame.copy()
-
-        if len(r.boxes) == 0:
-            print("객체 없음 → 일반쓰레기")
-        else:
-            boxes = r.boxes
-            top_idx = boxes.conf.cpu().numpy().argmax()
-            best_box = boxes[top_idx]
-            xyxy = best_box.xyxy.cpu().numpy()[0]
-            cls_id = int(best_box.cls.cpu().numpy())
-            class_name_raw = model.names[cls_id]
-            valid_classes = ["general trash", "plastic", "metal", "glass"]
-            class_name = class_name_raw.lower() if class_name_raw.lower() in valid_classes else "general trash"
-            
-            # label 정의 (신뢰도 포함)
-            confidence = float(best_box.conf.cpu().numpy())
-            label = f"{class_name_raw} {confidence:.2f}"
-            print(f"객체 감지: {label}")
-            
-            # 바운딩 박스 그리기
-            x1, y1, x2, y2 = map(int, xyxy)
-            cv2.rectangle(annotated, (x1, y1), (x2, y2), (255, 0, 255), 2)
-            (tw, th), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
-            text_y = y1 - 10 if y1 - 10 > th + 4 else y1 + th + 10
-            cv2.rectangle(annotated, (x1, text_y - th - 4), (x1 + tw, text_y), (0, 0, 0), -1)
-            cv2.putText(annotated, label, (x1, text_y - 2), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-
-        # 결과 이미지 저장
-        result_path = f"image/{timestamp}_result.jpg"
-        cv2.imwrite(result_path, annotated)
-        print(f"[{class_name}] 결과 이미지 저장 완료 → {result_path}")
-
-        # 🔥 여기가 핵심 수정 부분: 실제 회전 각도 계산
-        def get_rotation_angle(class_name):
-            """분류에 따른 회전 각도 반환"""
-            angle_map = {
-                "general trash": 0,    # 0도 (회전 없음)
-                "plastic": 90,         # 90도 회전
-                "metal": 180,          # 180도 회전  
-                "glass": 270           # 270도 회전
-            }
-            return angle_map.get(class_name, 0)
-
-        # 실제 회전 각도 계산
-        rotation_angle = get_rotation_angle(class_name)
-
-        # 아두이노 + 라즈베리파이 통합 제어
-        success = control_step_motor_arduino_with_blocking(class_name)
-        
-        if success:
-            print(f"✅ [{class_name}] 아두이노 분류 및 입구 제어 완료")
-        else:
-            print(f"❌ [{class_name}] 분류 처리 실패")
-        
-        # 🔥 수정된 부분: 실제 회전 각도를 전달
-        send_image_to_server(result_path, class_name, rotation_angle)
-        print(f"📤 이미지 업로드 완료 - 각도: {rotation_angle}도")
+    if result.xyxy is None:
+        clog.debug("객체 없음 → 일반쓰레기")
+    else:
+        clog.debug("객체 감지: %s", result.label)
+
+    job["frame"] = frame
+    job["result"] = result
+    job["class_name"] = result.class_name
+    job["angle"] = get_rotation_angle(result.class_name)
+    trace.attrs.update(bin=result.class_name, confidence=round(result.confidence, 3))
+    chute_clear.clear()  # 이 물체가 투입될 때까지 (actuate_stage 끝) 다음 분류 대기
+    return True
 
-    except Exception as e:
-        print(f"처리 중단: {e}")
+def actuate_stage(job):
+    """2단계: 아두이노 회전 + 라즈베리파이 투입/측정 + 입구 제어"""
+    global last_drop_done
+    class_name = job["class_name"]
+    clog = cycle_logger(log, cycle=job.id, bin=class_name)
+    try:
+        success = control_step_motor_arduino_with_blocking(class_name, job["trace"])
     finally:
-        try:
-            cap.release()
-            cv2.destroyAllWindows()
-        except Exception as e:
-            print(f"정리 중 오류: {e}")
+        # 실패해도 다음 분류를 풀어 줌 (투입 실패로 남은 물체는 다음 요청에서 다시 분류)
+        last_drop_done = time.time()
+        chute_clear.set()
+    job["success"] = success
+    if success:
+        clog.debug("✅ [%s] 아두이노 분류 및 입구 제어 완료", class_name)
+    else:
+        clog.error(f"❌ [{class_name}] 분류 처리 실패")
+    return True
 
-        is_processing = False
-        print("처리 완료 및 자원 해제")
+def report_stage(job):
+    """3단계: 결과 이미지 업로드 예약 (주석은 업로드 스레드에서 실제로 보낼 때만 그림), 사이클 요약"""
+    class_name = job["class_name"]
+    clog = cycle_logger(log, cycle=job.id, bin=class_name)
+    uploader.submit(f"{job['timestamp']}_result", job.pop("frame"),
+                    meta={"class": class_name, "angle": str(job["angle"]), "device_id": "jetson"},
+                    render=functools.partial(annotate, result=job["result"]))
+
+    summary = ", ".join(f"{name} 대기 {w:.2f}s/처리 {t:.2f}s" for name, (w, t) in job.stage_times.items())
+    total = time.time() - job.requested_at
+    clog.info(f"📦 [job {job.id}] {class_name} ({job['angle']}도) 완료 - 총 {total:.2f}초 ({summary})",
+              extra={"phase": "cycle", "duration": round(total, 3)})
+    end_cycle(job, bool(job.get("success")))
+    return True
 
-@app.route("/start", methods=["POST"])
-def start():
-    """분류 시작 API"""
-    global is_processing, last_started_time
+# 시작 순서: HTTP 서버 먼저, 아두이노/라즈베리파이/카메라+모델은 백그라운드에서 병렬 초기화
+# 실패한 구성 요소는 다시 시도하고, /health 와 /ready 로 상태를 알림
+startup = None
+
+def sort_ready():
+    """분류 요청을 받을 수 있는 상태인지 - (가능 여부, 안 되는 이유)"""
+    if engine is None or not engine.ready or camera is None:
+        return False, "vision not ready"
+    if not arduino.connected:
+        return False, "arduino not connected"
+    if is_locked or carousel.blocked:
+        return False, "entrance locked (bin full)"
+    return True, None
+
+# 분류 파이프라인 - 단계별 큐로 다음 물체 분류와 이전 물체 투입을 겹쳐 실행
+pipeline = None
+
+def request_sort(requested_at=None):
+    """분류 작업 제출 - /start 와 도착 감지가 공유 (상태 코드, 메시지)
+
+    requested_at 이후에 캡처된 프레임으로 분류 (도착 감지는 멈춘 프레임의 캡처 시각을 넘김)
+    """
+    global last_started_time, last_arrival_frame
     now = time.time()
-    if is_processing or (now - last_started_time < 3):
-        return "Already processing", 429
+    if is_processing:
+        return 429, "Already processing"
+    if requested_at is None and now - last_started_time < START_DEBOUNCE:
+        return 429, "Already processing"
+    if requested_at is not None and requested_at <= last_arrival_frame:
+        return 429, "Duplicate trigger"  # 같은 멈춘 프레임으로 다시 요청
+    ok, reason = sort_ready()
+    if not ok:
+        return 503, f"Not ready: {reason}"
+    job = SortJob(requested_at=requested_at or now)
+    if not pipeline.submit(job):
+        return 429, "Pipeline full"
     last_started_time = now
-    is_processing = True
-    threading.Thread(target=run_once).start()
-    return "Started", 200
+    if requested_at is not None:
+        last_arrival_frame = requested_at
+    return 200, "Started"
 
-@app.route("/empty_check_all", methods=["POST"])
-def empty_check_all():
-    global is_processing, is_locked
-    if is_processing:
-        return jsonify({"status": "busy"}), 409
+def can_accept_sort():
+    """도착 감지용 - 지금 request_sort 가 받아들여질 상태인지 (아니면 물체 도착을 보류)"""
+    return not is_processing and sort_ready()[0] and pipeline.can_accept()
 
-    is_processing = True
+@routes.route("/start", methods=["POST"])
+def start():
+    """분류 시작 API - 파이프라인 큐에 넣고 즉시 반환"""
+    status, message = request_sort()
+    return message, status
+
+@routes.route("/pipeline_stats", methods=["GET"])
+def pipeline_stats():
+    """단계별 대기열 깊이 / 처리량"""
+    return jsonify(pipeline.stats()), 200
+
+class EmptyCheckJob:
+    """백그라운드 비움 확인 작업 상태"""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:8]
+        self.state = "running"      # running | done | failed
+        self.status = "running"     # cleared | still_full (완료 시)
+        self.started_at = time.time()
+        self.finished_at = None
+        self.levels = {}
+        self.skipped = []
+        self.current = None
+        self.total = len(EMPTY_CHECK_ORDER)
+        self.error = None
+
+    def as_dict(self):
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.id,
+            "state": self.state,
+            "status": self.status,
+            "levels": self.levels,
+            "skipped": self.skipped,
+            "progress": {"done": len(self.levels), "total": self.total, "current": self.current},
+            "elapsed": round(end - self.started_at, 2),
+            "error": self.error,
+        }
+
+def fresh_level(class_name):
+    """분류 흐름에서 방금 측정된 비어 있는 통의 레벨 (없거나 오래됐거나 꽉 찬 값이면 None)
+
+    꽉 찬 값은 그 뒤에 통을 비웠을 수 있으므로 (비움 확인을 부르는 이유) 재사용하지 않음
+    """
+    level = levels.level(class_name, max_age=EMPTY_CHECK_FRESH_SECONDS, sources=("pi",))
+    if level is None or not 0 <= level < levels.full_level:
+        return None
+    return level
+
+def run_empty_check(job):
+    """비움 확인 - 측정값은 라즈베리파이가 소켓으로 바로 응답, 응답 즉시 다음 위치로 회전"""
+    global is_processing, is_locked
+    trace = CycleTrace("empty_check", cycle_id=job.id)
+    clog = cycle_logger(log, job=job.id)
     try:
-        print("[전체 비움 확인 시작]")
-
-        print("[비움 확인 전 입구 해제]")
-        unblock_success = send_to_arduino("unblock_entrance") 
-        if unblock_success:
-            time.sleep(2) 
-            print("입구 해제 완료")
-        else:
-            print("입구 해제 실패")
-
-        levels = {}
-        
-        check_sequence = [
-            ("check:general trash", "general trash"),  # 0도에서 측정 (회전 없음)
-            ("check:plastic", "plastic"),              # 0→90도
-            ("check:metal", "metal"),                  # 90→180도  
-            ("check:glass", "glass"),                  # 180→270도
-            ("empty_check_home", None)                 # 270→0도 (복귀만)
-        ]
-        
-        for arduino_cmd, class_name in check_sequence:
-            if class_name is None:  # 복귀 명령
-                print(f"[복귀] 원점으로 복귀 중...")
-                success = send_to_arduino(arduino_cmd)
-                time.sleep(1.5)  
-                continue
-                
-            print(f"[🔄 비움 확인] {class_name} 위치에서 측정 중...")
-            
-            # 아두이노로 위치 이동 (또는 현재 위치에서 측정)
-            success = send_to_arduino(arduino_cmd)
-            if not success:
-                print(f"아두이노 통신 실패: {arduino_cmd}")
-                levels[class_name] = -1
-                continue
-                
-            # 회전 대기 시간
-            if class_name == "general trash":
-                time.sleep(0.5)  
+        # 진행 중인 분류가 끝날 때까지 대기
+        with trace.span("wait_idle"):
+            idle = pipeline.wait_idle(timeout=30)
+        if not idle:
+            raise RuntimeError("분류 파이프라인이 비지 않음")
+        if not pi.wait_connected(2):
+            raise RuntimeError("라즈베리파이 미연결")
+
+        clog.info(f"[전체 비움 확인 시작] job={job.id}")
+
+        # 측정하려면 회전판을 돌려야 하므로 입구 해제 (is_processing 동안 분류 요청은 거부됨).
+        # 모든 통이 기준 아래로 확인되지 않으면 끝에서 다시 막고 잠금 유지
+        if carousel.blocked:
+            clog.debug("[비움 확인 전 입구 해제]")
+            with trace.span("unblock") as span:
+                span["ok"] = carousel.unblock()
+            if not span["ok"]:
+                raise RuntimeError("입구 해제 실패")
+            clog.debug("입구 해제 완료")
+
+        # 방금 측정된 (꽉 차지 않은) 통은 건너뛰고, 측정할 통만 현재 위치에서 최단 경로 순서로 방문
+        to_measure = []
+        for class_name in EMPTY_CHECK_ORDER:
+            level = fresh_level(class_name)
+            if level is None:
+                to_measure.append(class_name)
             else:
-                time.sleep(1.0)  
+                job.levels[class_name] = level
+                job.skipped.append(class_name)
+                clog.info(f"[⏭ 비움 확인] {class_name} 최근 측정값 사용: {level}%")
+        route = carousel.order(to_measure)
+        if clog.isEnabledFor(logging.DEBUG):
+            clog.debug("[비움 확인 경로] %s → %s", carousel.stats()["bin"], " → ".join(route) or "없음")
+
+        for class_name in route:
+            job.current = class_name
             
-            # 라즈베리파이로 측정 명령
-            pi_success = send_class_to_pi(f"check:{class_name}")
-            if pi_success:
-                time.sleep(3)  
-            else:
-                print(f"라즈베리파이 통신 실패: {class_name}")
-                levels[class_name] = -1
+            # 아두이노로 위치 이동 - 회전 완료(DONE)까지 대기
+            with trace.span("check_rotate", bin=class_name) as span:
+                span["ok"], span["steps"], _ = carousel.move_to(class_name)
+            if not span["ok"]:
+                clog.warning(f"아두이노 통신 실패: {class_name} 위치로 이동")
+                job.levels[class_name] = -1
                 continue
 
-            # 결과 확인
-            try:
-                res = requests.get("http://43.202.10.147:3001/data", timeout=2)
-                level_data = res.json()
-                level = level_data.get(class_name, -1)
-                levels[class_name] = level
-                print(f"{class_name} 측정 결과: {level}%")
-            except Exception as e:
-                print(f"데이터 조회 실패: {e}")
-                levels[class_name] = -1
+            clog.debug("[🔄 비움 확인] %s 위치에서 측정 중...", class_name)
+            with trace.span("check_measure", bin=class_name) as span:
+                reply = send_class_to_pi(f"check:{class_name}")
+                span["ok"] = reply is not None
+            if reply is None:
+                clog.warning(f"라즈베리파이 통신 실패: {class_name}")
+                job.levels[class_name] = -1
+                continue
+            job.levels[class_name] = reply["level"]
+            levels.update(class_name, reply["level"], "pi")
+            clog.info(f"{class_name} 측정 결과: {reply['level']}%", extra={"bin": class_name})
+        job.current = None
 
         # 비움 상태 확인 
-        if all(levels[c] >= 0 and levels[c] < 80 for c in levels):
+        if all(0 <= job.levels.get(c, -1) < levels.full_level for c in EMPTY_CHECK_ORDER):
             is_locked = False
-            print("모든 클래스가 비워짐 → 분류 가능 상태로 전환")
-            return jsonify({
-                "status": "cleared",
-                "levels": levels
-            }), 200
+            job.status = "cleared"
+            clog.info("모든 클래스가 비워짐 → 분류 가능 상태로 전환")
         else:
             is_locked = True
-            print("아직 꽉 찬 클래스 있음 → 비움 확인 반복 필요")
-            
-            print("꽉 찬 쓰레기통이 남아있어 입구를 막습니다")
-            block_success = send_to_arduino("block_entrance")
-            if block_success:
-                time.sleep(2)
-                print("비움 확인 후 입구 막기 완료")
+            job.status = "still_full"
+            clog.warning("아직 꽉 찬 클래스 있음 → 입구를 막습니다")
+            with trace.span("block") as span:
+                span["ok"] = carousel.block()
+            if span["ok"]:
+                clog.info("비움 확인 후 입구 막기 완료")
             else:
-                print("비움 확인 후 입구 막기 실패")
-            
-            return jsonify({
-                "status": "still_full",
-                "levels": levels
-            }), 200
+                clog.error("비움 확인 후 입구 막기 실패")
+        job.state = "done"
 
     except Exception as e:
-        print(f"empty_check_all 에러: {e}")
-        return jsonify({"error": str(e)}), 500
+        clog.exception(f"empty_check_all 에러: {e}")
+        job.state = "failed"
+        job.status = "error"
+        job.error = str(e)
     finally:
+        job.finished_at = time.time()
         is_processing = False
+        trace.finish(ok=job.state == "done", status=job.status, levels=dict(job.levels),
+                     skipped=list(job.skipped), error=job.error)
+        elapsed = job.finished_at - job.started_at
+        clog.info(f"[비움 확인 종료] job={job.id} {job.status} ({elapsed:.2f}초)",
+                  extra={"phase": "empty_check", "duration": round(elapsed, 3)})
+
+@routes.route("/empty_check_all", methods=["POST"])
+def empty_check_all():
+    """비움 확인 작업 시작 - 즉시 job_id 반환, 진행 상황은 GET /empty_check/<job_id>"""
+    global is_processing, current_empty_check
+    if is_processing:
+        busy_id = current_empty_check.id if current_empty_check else None
+        return jsonify({"status": "busy", "job_id": busy_id}), 409
 
-@app.route("/test_arduino", methods=["POST"])
+    # 새 분류 요청을 막고 백그라운드에서 진행
+    is_processing = True
+    job = EmptyCheckJob()
+    current_empty_check = job
+    empty_check_jobs[job.id] = job
+    for old_id in list(empty_check_jobs)[:-10]:
+        del empty_check_jobs[old_id]
+    threading.Thread(target=run_empty_check, args=(job,), daemon=True).start()
+    return jsonify(job.as_dict()), 202
+
+@routes.route("/empty_check/<job_id>", methods=["GET"])
+def empty_check_status(job_id):
+    """비움 확인 작업 상태/진행률"""
+    job = empty_check_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job"}), 404
+    return jsonify(job.as_dict()), 200
+
+@routes.route("/health", methods=["GET"])
+def health():
+    """프로세스 생존 + 구성 요소별 초기화 상태 (항상 200)"""
+    return jsonify(startup.status()), 200
+
+@routes.route("/ready", methods=["GET"])
+def ready():
+    """분류 가능 여부 - 필수 구성 요소가 모두 준비되면 200, 아니면 503"""
+    status = startup.status()
+    ok, reason = sort_ready()
+    status["ready"] = ok and pi.connected
+    status["reason"] = reason or (None if pi.connected else "pi not connected")
+    return jsonify(status), 200 if status["ready"] else 503
+
+@routes.route("/inference_stats", methods=["GET"])
+def inference_stats():
+    """모델 로드/콜드/웜 추론 지연 시간 조회"""
+    if engine is None:
+        return jsonify({"status": "not_loaded"}), 503
+    stats = engine.stats()
+    if vision:
+        stats["capture"] = vision.camera.stats()
+    return jsonify(stats), 200
+
+@routes.route("/http_stats", methods=["GET"])
+def http_stats():
+    """EC2 엔드포인트별 지연 시간/오류 카운터 조회"""
+    return jsonify(api.stats()), 200
+
+@routes.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """단계별 소요 시간 히스토그램 (Prometheus 텍스트 형식)"""
+    return metrics.REGISTRY.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+@routes.route("/traces", methods=["GET"])
+def cycle_traces():
+    """최근 사이클 트레이스 (JSON) - ?kind=sort|empty_check&limit=20"""
+    limit = request.args.get("limit", default=20, type=int)
+    return jsonify(metrics.TRACES.latest(limit, request.args.get("kind"))), 200
+
+@routes.route("/levels", methods=["GET"])
+def local_levels():
+    """로컬 채움도 (값, 측정 시각, 출처) + 서버 동기화 상태"""
+    return jsonify({"levels": levels.snapshot(), "full": levels.full_classes(),
+                    "sync": level_sync.stats()}), 200
+
+@routes.route("/pi_stats", methods=["GET"])
+def pi_stats():
+    """라즈베리파이 채널 상태 (연결, 왕복 시간, 재연결 횟수)"""
+    return jsonify(pi.stats()), 200
+
+@routes.route("/arrival_stats", methods=["GET"])
+def arrival_stats():
+    """물체 도착 감지 상태 (AUTO_TRIGGER=1 일 때) - 상태, 전경 비율, 프레임당 CPU 시간"""
+    if arrival is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **arrival.stats()}), 200
+
+@routes.route("/carousel", methods=["GET"])
+def carousel_stats():
+    """회전판 현재 위치 / 입구 막힘 / 이동 통계"""
+    return jsonify(carousel.stats()), 200
+
+@routes.route("/upload_stats", methods=["GET"])
+def upload_stats():
+    """이미지 업로드 파이프라인 상태 (대기열, 스풀, 실패)"""
+    return jsonify(uploader.stats()), 200
+
+@routes.route("/journal_stats", methods=["GET"])
+def journal_stats():
+    """EC2 이벤트 저널 상태 (미전송 건수, 가장 오래된 미전송 이벤트의 지연, 압축 전후 전송량)"""
+    return jsonify(syncer.stats()), 200
+
+@routes.route("/test_arduino", methods=["POST"])
 def test_arduino():
     """아두이노 테스트 API"""
     try:
         data = request.json or {}
-        message = data.get('message', 'test')
+        message = data.get('message', 'ping')
         
-        success = send_to_arduino(message)
+        success = carousel.command(message) is not None  # 회전 명령이면 위치 추적에 반영
         
         if success:
             return jsonify({"status": "success", "message": f"Sent '{message}' to Arduino"}), 200
@@ -510,36 +779,105 @@ def test_arduino():
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+def init():
+    """장치 연결 / 파일 / 스레드 객체 생성 (import 시에는 만들지 않음) - 서비스 시작 전에 한 번 호출"""
+    global pi, arduino, api, uploader, journal, syncer, levels, level_sync, app, is_locked
+    global camera_roi, carousel, startup, pipeline
+    pi = PiChannel(PI_HOST, PI_PORT, heartbeat_interval=1.0, dead_after=3.0)
+    arduino = SerialManager(ARDUINO_PORT, ARDUINO_BAUD,
+                            command_timeout=ARDUINO_COMMAND_TIMEOUT,
+                            ready_timeout=ARDUINO_READY_TIMEOUT)
+    api = ApiClient(EC2_BASE_URL, timeouts=EC2_TIMEOUTS)
+    image_dir = os.environ.get("IMAGE_DIR", "image")
+    uploader = UploadPipeline(api, image_dir=image_dir,
+                              spool_dir=os.environ.get("IMAGE_SPOOL_DIR", os.path.join(image_dir, "spool")))
+    journal = EventJournal(os.environ.get("EVENT_JOURNAL_PATH", "events.db"), device_id="jetson")
+    syncer = JournalSyncer(journal, api)
+
+    # 사이클 트레이스를 JSON Lines 로도 남기려면 TRACE_PATH 지정
+    metrics.TRACES.path = os.environ.get("TRACE_PATH")
+
+    levels = LevelStore(os.environ.get("LEVEL_STORE_PATH", "levels.json"))
+    level_sync = LevelSync(levels, api, interval=10.0)
+    is_locked = bool(levels.full_classes())  # 재시작 전 꽉 찬 통이 있으면 잠금 유지
+    camera_roi = preprocess.load_roi()
+
+    carousel = CarouselPlanner(send_arduino_command,
+                               wrap=os.environ.get("CAROUSEL_WRAP", "1") == "1",
+                               state_path=os.environ.get("CAROUSEL_STATE_PATH", "carousel.json"))
+
+    startup = Startup(started_at=PROCESS_START)
+    startup.add("arduino", setup_arduino, check=lambda: arduino.connected, retry=2.0)
+    startup.add("pi", lambda: pi.wait_connected(PI_REPLY_TIMEOUT), check=lambda: pi.connected, retry=1.0)
+    startup.add("vision", lambda: setup_vision(), check=lambda: engine is not None and engine.ready,
+                retry=10.0)
+
+    pipeline = SortPipeline()
+    pipeline.add_stage("classify", classify_stage, maxsize=2)
+    pipeline.add_stage("actuate", actuate_stage, maxsize=2)
+    pipeline.add_stage("report", report_stage, maxsize=8)
+
+    app = Flask(__name__)
+    CORS(app)
+    app.register_blueprint(routes)
+    return app
+
 if __name__ == "__main__":
-    print("젯슨 나노 + 아두이노 시스템 시작")
+    setup_logging("jetson")
+    init()
+    log.info("젯슨 나노 + 아두이노 시스템 시작")
     
     # LED 초기화
     try:
         setup_led()
     except Exception as e:
-        print(f"LED 초기화 실패: {e}")
-    
-    # 아두이노 연결
-    arduino_connected = setup_arduino()
-    
-    if arduino_connected:
-        print("  아두이노 모드로 실행 - 메인 모터 제어: 아두이노")
-        print("  사용 가능한 API:")
-        print("  - POST /start : 분류 시작")
-        print("  - POST /empty_check_all : 비움 확인")
-        print("  - POST /test_arduino : 아두이노 테스트")
-        
-        try:
-            app.run(host="0.0.0.0", port=3002, debug=False)
-        except KeyboardInterrupt:
-            print("\n⏹사용자에 의한 프로그램 중단")
-        finally:
-            cleanup_led()  # 프로그램 종료 시 LED 끄기
-    else:
-        print("아두이노 연결 실패 - 시스템을 종료합니다")
-        print("해결 방법:")
-        print("1. 아두이노 USB 연결 확인")
-        print("2. 포트 권한 설정: sudo chmod 666 /dev/ttyACM0")
-        print("3. 아두이노 전원 및 코드 업로드 확인")
-        cleanup_led()  # 실패 시에도 LED 끄기
-        exit(1)
+        log.error(f"LED 초기화 실패: {e}")
+
+    # 하드웨어를 기다리지 않는 백그라운드 서비스
+    pi.start()
+    level_sync.start()
+    uploader.start()
+    syncer.start()
+    pipeline.start()
+
+    # 아두이노 / 라즈베리파이 / 카메라+모델 병렬 초기화 (실패 시 재시도, 프로세스는 계속 동작)
+    startup.start()
+
+    log.info("  사용 가능한 API:")
+    log.info("  - GET /health : 구성 요소별 초기화 상태")
+    log.info("  - GET /ready : 분류 가능 여부 (준비 전 503)")
+    log.info("  - POST /start : 분류 시작")
+    log.info("  - GET /pipeline_stats : 단계별 대기열/처리량")
+    log.info("  - POST /empty_check_all : 비움 확인 시작 (job_id 반환)")
+    log.info("  - GET /empty_check/<job_id> : 비움 확인 진행 상황")
+    log.info("  - POST /test_arduino : 아두이노 테스트")
+    log.info("  - GET /inference_stats : 추론 지연 시간")
+    log.info("  - GET /http_stats : EC2 통신 통계")
+    log.info("  - GET /upload_stats : 이미지 업로드 상태")
+    log.info("  - GET /journal_stats : EC2 이벤트 전송 대기/지연")
+    log.info("  - GET /pi_stats : 라즈베리파이 연결 상태")
+    log.info("  - GET /levels : 로컬 채움도")
+    log.info("  - GET /carousel : 회전판 위치")
+    log.info("  - GET /arrival_stats : 물체 도착 자동 감지 상태")
+    log.info("  - GET /metrics : 단계별 지연 시간 (Prometheus)")
+    log.info("  - GET /traces : 최근 사이클 트레이스")
+    log.info(f"HTTP 서버 시작 - 프로세스 시작 후 {time.time() - PROCESS_START:.2f}초")
+
+    try:
+        app.run(host="0.0.0.0", port=3002, debug=False, threaded=True)
+    except KeyboardInterrupt:
+        log.info("⏹ 사용자에 의한 프로그램 중단")
+    finally:
+        startup.stop()
+        pipeline.stop()
+        cleanup_vision()
+        # 종료 시 원점에 세워 둠 (입구를 막아 둔 상태면 그대로)
+        if arduino.connected and not carousel.blocked and not carousel.home():
+            log.warning("종료 전 회전판 원점 복귀 실패")
+        arduino.stop()
+        pi.stop()
+        level_sync.stop()
+        uploader.stop()
+        syncer.stop()
+        journal.close()
+        cleanup_led()  # 프로그램 종료 시 LED 끄기
@@ -0,0 +1,195 @@
+import logging
+import os
+import json
+import time
+import threading
+
+import metrics
+
+log = logging.getLogger(__name__)
+
+FULL_LEVEL = 80  # 이 이상이면 입구를 막음
+
+
+class LevelReading:
+    """통 하나의 채움도 - 값, 측정 시각, 출처(pi | server)"""
+
+    def __init__(self, level, timestamp, source):
+        self.level = level
+        self.timestamp = timestamp
+        self.source = source
+
+    @property
+    def age(self):
+        return time.time() - self.timestamp
+
+    def as_dict(self):
+        return {"level": self.level, "timestamp": self.timestamp, "source": self.source}
+
+
+class LevelStore:
+    """클래스별 최신 채움도를 메모리에 보관하고 작은 JSON 파일로 유지
+
+    로컬 측정(Pi 응답)과 서버 값을 모두 받는다. 측정 시각은 반영한 시점의 젯슨 시계로 기록하고
+    서버 시각과는 비교하지 않는다 (서버 값의 순서 판단은 LevelSync 에서 서버 시각끼리만).
+    입구 막기 같은 판단은 네트워크 없이 여기서 바로 내린다.
+    """
+
+    def __init__(self, path="levels.json", full_level=FULL_LEVEL):
+        self.path = path
+        self.full_level = full_level
+        self.readings = {}
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            self.readings = {name: LevelReading(v["level"], v["timestamp"], v["source"])
+                             for name, v in data.items()}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log.warning(f"채움도 파일 읽기 실패 ({self.path}): {e}")
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, self.path)
+
+    def update(self, class_name, level, source, force=False):
+        """값 반영 - 측정 실패(음수)이거나 다른 출처에서 같은 값이 되돌아온 경우 무시하고 False
+
+        force: 관리자 초기화처럼 명시적인 이벤트 - 같은 값이어도 반영
+        """
+        if level is None or level < 0:
+            return False
+        with self.lock:
+            current = self.readings.get(class_name)
+            # Pi 가 서버에 올린 같은 값이 되돌아온 경우 - 로컬 측정 기록을 유지
+            if not force and current is not None and current.level == level and current.source != source:
+                return False
+            self.readings[class_name] = LevelReading(level, time.time(), source)
+        try:
+            self.save()
+        except OSError as e:
+            log.warning(f"채움도 파일 저장 실패: {e}")
+        return True
+
+    def get(self, class_name, max_age=None, sources=None):
+        """max_age 초 이내 / 지정 출처의 값만 반환 (없으면 None)"""
+        reading = self.readings.get(class_name)
+        if reading is None:
+            return None
+        if max_age is not None and reading.age > max_age:
+            return None
+        if sources is not None and reading.source not in sources:
+            return None
+        return reading
+
+    def level(self, class_name, max_age=None, default=None, sources=None):
+        reading = self.get(class_name, max_age, sources)
+        return reading.level if reading else default
+
+    def is_full(self, class_name, max_age=None):
+        return self.level(class_name, max_age, default=0) >= self.full_level
+
+    def full_classes(self, max_age=None):
+        return [name for name in list(self.readings) if self.is_full(name, max_age)]
+
+    def snapshot(self):
+        with self.lock:
+            return {name: r.as_dict() for name, r in self.readings.items()}
+
+
+class LevelSync:
+    """서버 채움도(/data)를 주기적으로 가져와 저장소에 반영 (관리자 초기화 등 반영용)
+
+    - 서버 갱신 시각(updatedAt)은 통마다 마지막으로 본 서버 값하고만 비교 (젯슨 시계와 비교하지 않음)
+    - 처음 보는 통은 기준값만 기록하고, 로컬 값이 없을 때만 반영
+    - 서버 값이 바뀌었어도 지난 조회 이후에 Pi 가 직접 잰 값이 있으면 그쪽이 더 최신이므로 유지
+    - 관리자 초기화(resetAt 변경)는 명시적인 이벤트로 보고 항상 반영
+    """
+
+    def __init__(self, store, api, interval=10.0):
+        self.store = store
+        self.api = api
+        self.interval = interval
+        self.running = False
+        self.thread = None
+        self.syncs = 0
+        self.applied = 0
+        self.resets = 0
+        self.last_error = None
+        self.seen_updated = {}  # 통별 마지막으로 본 서버 updatedAt (서버 시계, ms)
+        self.seen_reset = {}  # 통별 마지막으로 본 서버 resetAt (서버 시계, ms)
+        self.last_sync = None  # 지난 조회 시각 (젯슨 시계)
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="level-sync", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def sync_once(self):
+        t0 = time.time()
+        res = self.api.get("/data")
+        metrics.observe("level_sync", time.time() - t0)
+        if not res.ok:
+            raise RuntimeError(f"/data {res.status_code}")
+        data = res.json()
+        # 클래스별 갱신 시각이 없으면(구버전 서버) 마지막 갱신 시각을 공통으로 사용
+        updated = data.get("updatedAt") or {}
+        reset_at = data.get("resetAt") or {}
+        fallback = data.get("lastUpdated") or 0
+        for name, value in data.items():
+            if not isinstance(value, (int, float)) or name in ("lastUpdated", "lastBegin"):
+                continue
+            if self._apply(name, value, updated.get(name) or fallback, reset_at.get(name)):
+                self.applied += 1
+        self.last_sync = t0
+        self.syncs += 1
+
+    def _apply(self, name, value, stamp, reset_stamp):
+        """서버 값 하나 반영 여부 판단 - stamp, reset_stamp 는 서버 시계라 이전 서버 값하고만 비교"""
+        first = name not in self.seen_updated
+        advanced = not first and stamp > self.seen_updated[name]
+        reset = not first and reset_stamp is not None and reset_stamp != self.seen_reset.get(name)
+        self.seen_updated[name] = max(stamp, self.seen_updated.get(name, 0))
+        if reset_stamp is not None:
+            self.seen_reset[name] = reset_stamp
+
+        # 초기화 뒤에 새 측정이 올라왔다면 그 값은 일반 갱신으로 처리
+        if reset and stamp <= reset_stamp:
+            self.resets += 1
+            log.info(f"서버에서 {name} 채움도 초기화 → {value}%")
+            return self.store.update(name, value, "server", force=True)
+        current = self.store.get(name)
+        if first:
+            return current is None and self.store.update(name, value, "server")
+        if not advanced:
+            return False
+        if current is not None and current.source == "pi" and self.last_sync and current.timestamp >= self.last_sync:
+            return False
+        return self.store.update(name, value, "server")
+
+    def stats(self):
+        return {"syncs": self.syncs, "applied": self.applied, "resets": self.resets,
+                "last_error": self.last_error}
+
+    def _run(self):
+        while self.running:
+            try:
+                self.sync_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+            deadline = time.time() + self.interval
+            while self.running and time.time() < deadline:
+                time.sleep(0.5)
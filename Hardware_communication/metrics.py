@@ -0,0 +1,201 @@
+import logging
+import json
+import time
+import itertools
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+# 하드웨어 동작(초 단위)까지 담도록 넓게 잡은 버킷
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Histogram:
+    """라벨별 누적 버킷 히스토그램 (Prometheus histogram 과 같은 의미)"""
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.series = {}  # 라벨 튜플 → [버킷별 개수..., 합, 개수]
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            items = sorted((k, list(v)) for k, v in self.series.items())
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_label_text(key + (('le', bound),))} {count}")
+            lines.append(f"{self.name}_bucket{_label_text(key + (('le', '+Inf'),))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_label_text(key)} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{_label_text(key)} {series[-1]}")
+        return lines
+
+    def summary(self):
+        """라벨별 평균 / 개수 (JSON 조회용)"""
+        with self.lock:
+            return {",".join(f"{k}={v}" for k, v in key) or "all":
+                    {"count": s[-1], "avg_s": s[-2] / s[-1] if s[-1] else None}
+                    for key, s in self.series.items()}
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            lines += [f"{self.name}{_label_text(k)} {v}" for k, v in sorted(self.values.items())]
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help_text, **kwargs)
+            return metric
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def counter(self, name, help_text):
+        return self._get(Counter, name, help_text)
+
+    def render(self):
+        """Prometheus text exposition format (0.0.4)"""
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+PHASES = REGISTRY.histogram("recycle_phase_seconds", "Duration of each sort / empty-check phase")
+CYCLES = REGISTRY.counter("recycle_cycles_total", "Finished cycles by kind and outcome")
+
+
+def observe(phase, seconds, **labels):
+    """단계 소요 시간 기록 (트레이스 없이 쓰는 곳: 업로드, 동기화, 초기화 등)"""
+    PHASES.observe(seconds, phase=phase, **labels)
+
+
+class CycleTrace:
+    """사이클 1회(분류 또는 비움 확인)의 단계별 기록 - 끝나면 JSON 한 건"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, kind, cycle_id=None, **attrs):
+        self.kind = kind
+        self.id = cycle_id if cycle_id is not None else next(self._ids)
+        self.started_at = time.time()
+        self.attrs = dict(attrs)
+        self.spans = []
+        self.finished = None
+
+    def add(self, phase, start, duration, ok=True, **attrs):
+        self.spans.append({"phase": phase, "offset_s": round(start - self.started_at, 4),
+                           "duration_s": round(duration, 4), "ok": ok, **attrs})
+        labels = {"bin": attrs["bin"]} if "bin" in attrs else {}
+        PHASES.observe(duration, phase=phase, **labels)
+
+    @contextmanager
+    def span(self, phase, **attrs):
+        """with trace.span("rotate", bin="plastic") as s: ... - s 에 필드 추가 / s["ok"] = False 가능
+
+        예외가 나면 ok=False 로 기록 후 다시 던짐
+        """
+        t0 = time.time()
+        fields = dict(attrs, ok=True)
+        try:
+            yield fields
+        except BaseException:
+            fields["ok"] = False
+            raise
+        finally:
+            self.add(phase, t0, time.time() - t0, **fields)
+
+    def phases(self):
+        """단계별 합계 (같은 단계가 여러 번이면 더함)"""
+        totals = {}
+        for s in self.spans:
+            totals[s["phase"]] = totals.get(s["phase"], 0.0) + s["duration_s"]
+        return totals
+
+    def finish(self, ok=True, **attrs):
+        self.attrs.update(attrs)
+        self.finished = time.time()
+        total = self.finished - self.started_at
+        PHASES.observe(total, phase=f"{self.kind}_total")
+        CYCLES.inc(kind=self.kind, outcome="ok" if ok else "failed")
+        record = self.as_dict()
+        record["ok"] = ok
+        TRACES.record(record)
+        return record
+
+    def as_dict(self):
+        end = self.finished or time.time()
+        return {"kind": self.kind, "cycle_id": self.id, "started_at": self.started_at,
+                "total_s": round(end - self.started_at, 4), **self.attrs, "spans": self.spans}
+
+
+class TraceLog:
+    """최근 트레이스를 메모리에 보관하고, 경로가 있으면 JSON Lines 로 추가 기록"""
+
+    def __init__(self, maxlen=200, path=None):
+        self.recent = deque(maxlen=maxlen)
+        self.path = path
+        self.lock = threading.Lock()
+
+    def record(self, record):
+        self.recent.append(record)
+        if self.path:
+            line = json.dumps(record, ensure_ascii=False, default=str)
+            with self.lock:
+                try:
+                    with open(self.path, "a") as f:
+                        f.write(line + "\n")
+                except OSError as e:
+                    log.warning(f"트레이스 기록 실패: {e}")
+
+    def latest(self, limit=20, kind=None):
+        items = [r for r in list(self.recent) if kind is None or r["kind"] == kind]
+        return items[-limit:]
+
+
+TRACES = TraceLog()
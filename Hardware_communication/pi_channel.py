@@ -0,0 +1,213 @@
+import logging
+import time
+import socket
+import threading
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import pi_protocol
+
+log = logging.getLogger(__name__)
+
+
+class PiError(Exception):
+    """라즈베리파이 연결 끊김 / 응답 없음 / 처리 실패"""
+
+
+class PiChannel:
+    """젯슨 → 라즈베리파이 상시 연결 - 요청 ID 로 응답 분배, 하트비트, 자동 재연결
+
+    한 연결로 여러 요청을 동시에 보낼 수 있다 (응답은 id 로 매칭).
+    하트비트(ping)는 Pi 가 하드웨어 동작 중이어도 바로 응답하므로
+    dead_after 초 동안 아무 응답도 없으면 연결을 끊고 대기 중 요청을 실패 처리한다.
+    """
+
+    def __init__(self, host, port, heartbeat_interval=1.0, dead_after=3.0,
+                 connect_timeout=2.0, reconnect_interval=1.0):
+        self.host = host
+        self.port = port
+        self.heartbeat_interval = heartbeat_interval
+        self.dead_after = dead_after
+        self.connect_timeout = connect_timeout
+        self.reconnect_interval = reconnect_interval
+
+        self.sock = None
+        self.lock = threading.Lock()       # sock / pending 보호
+        self.write_lock = threading.Lock()
+        self.pending = {}                  # 요청 id → Future
+        self.pings = {}                    # 하트비트 id → 전송 시각
+        self.connected_event = threading.Event()
+        self.running = False
+        self.thread = None
+        self.last_rx = 0.0
+        self.last_ping = 0.0
+
+        self.connects = 0
+        self.completed = 0
+        self.failed = 0
+        self.rtts = deque(maxlen=50)
+        self.last_error = None
+
+    @property
+    def connected(self):
+        return self.connected_event.is_set()
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="pi-channel", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2)
+        self._drop(self.sock, "채널 종료")
+
+    def wait_connected(self, timeout):
+        return self.connected_event.wait(timeout)
+
+    def submit(self, cmd):
+        """요청 전송 후 Future 반환 - 결과는 Pi 응답(dict)"""
+        future = Future()
+        if not self.connected_event.wait(self.connect_timeout):
+            self._fail(future, PiError(f"라즈베리파이 미연결 ({self.last_error})"))
+            return future
+        request_id = pi_protocol.new_request_id()
+        with self.lock:
+            sock = self.sock
+            self.pending[request_id] = future
+        future.request_id = request_id
+        if not self._send(sock, {"id": request_id, "cmd": cmd}):
+            with self.lock:
+                self.pending.pop(request_id, None)
+            self._fail(future, PiError("라즈베리파이 전송 실패"))
+        return future
+
+    def request(self, cmd, timeout):
+        """요청 후 응답 대기 - ok 가 아니거나 시간 초과면 PiError"""
+        future = self.submit(cmd)
+        try:
+            reply = future.result(timeout)
+        except FutureTimeout:
+            with self.lock:
+                self.pending.pop(getattr(future, "request_id", None), None)
+            error = PiError(f"라즈베리파이 응답 시간 초과: '{cmd}'")
+            self._fail(future, error)
+            raise error
+        if not reply.get("ok"):
+            self.failed += 1
+            self.last_error = reply.get("error")
+            raise PiError(f"라즈베리파이 처리 실패: {reply.get('error')}")
+        self.completed += 1
+        return reply
+
+    def stats(self):
+        rtts = list(self.rtts)
+        return {
+            "connected": self.connected,
+            "pending": len(self.pending),
+            "completed": self.completed,
+            "failed": self.failed,
+            "reconnects": max(0, self.connects - 1),
+            "rtt_ms_last": round(rtts[-1] * 1000, 1) if rtts else None,
+            "rtt_ms_avg": round(sum(rtts) / len(rtts) * 1000, 1) if rtts else None,
+            "rtt_ms_max": round(max(rtts) * 1000, 1) if rtts else None,
+            "last_seen_s": round(time.time() - self.last_rx, 2) if self.last_rx else None,
+            "last_error": self.last_error,
+        }
+
+    # ------------------ 채널 스레드 ------------------
+    def _run(self):
+        while self.running:
+            if self.sock is None:
+                if not self._connect():
+                    time.sleep(self.reconnect_interval)
+                continue
+
+            now = time.time()
+            if now - self.last_rx > self.dead_after:
+                log.warning(f"라즈베리파이 응답 없음 ({self.dead_after}초) → 연결 재설정")
+                self._drop(self.sock, "하트비트 응답 없음")
+                continue
+            if now - self.last_ping >= self.heartbeat_interval:
+                self.last_ping = now
+                ping_id = f"hb-{pi_protocol.new_request_id()}"
+                self.pings[ping_id] = now
+                self._send(self.sock, {"id": ping_id, "cmd": "ping"})
+            time.sleep(min(0.2, self.heartbeat_interval))
+
+    def _connect(self):
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+        except OSError as e:
+            self.last_error = str(e)
+            return False
+        sock.settimeout(None)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+        with self.lock:
+            self.sock = sock
+            self.pings.clear()
+        self.last_rx = time.time()
+        self.last_ping = 0.0
+        self.connects += 1
+        threading.Thread(target=self._reader, args=(sock,), name="pi-reader", daemon=True).start()
+        self.connected_event.set()
+        log.info(f"라즈베리파이 {'재연결' if self.connects > 1 else '연결'} 성공: {self.host}:{self.port}")
+        return True
+
+    def _reader(self, sock):
+        reason = "연결 종료"
+        try:
+            for line in sock.makefile("rb"):
+                self.last_rx = time.time()
+                reply = pi_protocol.decode(line)
+                if reply is None:
+                    continue
+                reply_id = reply.get("id")
+                sent = self.pings.pop(reply_id, None)
+                if sent is not None:
+                    self.rtts.append(self.last_rx - sent)
+                    continue
+                with self.lock:
+                    future = self.pending.pop(reply_id, None)
+                if future is not None and not future.done():
+                    future.set_result(reply)
+        except OSError as e:
+            reason = str(e)
+        self._drop(sock, reason)
+
+    def _send(self, sock, message):
+        if sock is None:
+            return False
+        try:
+            with self.write_lock:
+                sock.sendall(pi_protocol.encode(message))
+            return True
+        except OSError as e:
+            self._drop(sock, str(e))
+            return False
+
+    def _drop(self, sock, reason):
+        """연결을 닫고 대기 중 요청을 모두 실패 처리 (이미 교체된 소켓이면 무시)"""
+        with self.lock:
+            if sock is None or self.sock is not sock:
+                return
+            self.sock = None
+            self.connected_event.clear()
+            pending, self.pending = self.pending, {}
+        self.last_error = reason
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        sock.close()
+        for future in pending.values():
+            self._fail(future, PiError(f"라즈베리파이 연결 끊김: {reason}"))
+
+    def _fail(self, future, error):
+        self.failed += 1
+        self.last_error = str(error)
+        if not future.done():
+            future.set_exception(error)
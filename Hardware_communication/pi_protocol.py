@@ -0,0 +1,35 @@
+# 젯슨 ↔ 라즈베리파이 소켓 메시지 (포트 9999)
+#
+# 한 줄에 JSON 하나 ("\n" 구분)
+# 요청: {"id": "<상관 ID>", "cmd": "plastic"}  /  {"id": ..., "cmd": "check:metal"}
+# 응답: {"id": "<같은 ID>", "ok": true, "class": "plastic", "level": 42, "distance": 18.3}
+# 실패: {"id": ..., "ok": false, "error": "busy" | "unknown class: ..." | ...}
+# 조회: {"cmd": "ping" | "health" | "status"} → 하드웨어 동작과 무관하게 즉시 응답
+#
+# 한 연결로 여러 요청을 보낼 수 있고 모든 요청은 같은 id 로 한 번 응답받는다.
+# 예전 방식의 문자열("plastic")도 요청으로 받아들인다.
+import json
+import uuid
+
+
+def new_request_id():
+    return uuid.uuid4().hex[:12]
+
+
+def encode(message):
+    return (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def decode(line):
+    """한 줄을 dict 로 변환 - JSON 이 아니면 예전 문자열 명령으로 간주"""
+    if isinstance(line, bytes):
+        line = line.decode("utf-8", errors="ignore")
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith("{"):
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+    return {"id": None, "cmd": line}
@@ -0,0 +1,170 @@
+import logging
+import time
+import queue
+import threading
+import socketserver
+
+import pi_protocol
+
+log = logging.getLogger(__name__)
+
+# 하드웨어 큐를 거치지 않고 바로 응답하는 조회 명령
+QUERY_COMMANDS = ("ping", "health", "status")
+
+
+class PiCommandServer:
+    """라즈베리파이 명령 서버 - 연결마다 스레드, 하드웨어 동작은 단일 큐로 직렬화
+
+    - 한 연결에서 여러 요청을 줄 단위(JSON)로 계속 주고받음
+    - 투입/측정 명령은 크기 제한이 있는 하드웨어 큐로 (가득 차면 즉시 busy 응답)
+    - ping/health/status 는 하드웨어가 동작 중이어도 바로 응답
+    - 모든 요청은 같은 id 로 정확히 한 번 응답을 받음 (처리 순서대로라 순서는 섞일 수 있음)
+    - 결과 보고(EC2 전송 등)는 별도 스레드에서 처리해 다음 동작을 막지 않음
+    """
+
+    def __init__(self, handler, host="", port=9999, max_queue=4, report=None, extra_status=None):
+        self.handler = handler  # cmd 문자열 → 결과 dict (하드웨어 스레드에서만 호출)
+        self.report = report    # 결과 dict → None (보고 스레드에서 호출)
+        self.extra_status = extra_status  # () → dict, status 응답에 덧붙임 (이벤트 전송 상태 등)
+        self.jobs = queue.Queue(maxsize=max_queue)
+        self.reports = queue.Queue(maxsize=32)
+        self.running = False
+        self.threads = []
+        self.started_at = time.time()
+
+        self.current = None
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.connections = 0
+        self.busy_time = 0.0
+
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                server.connections += 1
+                write_lock = threading.Lock()
+
+                def send(message):
+                    with write_lock:
+                        try:
+                            self.wfile.write(pi_protocol.encode(message))
+                            self.wfile.flush()
+                        except (OSError, ValueError):
+                            pass  # 연결이 끊긴 뒤 도착한 응답은 버림 (닫힌 wfile 은 ValueError)
+
+                try:
+                    for line in self.rfile:
+                        server.dispatch(line, send)
+                finally:
+                    server.connections -= 1
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def address(self):
+        return self.server.server_address
+
+    def start(self):
+        self.running = True
+        for target, name in ((self.server.serve_forever, "pi-accept"),
+                             (self._hardware_worker, "pi-hardware"),
+                             (self._report_worker, "pi-report")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        self.running = False
+        self.server.shutdown()
+        self.server.server_close()
+        for thread in self.threads[1:]:
+            thread.join(timeout=5)
+
+    def serve_forever(self):
+        """start() 후 Ctrl+C 까지 대기"""
+        self.start()
+        try:
+            while self.running:
+                time.sleep(1)
+        finally:
+            self.stop()
+
+    def dispatch(self, line, send):
+        request = pi_protocol.decode(line)
+        if not isinstance(request, dict):  # JSON 이어도 객체가 아니면 ([1], "x" 등) 잘못된 요청
+            if line.strip():
+                send({"id": None, "ok": False, "error": "malformed request"})
+            return
+        request_id = request.get("id")
+        cmd = (request.get("cmd") or "").strip().lower()
+
+        if cmd in QUERY_COMMANDS:
+            send({"id": request_id, "ok": True, "cmd": cmd, **self.status()})
+            return
+        try:
+            self.jobs.put_nowait((request_id, cmd, send, time.time()))
+        except queue.Full:
+            self.rejected += 1
+            send({"id": request_id, "ok": False, "error": "busy", "queued": self.jobs.qsize()})
+
+    def status(self):
+        return {
+            "uptime": round(time.time() - self.started_at, 1),
+            "current": self.current,
+            "queued": self.jobs.qsize(),
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "connections": self.connections,
+            "busy_s": round(self.busy_time, 2),
+            **(self.extra_status() if self.extra_status else {}),
+        }
+
+    def _hardware_worker(self):
+        while self.running:
+            try:
+                request_id, cmd, send, queued_at = self.jobs.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            self.current = cmd
+            t0 = time.time()
+            result = None
+            try:
+                result = self.handler(cmd)
+                reply = {"id": request_id, "ok": True, **result}
+                self.processed += 1
+            except Exception as e:
+                reply = {"id": request_id, "ok": False, "error": str(e)}
+                self.failed += 1
+            elapsed = time.time() - t0
+            self.busy_time += elapsed
+            self.current = None
+
+            reply["elapsed"] = round(elapsed, 3)
+            reply["queue_wait"] = round(t0 - queued_at, 3)
+            # 응답/보고 단계의 예외로 하드웨어 스레드가 죽으면 이후 명령이 모두 큐에서 멈춤
+            try:
+                send(reply)
+                if result and self.report is not None:
+                    try:
+                        self.reports.put_nowait(result)
+                    except queue.Full:
+                        pass
+            except Exception as e:
+                log.warning(f"응답 전송 실패 ({cmd}): {e}")
+
+    def _report_worker(self):
+        while self.running or not self.reports.empty():
+            try:
+                result = self.reports.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self.report(result)
+            except Exception as e:
+                log.warning(f"결과 보고 실패: {e}")
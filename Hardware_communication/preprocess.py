@@ -0,0 +1,159 @@
+import os
+import json
+
+import numpy as np
+
+# 설정값 (환경 변수로 변경 가능)
+#   CAMERA_ROI      : "x,y,w,h" (센서 프레임 대비 비율 0~1) - 지정하면 파일보다 우선
+#   CAMERA_ROI_FILE : 자동 보정 결과 파일 (기본 roi.json)
+#   CAMERA_CROP     : gst (nvvidconv 에서 자르기/축소, 기본) | cpu (전체 프레임을 받아 파이썬에서 자르기)
+DEFAULT_ROI_FILE = "roi.json"
+
+
+class Roi:
+    """관심 영역 - 해상도와 무관하도록 센서 프레임 대비 비율로 저장"""
+
+    def __init__(self, x=0.0, y=0.0, w=1.0, h=1.0):
+        self.x = max(0.0, min(1.0, x))
+        self.y = max(0.0, min(1.0, y))
+        self.w = max(0.0, min(1.0 - self.x, w))
+        self.h = max(0.0, min(1.0 - self.y, h))
+
+    @classmethod
+    def parse(cls, text):
+        x, y, w, h = (float(v) for v in text.split(","))
+        return cls(x, y, w, h)
+
+    @property
+    def full(self):
+        return self.x == 0.0 and self.y == 0.0 and self.w == 1.0 and self.h == 1.0
+
+    def to_pixels(self, width, height):
+        """(left, top, right, bottom) 픽셀 좌표 - 짝수로 맞춤 (NV12 크롭 조건)"""
+        left = int(self.x * width) & ~1
+        top = int(self.y * height) & ~1
+        right = min(width, (int(round((self.x + self.w) * width)) + 1) & ~1)
+        bottom = min(height, (int(round((self.y + self.h) * height)) + 1) & ~1)
+        return left, top, right, bottom
+
+    def as_dict(self):
+        return {"x": round(self.x, 4), "y": round(self.y, 4), "w": round(self.w, 4), "h": round(self.h, 4)}
+
+    def __repr__(self):
+        return f"Roi(x={self.x:.3f}, y={self.y:.3f}, w={self.w:.3f}, h={self.h:.3f})"
+
+
+def load_roi(path=None):
+    """CAMERA_ROI → 보정 파일 → 전체 프레임 순으로 관심 영역 결정"""
+    text = os.environ.get("CAMERA_ROI")
+    if text:
+        return Roi.parse(text)
+    path = path or os.environ.get("CAMERA_ROI_FILE", DEFAULT_ROI_FILE)
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        return Roi(data["x"], data["y"], data["w"], data["h"])
+    except (OSError, ValueError, KeyError):
+        return Roi()
+
+
+def save_roi(roi, path=DEFAULT_ROI_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(roi.as_dict(), f)
+    os.replace(tmp, path)
+
+
+def calibrate_roi(frames, threshold=30, min_fraction=0.005, margin=0.15):
+    """투입 구간을 찍은 전체 프레임들로 관심 영역 자동 보정
+
+    프레임들의 중앙값을 빈 슈트 배경으로 보고, 각 프레임에서 배경과 다른 픽셀(=물체)을 모아
+    그 범위를 margin 만큼 넓혀 정사각형에 가깝게 만든다. 물체가 보이지 않으면 전체 프레임.
+    """
+    stack = np.stack([f.astype(np.int16) for f in frames])
+    background = np.median(stack, axis=0)
+    height, width = stack.shape[1:3]
+    mask = np.zeros((height, width), dtype=bool)
+    for frame in stack:
+        diff = np.abs(frame - background).max(axis=2) > threshold
+        if diff.mean() >= min_fraction:  # 노이즈만 있는 프레임 제외
+            mask |= diff
+    if not mask.any():
+        return Roi()
+
+    ys, xs = np.nonzero(mask)
+    x0, x1 = np.percentile(xs, [1, 99])
+    y0, y1 = np.percentile(ys, [1, 99])
+    side = max(x1 - x0, y1 - y0) * (1 + 2 * margin)  # 모델 입력이 정사각형이라 패딩을 줄임
+    cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+    w, h = min(side, width), min(side, height)
+    x = min(max(cx - w / 2, 0), width - w)
+    y = min(max(cy - h / 2, 0), height - h)
+    return Roi(x / width, y / height, w / width, h / height)
+
+
+def output_size(roi, frame_width=640, frame_height=480, target=320):
+    """ROI 를 긴 변 target 으로 축소한 출력 크기 (짝수)
+
+    비율은 기존 640x480 프레임(학습 이미지와 같은 기하) 기준 - 모델이 보던 가로세로 비율 유지.
+    """
+    w, h = roi.w * frame_width, roi.h * frame_height
+    scale = target / max(w, h)
+    return max(2, int(round(w * scale)) & ~1), max(2, int(round(h * scale)) & ~1)
+
+
+def frame_shape(roi=None, target=320, display_width=640, display_height=480):
+    """카메라 파이프라인이 내보내는 프레임 모양 (높이, 너비, 3) - 공유 메모리 슬롯 크기"""
+    roi = roi or Roi()
+    if roi.full:
+        return display_height, display_width, 3
+    width, height = output_size(roi, display_width, display_height, target)
+    return height, width, 3
+
+
+def gstreamer_pipeline(roi=None, capture_width=1280, capture_height=720, target=320,
+                       display_width=640, display_height=480, framerate=30, flip_method=0):
+    """CSI 카메라 파이프라인 - nvvidconv(GPU/VIC)에서 ROI 자르기 + 모델 입력 크기로 축소
+
+    ROI 가 없으면 기존과 같은 display 크기 전체 프레임.
+    CPU 의 videoconvert 는 이미 작아진 프레임의 BGRx→BGR 변환만 한다.
+    """
+    roi = roi or Roi()
+    if roi.full:
+        crop, (out_w, out_h) = "", (display_width, display_height)
+    else:
+        left, top, right, bottom = roi.to_pixels(capture_width, capture_height)
+        crop = f"left={left} top={top} right={right} bottom={bottom} "
+        out_w, out_h = output_size(roi, display_width, display_height, target)
+    return (
+        f"nvarguscamerasrc ! video/x-raw(memory:NVMM), width={capture_width}, height={capture_height}, "
+        f"format=(string)NV12, framerate={framerate}/1 ! "
+        f"nvvidconv flip-method={flip_method} {crop}! "
+        f"video/x-raw, width={out_w}, height={out_h}, format=(string)BGRx ! "
+        f"videoconvert ! video/x-raw, format=(string)BGR ! appsink drop=true max-buffers=2"
+    )
+
+
+class FramePreprocessor:
+    """GStreamer 에서 자를 수 없는 경우(USB 카메라 등) 파이썬에서 ROI 자르기 + 축소
+
+    자르기는 복사 없는 슬라이스, 축소는 cv2.resize 1회. 입력은 640x480 기준 프레임.
+    """
+
+    def __init__(self, roi, target=320):
+        self.roi = roi
+        self.target = target
+        self.shape = None
+        self.box = None
+        self.size = None
+
+    def __call__(self, frame):
+        import cv2
+        if frame.shape[:2] != self.shape:
+            self.shape = frame.shape[:2]
+            height, width = self.shape
+            self.box = self.roi.to_pixels(width, height)
+            self.size = output_size(self.roi, width, height, self.target)
+        left, top, right, bottom = self.box
+        view = frame[top:bottom, left:right]
+        return cv2.resize(view, self.size, interpolation=cv2.INTER_LINEAR)
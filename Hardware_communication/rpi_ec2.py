@@ -1,7 +1,16 @@
-import socket
 import RPi.GPIO as GPIO
+import os
 import time
-import requests
+import logging
+from http_client import ApiClient
+from event_journal import EventJournal, JournalSyncer
+from pi_server import PiCommandServer
+from stepper_motion import StepperMotor, create_stepper_backend
+from ultrasonic import EchoTimer, UltrasonicRanger, LevelFilter
+from servo_motion import ServoController, BinCalibration, CENTER_ANGLE
+from device_logging import setup_logging, cycle_logger
+
+log = logging.getLogger("pi")
 
 # ------------------ 핀 설정 ------------------
 PUL_PIN = 18
@@ -11,13 +20,35 @@ SERVO_PIN = 19    # 서보모터 PWM
 TRIG = 16         # 초음파 센서 트리거
 ECHO = 20         # 초음파 센서 에코
 
+BIN_CLASSES = ("general trash", "plastic", "metal", "glass")
+
 FULL_ROTATION_STEPS = 6400
 STEPS_FOR_90 = FULL_ROTATION_STEPS // 4
 STEPS_FOR_180 = FULL_ROTATION_STEPS // 2
 STEPS_FOR_270 = FULL_ROTATION_STEPS * 3 // 4
-PULSE_DELAY = 0.00005
 
-UI_ENDPOINT = "http://EC2_IP:3001/update"
+# 스텝 모터: pigpio DMA 파형 (없으면 software 백엔드), 사다리꼴 가감속
+stepper = None
+
+# 초음파 측정: 3발 이상 일치하면 조기 종료, 흔들리면 최대 9발
+echo_timer = None
+ranger = None
+level_filter = LevelFilter(alpha=0.5, jump_cm=3.0)  # 통별 평활화
+
+# 서보: 시간 프로파일로 움직이는 비차단 컨트롤러 (각도별 도달 이벤트)
+servo = None
+# 통별 보정값 (여는 각도, 대기 시간, 측정 시작 각도, 빈 통/꽉 찬 통 거리)
+calibration = BinCalibration(os.environ.get("BIN_CALIBRATION_PATH", "bin_calibration.json"))
+drop_stats = {"drops": 0, "total_s": 0.0}
+
+# EC2 주소 (keep-alive 세션 공유, 엔드포인트별 타임아웃: (연결, 읽기) 초)
+EC2_BASE_URL = os.environ.get("EC2_BASE_URL", "http://EC2_IP:3001")
+api = ApiClient(EC2_BASE_URL, timeouts={"/update": (2, 3), "/events/batch": (2, 5)})
+
+# EC2 로 보낼 채움도는 먼저 로컬 저널(SQLite)에 기록 → 전송 스레드가 묶어서 gzip 전송
+# (서버 장애나 재부팅 중에도 유실 없이 복구 후 순서대로 전송)
+journal = EventJournal(os.environ.get("EVENT_JOURNAL_PATH", "events.db"), device_id="pi")
+syncer = JournalSyncer(journal, api)
 
 def setup():
     GPIO.setmode(GPIO.BCM)
@@ -25,175 +56,185 @@ def setup():
     GPIO.setup(DIR_PIN, GPIO.OUT)
     GPIO.setup(ENA_PIN, GPIO.OUT)
     GPIO.output(ENA_PIN, GPIO.LOW)
+    global stepper
+    stepper = StepperMotor(create_stepper_backend(GPIO, PUL_PIN, DIR_PIN), max_rate=10000, accel=50000)
     GPIO.setup(SERVO_PIN, GPIO.OUT)
-    global pwm
+    global pwm, servo
     pwm = GPIO.PWM(SERVO_PIN, 50)
     pwm.start(0)
+    servo = ServoController(pwm)
+    servo.start()
+    servo.move(CENTER_ANGLE).wait(2.0)  # 시작 위치 맞춤
 
     GPIO.setup(TRIG, GPIO.OUT)
     GPIO.setup(ECHO, GPIO.IN)
 
-def move_steps(steps, direction):
-    GPIO.output(DIR_PIN, GPIO.LOW if direction == 'forward' else GPIO.HIGH)
-    for _ in range(steps):
-        GPIO.output(PUL_PIN, GPIO.HIGH)
-        time.sleep(PULSE_DELAY)
-        GPIO.output(PUL_PIN, GPIO.LOW)
-        time.sleep(PULSE_DELAY)
-
-def set_angle(angle):
-    min_duty = 2.5 # 0도 위치
-    max_duty = 12.5 # 180도 위치
-    
-    # 선형 보간으로 듀티 사이클 계산
-    duty = min_duty + (angle / 180.0) * (max_duty - min_duty)
-    
-    pwm.ChangeDutyCycle(duty)
-    time.sleep(1)  # 서보모터 이동 대기
-    pwm.ChangeDutyCycle(0)  # PWM 신호 중지
-    
-def servo_sequence():
-    # 쓰레기 투입 시퀀스
-    # 중앙(90도) → 투입 허용(180도) → 중앙 복귀(90도)
-    
-    print("+90도 (180도) 회전")
-    set_angle(180)
-    time.sleep(1.0)
+    # ECHO 에지 인터럽트로 펄스 폭 측정 (스핀 루프 대신)
+    global echo_timer, ranger
+    echo_timer = EchoTimer(GPIO, TRIG, ECHO)
+    echo_timer.start()
+    ranger = UltrasonicRanger(echo_timer.ping, min_samples=3, max_samples=9, agree_cm=1.0)
 
-    print("중앙 (90도) 복귀")
-    set_angle(90)
-    time.sleep(1.0)
-    
-    #  서보모터 완전 복귀 후 추가 안정화 시간
-    print("서보모터 안정화 대기...")
-    time.sleep(0.5)
+def move_steps(steps, direction):
+    """가감속 프로파일로 이동 후 결과(계획/실제 소요 시간) 반환"""
+    result = stepper.move(steps, direction)
+    log.debug("[스텝] %s", result)
+    return result
+
+def drop_and_measure(class_name):
+    """쓰레기 투입 + 측정 - (거리, 채움도, 단계별 시간)
+
+    중앙(90도) → 투입 허용(open_angle) → hold_s 대기 → 중앙 복귀.
+    복귀 중 덮개가 clear_angle 을 지나 초음파 경로에서 벗어나면 바로 측정 (나머지 복귀와 겹침).
+    """
+    cal = calibration.get(class_name)
+    timing = {}
+    t0 = time.time()
+
+    log.debug("[서보] %s도 열기", cal["open_angle"])
+    opening = servo.move(cal["open_angle"])
+    opening.wait(opening.expected_duration + 1.0)
+    timing["open"] = time.time() - t0
+
+    time.sleep(cal["hold_s"])  # 물체가 떨어질 시간
+    timing["hold"] = cal["hold_s"]
+
+    log.debug("[서보] 중앙 복귀 - %s도 통과 시 측정 시작", cal["clear_angle"])
+    t1 = time.time()
+    closing = servo.move(CENTER_ANGLE)
+    closing.passed(cal["clear_angle"]).wait(closing.expected_duration + 1.0)
+    timing["to_clear"] = time.time() - t1
+
+    t2 = time.time()
+    dist, level = measure_level(class_name)
+    timing["measure"] = time.time() - t2
+
+    closing.wait(closing.expected_duration + 1.0)
+    timing["return"] = time.time() - t1
+    timing["total"] = time.time() - t0
+    return dist, level, {k: round(v, 3) for k, v in timing.items()}
 
 def measure_distance():
-    #  측정 전 트리거 핀 안정화
-    GPIO.output(TRIG, False)
-    time.sleep(0.1) 
-    
-    GPIO.output(TRIG, True)
-    time.sleep(0.00001)
-    GPIO.output(TRIG, False)
-
-    timeout = time.time() + 0.04
-    pulse_start = None
-    pulse_end = None
-
-    while GPIO.input(ECHO) == 0:
-        pulse_start = time.time()
-        if time.time() > timeout:
-            return -1
-
-    timeout = time.time() + 0.04
-    while GPIO.input(ECHO) == 1:
-        pulse_end = time.time()
-        if time.time() > timeout:
-            return -1
+    """다중 샘플 측정 - 이상치 제거 후 중앙값 (실패 시 -1)"""
+    return ranger.measure()
 
-    if pulse_start is None or pulse_end is None:
-        return -1
-
-    pulse_duration = pulse_end - pulse_start
-    distance = pulse_duration * 17150
-    return round(distance, 2)
-
-def convert_distance_to_percentage(dist):
+def convert_distance_to_percentage(dist, empty_cm=28.0, full_cm=5.0):
     if dist == -1:
         return -1  # 측정 실패
-    elif dist >= 28.0:  #  28cm 이상 빈 통
+    elif dist >= empty_cm:  # 기본 28cm 이상 빈 통
         return 0
-    elif dist <= 5:
+    elif dist <= full_cm:
         return 100
     else:
-        # 28cm(빈통) ~ 5cm(꽉참) 사이의 선형 변환
-        percentage = int(100 - ((dist - 5) / (28 - 5)) * 100)
+        # empty_cm(빈통) ~ full_cm(꽉참) 사이의 선형 변환 (통별 보정값)
+        percentage = int(100 - ((dist - full_cm) / (empty_cm - full_cm)) * 100)
         return max(0, min(100, percentage))  # 0~100% 범위 보장
 
 def send_level_to_ui(class_name, level):
-    try:
-        data = {"class": class_name, "level": level}
-        res = requests.post(UI_ENDPOINT, json=data)
-        print(f"📡 UI 전송 완료: {res.status_code} {data}")
-    except Exception as e:
-        print(f"❌ UI 전송 실패: {e}")
+    """채움도를 이벤트 저널에 기록 (EC2 전송은 syncer 스레드가 묶어서 처리)"""
+    data = {"class": class_name, "level": level}
+    event_id = journal.append("level", data)
+    log.debug("UI 전송 예약: %s %s", event_id, data)
+
+def measure_level(class_name):
+    """초음파 측정 후 (거리, 채움도) 반환 - 실패 시 채움도 -1"""
+    clog = cycle_logger(log, bin=class_name, phase="measure")
+    t0 = time.time()
+    m = measure_distance()
+    duration = round(time.time() - t0, 3)
+    
+    if m.ok:
+        cal = calibration.get(class_name)
+        dist = level_filter.update(class_name, m.distance)
+        level = convert_distance_to_percentage(dist, cal["empty_cm"], cal["full_cm"])
+        clog.info(f"[초음파] {m} → 평활 거리: {dist}cm → 채움도: {level}%", extra={"duration": duration})
+    else:
+        dist = -1
+        level = -1
+        clog.warning(f"[초음파] 측정 실패 ({m})", extra={"duration": duration})
+    return dist, level
+
+def calibrate_bin(bin_name):
+    """빈 통을 센서 아래에 둔 상태에서 거리 측정 → 해당 통의 empty_cm 로 저장"""
+    m = measure_distance()
+    if not m.ok:
+        raise RuntimeError(f"측정 실패 ({m})")
+    cal = calibration.update(bin_name, empty_cm=m.distance)
+    level_filter.reset(bin_name)
+    log.info(f"[보정] {bin_name} 빈 통 거리 {m.distance}cm 저장: {cal}")
+    return {"class": bin_name, "level": 0, "distance": m.distance, "calibration": cal}
 
 def handle_class(class_name):
+    """명령 처리 후 측정 결과 반환 (젯슨은 아두이노 회전 완료 후에만 명령을 보냄)"""
+    if class_name.startswith("calibrate:"):
+        # 모드 0: 빈 통 거리 보정
+        bin_name = class_name.split(":", 1)[1]
+        if bin_name not in BIN_CLASSES:
+            raise ValueError(f"unknown class: {bin_name}")
+        return calibrate_bin(bin_name)
+
     if class_name.startswith("check:"):
         # 모드 1: 비움 확인 (측정만)
         check_class = class_name.split(":", 1)[1]
-        print(f"[비움확인 요청 수신: {check_class}]")
-        
-        # 비움 확인 시 안정화 대기
-        print("아두이노 회전 완료 대기")
-        time.sleep(0.3)
-        
-        #  빠른 처리를 위해 1회 측정으로 변경
-        print(f"[📏 측정] {check_class} 초음파 측정...")
-        dist = measure_distance()
+        if check_class not in BIN_CLASSES:
+            raise ValueError(f"unknown class: {check_class}")
+        log.info(f"[비움확인 요청 수신: {check_class}]")
         
-        if dist != -1:
-            level = convert_distance_to_percentage(dist)
-            print(f"[초음파] {check_class} - 거리: {dist}cm → 채움도: {level}%")
-        else:
-            level = -1
-            print(f"[초음파] {check_class} - 측정 실패")
-            
-        send_level_to_ui(check_class, level)
-        return
+        log.debug("[측정] %s 초음파 측정...", check_class)
+        dist, level = measure_level(check_class)
+        return {"class": check_class, "level": level, "distance": dist}
     
     # 모드 2: 일반 분류 (투입 + 측정)
-    print(f"[📥 Pi 동작 시작: {class_name}]")
+    if class_name not in BIN_CLASSES:
+        raise ValueError(f"unknown command: {class_name}")
+    log.info(f"[Pi 동작 시작: {class_name}]")
     
-    # 아두이노 회전 완료 대기
-    print("아두이노 회전 완료 대기")
-    time.sleep(0.5)
-    
-    # 서보모터로 쓰레기 투입
-    print(f"[서보모터] {class_name} 쓰레기 투입")
-    servo_sequence()
-
-    # 1회 측정으로 변경
-    print(f"[측정] {class_name} 쓰레기통 측정")
-    dist = measure_distance()
-    
-    if dist != -1:
-        level = convert_distance_to_percentage(dist)
-        print(f"[초음파] {class_name} - 거리: {dist}cm → 채움도: {level}%")
-    else:
-        level = -1
-        print(f"[초음파] {class_name} - 측정 실패")
-    
-    send_level_to_ui(class_name, level)
+    # 서보모터로 쓰레기 투입, 복귀하는 동안 측정
+    dist, level, timing = drop_and_measure(class_name)
+    drop_stats["drops"] += 1
+    drop_stats["total_s"] += timing["total"]
+    cycle_logger(log, bin=class_name, phase="drop").info(
+        f"[투입] 총 {timing['total']:.2f}s (열기 {timing['open']:.2f}s, 대기 {timing['hold']:.2f}s, "
+        f"측정 시작까지 {timing['to_clear']:.2f}s, 측정 {timing['measure']:.2f}s, 복귀 {timing['return']:.2f}s)",
+        extra={"duration": timing["total"]})
+    return {"class": class_name, "level": level, "distance": dist, "timing": timing}
+
+def report_result(result):
+    send_level_to_ui(result["class"], result["level"])
 
 def start_server():
+    setup_logging("pi")
     setup()
-    HOST = ''
-    PORT = 9999
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.bind((HOST, PORT))
-        s.listen()
-        print(" 모터 제어 서버 대기 중...")
-        print(" 라즈베리파이는 고정 위치에서 대기 (젯슨이 회전)")
-        print(" 초음파 측정 1회로 최적화 (속도 향상)")
-
-        try:
-            while True:
-                conn, addr = s.accept()
-                with conn:
-                    print(f" 연결됨: {addr}")
-                    class_name = conn.recv(1024).decode().strip()
-                    print(f" 수신된 분류: {class_name}")
-                    handle_class(class_name)
-
-        except KeyboardInterrupt:
-            pass
-        finally:
-            GPIO.output(ENA_PIN, GPIO.HIGH)
-            pwm.stop()
-            GPIO.cleanup()
-            print(" 서버 종료 및 GPIO 정리 완료")
+    syncer.start()
+    # 연결마다 스레드, 서보/센서 동작은 단일 하드웨어 큐 (대기 4건 초과 시 busy 응답)
+    # status 응답에 이벤트 전송 상태(미전송 건수, 지연)도 포함
+    server = PiCommandServer(handle_class, host='', port=9999, max_queue=4, report=report_result,
+                             extra_status=lambda: {"journal": syncer.stats()})
+    log.info("모터 제어 서버 대기 중...")
+    log.info("라즈베리파이는 고정 위치에서 대기 (젯슨이 회전)")
+    log.info("측정 결과는 같은 소켓으로 젯슨에 즉시 응답, status/health 는 동작 중에도 바로 응답")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        echo_timer.stop()
+        servo.stop()
+        stepper.backend.close()
+        GPIO.output(ENA_PIN, GPIO.HIGH)
+        pwm.stop()
+        GPIO.cleanup()
+        log.info(f"명령 처리 통계: {server.status()}")
+        if drop_stats["drops"]:
+            log.info(f"투입 {drop_stats['drops']}회, 회당 평균 "
+                     f"{drop_stats['total_s'] / drop_stats['drops']:.2f}초 (서보 {servo.stats()})")
+        syncer.stop()
+        log.info(f"이벤트 전송 통계: {syncer.stats()}")
+        journal.close()
+        log.info(f"EC2 통신 통계: {api.stats()}")
+        api.close()
+        log.info("서버 종료 및 GPIO 정리 완료")
 
 if __name__ == "__main__":
     start_server()
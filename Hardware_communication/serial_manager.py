@@ -0,0 +1,250 @@
+import logging
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+import serial
+
+import arduino_protocol
+
+log = logging.getLogger(__name__)
+
+
+class ArduinoError(Exception):
+    """아두이노가 ERR 로 응답한 경우"""
+
+
+class _Command:
+    def __init__(self, seq, message, timeout):
+        self.seq = seq
+        self.message = message
+        self.future = Future()
+        self.submitted_at = time.time()
+        self.deadline = self.submitted_at + timeout
+        self.sent_at = None
+        self.started_at = None
+
+
+class SerialManager:
+    """아두이노 시리얼 포트를 단일 스레드가 소유 - 명령 큐 + seq 기반 응답 분배 + 자동 재연결
+
+    아두이노는 명령을 하나씩 처리하므로 한 번에 하나의 명령만 전송하고
+    DONE/ERR 을 받은 뒤 다음 명령을 보낸다.
+    """
+
+    def __init__(self, port, baud=9600, command_timeout=10.0, ready_timeout=5.0,
+                 reconnect_interval=2.0, read_timeout=0.05):
+        self.port = port
+        self.baud = baud
+        self.command_timeout = command_timeout
+        self.ready_timeout = ready_timeout
+        self.reconnect_interval = reconnect_interval
+        self.read_timeout = read_timeout
+
+        self.ser = None
+        self.pending = deque()
+        self.inflight = None
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.running = False
+        self.thread = None
+        self.connected_event = threading.Event()
+
+        self.connects = 0
+        self.completed = 0
+        self.failed = 0
+        self.last_error = None
+
+    @property
+    def connected(self):
+        return self.connected_event.is_set()
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="arduino-serial", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2)
+        self._close(ConnectionError("시리얼 매니저 종료"))
+        with self.lock:
+            while self.pending:
+                self.pending.popleft().future.set_exception(ConnectionError("시리얼 매니저 종료"))
+
+    def wait_connected(self, timeout):
+        return self.connected_event.wait(timeout)
+
+    def submit(self, message, timeout=None):
+        """명령을 큐에 넣고 Future 반환 - 결과는 단계별 소요 시간(dict)"""
+        with self.lock:
+            self.seq = arduino_protocol.next_seq(self.seq)
+            cmd = _Command(self.seq, message, timeout or self.command_timeout)
+            self.pending.append(cmd)
+
+        # 유휴 상태면 readline 대기를 끊어 바로 전송되게 함
+        ser = self.ser
+        if ser is not None and self.inflight is None and hasattr(ser, "cancel_read"):
+            try:
+                ser.cancel_read()
+            except Exception:
+                pass
+        return cmd.future
+
+    def send(self, message, timeout=None):
+        """명령 전송 후 완료까지 대기 - 실패 시 예외"""
+        timeout = timeout or self.command_timeout
+        return self.submit(message, timeout).result(timeout + 1.0)
+
+    def stats(self):
+        with self.lock:
+            queued = len(self.pending)
+        return {
+            "connected": self.connected,
+            "queued": queued,
+            "inflight": self.inflight.message if self.inflight else None,
+            "completed": self.completed,
+            "failed": self.failed,
+            "reconnects": max(0, self.connects - 1),
+            "last_error": self.last_error,
+        }
+
+    # ------------------ 시리얼 스레드 ------------------
+    def _run(self):
+        while self.running:
+            if self.ser is None:
+                if not self._connect():
+                    self._expire_pending()
+                    time.sleep(self.reconnect_interval)
+                continue
+            try:
+                self._pump()
+            except (serial.SerialException, OSError) as e:
+                log.warning(f"아두이노 연결 끊김: {e}")
+                self._close(ConnectionError(f"아두이노 연결 끊김: {e}"))
+
+    def _connect(self):
+        try:
+            ser = serial.Serial(self.port, self.baud, timeout=self.read_timeout)
+        except (serial.SerialException, OSError) as e:
+            self.last_error = str(e)
+            return False
+
+        # 포트 오픈 시 아두이노가 리셋되므로 READY 신호를 기다림 (요청 경로와 무관)
+        t0 = time.time()
+        ready = False
+        while time.time() - t0 < self.ready_timeout:
+            try:
+                line = ser.readline().decode("utf-8", errors="ignore")
+            except (serial.SerialException, OSError) as e:
+                self.last_error = str(e)
+                ser.close()
+                return False
+            reply = arduino_protocol.parse_reply(line)
+            if reply and reply.event == arduino_protocol.READY:
+                ready = True
+                break
+        self.ser = ser
+        self.connects += 1
+        self.connected_event.set()
+        log.info(f"아두이노 {'재연결' if self.connects > 1 else '연결'} 성공: {self.port} "
+                 f"({'READY' if ready else 'READY 미수신'}, {time.time() - t0:.2f}초)")
+        return True
+
+    def _close(self, error):
+        self.connected_event.clear()
+        if self.inflight:
+            self._fail(self.inflight, error)
+            self.inflight = None
+        if self.ser:
+            try:
+                self.ser.close()
+            except Exception:
+                pass
+            self.ser = None
+
+    def _pump(self):
+        if self.inflight is None:
+            cmd = self._next_pending()
+            if cmd:
+                cmd.sent_at = time.time()
+                # 쓰기 전에 inflight 로 잡아 둬야 쓰기 실패 시 _close 가 Future 를 실패 처리함
+                self.inflight = cmd
+                try:
+                    self.ser.write(arduino_protocol.format_command(cmd.seq, cmd.message))
+                except (serial.SerialException, OSError):
+                    raise
+                except Exception as e:
+                    self.inflight = None
+                    self._fail(cmd, e)
+                    return
+
+        line = self.ser.readline().decode("utf-8", errors="ignore")
+        if line:
+            self._dispatch(arduino_protocol.parse_reply(line))
+
+        cmd = self.inflight
+        if cmd and time.time() > cmd.deadline:
+            self.inflight = None
+            self._fail(cmd, TimeoutError(f"아두이노 응답 시간 초과: [{cmd.seq}] '{cmd.message}'"))
+
+    def _dispatch(self, reply):
+        if reply is None:
+            return
+        if reply.event == arduino_protocol.READY:
+            # 동작 중 리셋 → 진행 중 명령은 실패 처리
+            if self.inflight:
+                cmd, self.inflight = self.inflight, None
+                self._fail(cmd, ConnectionError("아두이노 리셋 감지"))
+            return
+
+        cmd = self.inflight
+        if cmd is None or reply.seq != cmd.seq:
+            return  # 이미 시간 초과된 명령의 늦은 응답 등
+
+        if reply.event == arduino_protocol.STARTED:
+            cmd.started_at = time.time()
+        elif reply.event == arduino_protocol.DONE:
+            done_at = time.time()
+            started = cmd.started_at or done_at
+            self.inflight = None
+            self.completed += 1
+            cmd.future.set_result({
+                "queue": cmd.sent_at - cmd.submitted_at,
+                "ack": started - cmd.sent_at,
+                "motion": done_at - started,
+                "total": done_at - cmd.submitted_at,
+            })
+        elif reply.event == arduino_protocol.ERR:
+            self.inflight = None
+            self._fail(cmd, ArduinoError(reply.detail or "unknown error"))
+
+    def _next_pending(self):
+        now = time.time()
+        with self.lock:
+            while self.pending:
+                cmd = self.pending.popleft()
+                if now <= cmd.deadline:
+                    return cmd
+                self._fail(cmd, TimeoutError(f"아두이노 대기열 시간 초과: '{cmd.message}'"))
+        return None
+
+    def _expire_pending(self):
+        now = time.time()
+        with self.lock:
+            alive = deque()
+            while self.pending:
+                cmd = self.pending.popleft()
+                if now > cmd.deadline:
+                    self._fail(cmd, ConnectionError(f"아두이노 미연결: '{cmd.message}'"))
+                else:
+                    alive.append(cmd)
+            self.pending = alive
+
+    def _fail(self, cmd, error):
+        self.failed += 1
+        self.last_error = str(error)
+        if not cmd.future.done():
+            cmd.future.set_exception(error)
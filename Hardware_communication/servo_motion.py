@@ -0,0 +1,270 @@
+import os
+import json
+import math
+import time
+import queue
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+CENTER_ANGLE = 90  # 덮개 닫힘 (중앙)
+OPEN_ANGLE = 180   # 투입 허용
+
+# 통별 보정값 기본 (BIN_CALIBRATION_PATH 의 JSON 으로 통마다 덮어씀)
+#   open_angle  : 투입 시 여는 각도
+#   hold_s      : 열린 채로 물체가 떨어지길 기다리는 시간
+#   clear_angle : 복귀 중 이 각도 아래로 내려오면 덮개가 초음파 경로에서 벗어남 → 측정 시작
+#   empty_cm / full_cm : 빈 통 / 꽉 찬 통일 때 센서 거리 (채움도 0% / 100%)
+DEFAULT_CALIBRATION = {
+    "open_angle": OPEN_ANGLE,
+    "hold_s": 0.6,
+    "clear_angle": 120,
+    "empty_cm": 28.0,
+    "full_cm": 5.0,
+}
+
+
+def duty_for(angle, min_duty=2.5, max_duty=12.5):
+    """각도 → 50Hz PWM 듀티 (0도 2.5%, 180도 12.5% 선형)"""
+    return min_duty + (angle / 180.0) * (max_duty - min_duty)
+
+
+class ServoProfile:
+    """start → end 사다리꼴 속도 프로파일 (짧은 이동은 삼각형) - 시각별 명령 각도"""
+
+    def __init__(self, start, end, max_speed=300.0, accel=3000.0):
+        self.start = start
+        self.end = end
+        self.distance = abs(end - start)
+        self.sign = 1 if end >= start else -1
+        self.accel = accel
+        t_acc = max_speed / accel
+        if accel * t_acc ** 2 >= self.distance:
+            t_acc = math.sqrt(self.distance / accel)
+        self.t_acc = t_acc
+        self.speed = accel * t_acc
+        self.t_flat = (self.distance - accel * t_acc ** 2) / self.speed if self.speed else 0.0
+        self.duration = 2 * t_acc + self.t_flat
+
+    def travelled(self, t):
+        if t <= 0:
+            return 0.0
+        if t >= self.duration:
+            return float(self.distance)
+        if t < self.t_acc:
+            return 0.5 * self.accel * t * t
+        if t < self.t_acc + self.t_flat:
+            return 0.5 * self.accel * self.t_acc ** 2 + self.speed * (t - self.t_acc)
+        remaining = self.duration - t
+        return self.distance - 0.5 * self.accel * remaining * remaining
+
+    def position(self, t):
+        return self.start + self.sign * self.travelled(t)
+
+    def time_at(self, angle):
+        """명령 각도가 angle 을 지나는 시각 (범위 밖이면 0 또는 duration)"""
+        target = (angle - self.start) * self.sign
+        if target <= 0:
+            return 0.0
+        if target >= self.distance:
+            return self.duration
+        lo, hi = 0.0, self.duration
+        for _ in range(30):
+            mid = (lo + hi) / 2
+            if self.travelled(mid) < target:
+                lo = mid
+            else:
+                hi = mid
+        return hi
+
+
+class ServoMotion:
+    """진행 중인 서보 이동 1건 - 각도별 도달 이벤트와 완료 이벤트
+
+    취미용 서보는 위치 피드백이 없으므로 '실제 위치' 는 명령 각도를 lag 만큼 늦춘 값으로 본다
+    (서보 최고 속도보다 느린 프로파일이면 서보가 명령을 따라옴).
+    """
+
+    def __init__(self, profile, lag, settle):
+        self.profile = profile
+        self.lag = lag
+        self.settle = settle
+        self.position = profile.start
+        self.started_at = None
+        self.reached_at = None
+        self.done = threading.Event()
+        self.marks = []  # (각도, 이벤트, 도달 시각 목록)
+        self.lock = threading.Lock()
+
+    @property
+    def expected_duration(self):
+        return self.profile.duration + self.lag + self.settle
+
+    def passed(self, angle):
+        """실제 위치가 angle 을 지나면 set 되는 이벤트"""
+        event = threading.Event()
+        with self.lock:
+            if self._crossed(angle, self.position):
+                event.set()
+            else:
+                self.marks.append((angle, event))
+        return event
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+    def _crossed(self, angle, position):
+        return (position - angle) * self.profile.sign >= 0
+
+    def _update(self, position):
+        with self.lock:
+            self.position = position
+            pending = []
+            for angle, event in self.marks:
+                if self._crossed(angle, position):
+                    event.set()
+                else:
+                    pending.append((angle, event))
+            self.marks = pending
+
+    def _finish(self):
+        self._update(self.profile.end)
+        self.reached_at = time.time()
+        self.done.set()
+
+    def as_dict(self):
+        return {"from": self.profile.start, "to": self.profile.end,
+                "planned_s": round(self.expected_duration, 3),
+                "actual_s": round(self.reached_at - self.started_at, 3) if self.reached_at else None}
+
+
+class ServoController:
+    """PWM 서보를 시간 프로파일로 움직이는 비차단 컨트롤러
+
+    move() 는 바로 ServoMotion 을 돌려주고, 전용 스레드가 PWM 주기(20ms)마다 중간 각도를 보낸다.
+    이동이 끝나면 듀티 0 으로 떨림 방지 (기존 set_angle 과 같음).
+    """
+
+    def __init__(self, pwm, max_speed=300.0, accel=3000.0, lag=0.05, settle=0.1, period=0.02,
+                 angle=CENTER_ANGLE, min_duty=2.5, max_duty=12.5):
+        self.pwm = pwm
+        self.max_speed = max_speed
+        self.accel = accel
+        self.lag = lag
+        self.settle = settle
+        self.period = period
+        self.angle = angle  # 마지막 명령의 목표 각도
+        self.min_duty = min_duty
+        self.max_duty = max_duty
+        self.motions = queue.Queue()
+        self.running = False
+        self.thread = None
+
+        self.moves = 0
+        self.motion_time = 0.0
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="servo", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def profile(self, start, end):
+        return ServoProfile(start, end, self.max_speed, self.accel)
+
+    def move(self, angle):
+        """angle 로 이동 예약 - 앞선 이동이 끝난 뒤 시작, 바로 반환"""
+        motion = ServoMotion(self.profile(self.angle, angle), self.lag, self.settle)
+        self.angle = angle
+        self.motions.put(motion)
+        return motion
+
+    def _run(self):
+        while self.running:
+            try:
+                motion = self.motions.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self._execute(motion)
+
+    def _execute(self, motion):
+        profile = motion.profile
+        motion.started_at = start = time.time()
+        tick = 0
+        while True:
+            t = tick * self.period
+            if t > profile.duration + self.lag:
+                break
+            if t <= profile.duration:
+                self.pwm.ChangeDutyCycle(duty_for(profile.position(t), self.min_duty, self.max_duty))
+            motion._update(profile.position(t - self.lag))
+            tick += 1
+            time.sleep(max(0.0, start + tick * self.period - time.time()))
+        self.pwm.ChangeDutyCycle(duty_for(profile.end, self.min_duty, self.max_duty))
+        time.sleep(max(0.0, start + motion.expected_duration - time.time()))
+        self.pwm.ChangeDutyCycle(0)
+        motion._finish()
+        self.moves += 1
+        self.motion_time += motion.reached_at - motion.started_at
+
+    def stats(self):
+        return {"angle": self.angle, "moves": self.moves, "motion_s": round(self.motion_time, 2)}
+
+
+class BinCalibration:
+    """통별 투입/측정 보정값 - JSON 파일에 통 이름별로 저장 (없는 값은 기본값)"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.bins = {}
+        self.load()
+
+    def get(self, bin_name):
+        return {**DEFAULT_CALIBRATION, **self.bins.get(bin_name, {})}
+
+    def update(self, bin_name, **values):
+        self.bins.setdefault(bin_name, {}).update(values)
+        self.save()
+        return self.get(bin_name)
+
+    def load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path) as f:
+                self.bins = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            log.warning(f"보정 파일 읽기 실패 ({self.path}): {e} - 기본값 사용")
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self.bins, f, indent=2)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            log.warning(f"보정 파일 저장 실패: {e}")
+
+
+def plan_drop(calibration, measure_time=0.1, max_speed=300.0, accel=3000.0, lag=0.05, settle=0.1):
+    """투입 1회의 예상 단계 시간 (초) - 실제 동작 없이 계산 (시뮬레이션 / 비교용)
+
+    열기 → 대기 → 복귀 시작, 복귀 중 clear_angle 을 지나면 측정 시작 → 측정과 복귀 중 늦은 쪽에서 끝
+    """
+    opening = ServoProfile(CENTER_ANGLE, calibration["open_angle"], max_speed, accel)
+    closing = ServoProfile(calibration["open_angle"], CENTER_ANGLE, max_speed, accel)
+    open_s = opening.duration + lag + settle
+    clear_s = closing.time_at(calibration["clear_angle"]) + lag
+    return_s = closing.duration + lag + settle
+    total = open_s + calibration["hold_s"] + max(clear_s + measure_time, return_s)
+    return {"open": round(open_s, 3), "hold": calibration["hold_s"], "to_clear": round(clear_s, 3),
+            "measure": measure_time, "return": round(return_s, 3), "total": round(total, 3)}
@@ -0,0 +1,304 @@
+"""하드웨어 없이 젯슨 오케스트레이션 전체를 실행하는 시뮬레이션 / 부하 테스트
+
+가상 아두이노(스케치 타이밍 재현), 가상 라즈베리파이(채움 곡선), 가짜 카메라,
+로컬 EC2 대체 서버를 띄운 뒤 Flask 엔드포인트(/start 등)에 요청을 보내고
+처리량 / 지연 시간 보고서를 출력한다.
+
+예)
+  python simulate.py --items 20 --interval 2
+  python simulate.py --items 50 --interval 0.5 --time-scale 0.2 --report sim.json
+  python simulate.py --images "image/*.jpg" --backend ultralytics   # 실제 모델로
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+import numpy as np
+
+from simulation import fake_modules
+from simulation.fake_ec2 import FakeEC2
+from simulation.virtual_pi import FillCurve, VirtualPi
+from simulation.fake_camera import FakeCamera, ScriptedBackend
+from inference_engine import VALID_CLASSES
+from device_logging import setup_logging
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    arr = np.array(values)
+    return {"mean": float(arr.mean()), "p50": float(np.percentile(arr, 50)),
+            "p90": float(np.percentile(arr, 90)), "max": float(arr.max())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="젯슨 오케스트레이션 시뮬레이션")
+    parser.add_argument("--items", type=int, default=10, help="투입할 물체 수")
+    parser.add_argument("--interval", type=float, default=2.0, help="/start 요청 간격 (초)")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="가상 장치 시간 배율 (0.1 = 10배 빠르게)")
+    parser.add_argument("--images", default=None, help="재생할 이미지 glob (없으면 합성 프레임)")
+    parser.add_argument("--backend", default="scripted", help="scripted | ultralytics | onnx | tensorrt")
+    parser.add_argument("--infer-ms", type=float, default=25.0, help="scripted 백엔드 추론 지연")
+    parser.add_argument("--per-drop", type=float, default=4.0, help="투입당 채움 증가 (%%)")
+    parser.add_argument("--initial-level", type=float, default=0.0)
+    parser.add_argument("--sensor-fail-rate", type=float, default=0.0)
+    parser.add_argument("--ec2-latency", type=float, default=0.02, help="EC2 응답 지연 (초)")
+    parser.add_argument("--ec2-fail-rate", type=float, default=0.0)
+    parser.add_argument("--ec2-outage", type=float, default=0.0,
+                        help="부하 시작 후 이 시간(초) 동안 EC2 가 모든 요청에 503 (이벤트 저널 복구 확인)")
+    parser.add_argument("--empty-check", action="store_true", help="마지막에 /empty_check_all 실행")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", default=None, help="JSON 보고서 저장 경로")
+    parser.add_argument("--verbose", action="store_true", help="단계별(DEBUG) 로그까지 출력")
+    parser.add_argument("--auto-trigger", action="store_true",
+                        help="/start 대신 카메라 도착 감지로 분류 시작 (물체는 Pi 투입 시 사라짐)")
+    parser.add_argument("--legacy-servo", action="store_true",
+                        help="Pi 서보를 기존 고정 대기(4.5초 후 측정)로 비교")
+    args = parser.parse_args()
+    if args.verbose:
+        os.environ["LOG_VERBOSE"] = "1"  # 카메라/추론 자식 프로세스도 같은 레벨
+    setup_logging("simulate")
+    random.seed(args.seed)
+
+    # 1) 가상 장치 / 서버
+    serial_devices = fake_modules.install(time_scale=args.time_scale).devices
+    ec2 = FakeEC2(latency=args.ec2_latency, fail_rate=args.ec2_fail_rate, seed=args.seed)
+    ec2.start()
+
+    from http_client import ApiClient
+    curves = {name: FillCurve(args.initial_level, args.per_drop, fail_rate=args.sensor_fail_rate, seed=i)
+              for i, name in enumerate(VALID_CLASSES)}
+    pi = VirtualPi(curves=curves, time_scale=args.time_scale, api=ApiClient(ec2.base_url),
+                   servo_time=4.5 if args.legacy_servo else None)
+    pi.start()
+
+    os.environ["EC2_BASE_URL"] = ec2.base_url
+    os.environ["PI_HOST"], pi_port = pi.address
+    os.environ["PI_PORT"] = str(pi_port)
+    os.environ["ARDUINO_PORT"] = "virtual"
+    workdir = tempfile.mkdtemp(prefix="recycle-sim-")
+    os.environ["EVENT_JOURNAL_PATH"] = os.path.join(workdir, "events.db")
+    os.environ["LEVEL_STORE_PATH"] = os.path.join(workdir, "levels.json")
+    os.environ["CAROUSEL_STATE_PATH"] = os.path.join(workdir, "carousel.json")
+    os.environ["IMAGE_DIR"] = os.path.join(workdir, "image")
+
+    # 2) 젯슨 서비스 (가상 모듈 설치 후 import)
+    import jetson_with_arduino as jetson
+
+    jetson.init()
+    jetson.setup_led()
+    jetson.pi.start()
+    jetson.level_sync.start()
+    jetson.uploader.start()
+    jetson.syncer.start()
+    jetson.pipeline.start()
+
+    # 실제 서비스와 같은 시작 순서 - 아두이노/Pi/비전 병렬 초기화, /ready 가 200 이 될 때까지 대기
+    camera = FakeCamera(args.images, draw_items=args.auto_trigger)
+    jetson.AUTO_TRIGGER = args.auto_trigger
+    backend = ScriptedBackend(latency_ms=args.infer_ms) if args.backend == "scripted" else None
+    if backend is None:
+        from inference_backends import create_backend
+        backend = create_backend(args.backend)
+    jetson.startup.components["vision"].init = lambda: jetson.setup_vision(camera_stream=camera, backend=backend)
+    jetson.startup.start()
+
+    client = jetson.app.test_client()
+    first_ready = client.get("/ready").status_code
+    if not jetson.startup.wait_ready(timeout=30):
+        print(f"초기화 실패: {jetson.startup.status()}")
+        sys.exit(1)
+    startup = jetson.startup.status()
+    startup["ready_status_before"] = first_ready
+    startup["ready_status_after"] = client.get("/ready").status_code
+
+    # 완료 기록 (보고 단계 종료 시점)
+    completions = []
+    report_stage = jetson.pipeline.stages[-1]
+    original = report_stage.handler
+
+    def traced(job):
+        result = original(job)
+        completions.append({"id": job.id, "class": job["class_name"], "success": job.get("success"),
+                            "requested_at": job.requested_at, "done_at": time.time(), "stages": dict(job.stage_times)})
+        return result
+
+    report_stage.handler = traced
+
+    # 투입(Pi 서보)이 끝나면 물체가 카메라 화면에서 사라짐
+    send_class_to_pi = jetson.send_class_to_pi
+
+    def dropped(class_name, *a, **kw):
+        reply = send_class_to_pi(class_name, *a, **kw)
+        if not class_name.startswith("check:"):
+            camera.clear()
+        return reply
+
+    jetson.send_class_to_pi = dropped
+
+    # 3) 부하 생성 - Flask 엔드포인트로 /start 요청 (자동 감지 모드는 물체만 올려 둠)
+    expected = {}
+    rejected = 0
+    unlocks = 0
+
+    def empty_bins():
+        """꽉 찬 통 때문에 입구가 잠기면 관리자가 통을 비우고 비움 확인 실행"""
+        for curve in pi.curves.values():
+            curve.empty()
+        res = client.post("/empty_check_all")
+        body = res.get_json()
+        while body.get("state") == "running":
+            time.sleep(0.1)
+            body = client.get(f"/empty_check/{body['job_id']}").get_json()
+        return body.get("status")
+
+    t_begin = time.time()
+    ec2.down_until = t_begin + args.ec2_outage
+    for i in range(args.items):
+        class_index = random.randrange(len(VALID_CLASSES))
+        if args.auto_trigger:
+            deadline = time.time() + 30
+            while camera.item_since is not None and time.time() < deadline:  # 이전 물체가 떨어질 때까지
+                if jetson.is_locked and jetson.pipeline.wait_idle(timeout=30):
+                    # 입구가 잠기면 보류된 도착은 비움 확인 후 처리됨
+                    if empty_bins() == "cleared":
+                        unlocks += 1
+                time.sleep(0.02)
+            if i > 0:
+                time.sleep(args.interval)  # 빈 슈트가 잠깐이라도 보이도록
+            camera.set_item(class_index)
+        else:
+            camera.set_item(class_index)
+            while True:
+                res = client.post("/start")
+                if res.status_code == 200:
+                    break
+                if res.status_code == 503 and b"locked" in res.data:
+                    jetson.pipeline.wait_idle(timeout=30)
+                    if empty_bins() == "cleared":
+                        unlocks += 1
+                    continue
+                rejected += 1
+                time.sleep(0.1)
+        expected[i + 1] = VALID_CLASSES[class_index]
+        if i < args.items - 1 and not args.auto_trigger:
+            time.sleep(args.interval)
+
+    if args.auto_trigger:
+        deadline = time.time() + args.items * 30
+        while len(completions) < args.items and time.time() < deadline:
+            time.sleep(0.05)
+
+    jetson.pipeline.wait_idle(timeout=args.items * 30)
+    t_end = time.time()
+
+    # 저널에 남은 이벤트가 EC2 로 다 전송될 때까지 (장애 후 백오프 재시도 포함)
+    deadline = time.time() + 90
+    while (jetson.journal.backlog() or pi.journal.backlog()) and time.time() < deadline:
+        time.sleep(0.2)
+    synced_after = time.time() - t_end
+
+    empty_check = None
+    if args.empty_check:
+        t0 = time.time()
+        res = client.post("/empty_check_all")
+        body = res.get_json()
+        if res.status_code == 202:
+            while body.get("state") == "running":
+                time.sleep(0.1)
+                body = client.get(f"/empty_check/{body['job_id']}").get_json()
+        empty_check = {"status": res.status_code, "body": body, "elapsed_s": time.time() - t0}
+
+    # 4) 보고서
+    latencies = [c["done_at"] - c["requested_at"] for c in completions]
+    stage_lat = {}
+    for c in completions:
+        for name, (wait, service) in c["stages"].items():
+            stage_lat.setdefault(name, []).append(wait + service)
+    span = (max(c["done_at"] for c in completions) - t_begin) if completions else 0.0
+    # 작업 ID 는 /start 가 받아들여진 순서와 같음 (시뮬레이터만 작업을 만듦)
+    correct = sum(1 for c in completions if expected.get(c["id"]) == c["class"])
+
+    report = {
+        "items": args.items,
+        "completed": len(completions),
+        "rejected_starts": rejected,
+        "unlocks": unlocks,
+        "classification_accuracy": correct / len(completions) if completions else None,
+        "throughput_per_min": len(completions) * 60.0 / span if span else None,
+        "latency_s": percentiles(latencies),
+        "stage_latency_s": {name: percentiles(v) for name, v in stage_lat.items()},
+        "wall_time_s": t_end - t_begin,
+        "startup": startup,
+        "pipeline": jetson.pipeline.stats(),
+        "arduino": jetson.arduino.stats(),
+        "carousel": jetson.carousel.stats(),
+        "arrival": jetson.arrival.stats() if jetson.arrival else None,
+        "motor_time_s": sum(d for device in serial_devices for _, d in device.commands),
+        "pi_channel": jetson.pi.stats(),
+        "levels": jetson.levels.snapshot(),
+        "phases": jetson.metrics.PHASES.summary(),
+        "traces": jetson.metrics.TRACES.latest(limit=args.items + 1),
+        "http": jetson.api.stats(),
+        "upload": jetson.uploader.stats(),
+        "journal": {"jetson": jetson.syncer.stats(), "pi": pi.syncer.stats(), "drain_after_s": synced_after},
+        "inference": jetson.engine.stats(),
+        "virtual_pi": pi.stats(),
+        "fake_ec2": ec2.stats(),
+        "empty_check": empty_check,
+    }
+
+    lat = report["latency_s"]
+    print("\n===== 시뮬레이션 결과 =====")
+    print(f"준비까지 {startup['time_to_ready_s']:.2f}s (/ready {first_ready} → {startup['ready_status_after']}), "
+          + ", ".join(f"{name} {c['init_s']:.2f}s" for name, c in startup["components"].items()))
+    print(f"완료 {report['completed']}/{args.items}건, /start 거부 {rejected}회"
+          + (f", 꽉 찬 통 비움 후 잠금 해제 {unlocks}회" if unlocks else ""))
+    if lat:
+        print(f"처리량 {report['throughput_per_min']:.1f}건/분, 지연 mean {lat['mean']:.2f}s "
+              f"p50 {lat['p50']:.2f}s p90 {lat['p90']:.2f}s max {lat['max']:.2f}s")
+    for name, p in report["stage_latency_s"].items():
+        print(f"  {name:9s} mean {p['mean']:.2f}s p90 {p['p90']:.2f}s")
+    if report["arrival"]:
+        a = report["arrival"]
+        print(f"도착 감지 {a['triggers']}회 / 물체 {args.items}개 (거절 {a['rejected']}회), "
+              f"프레임당 CPU {a['cpu_ms_per_frame']}ms, 코어 사용률 {a['cpu_percent_of_core']}%")
+    carousel = report["carousel"]
+    print(f"회전판 이동 {carousel['moves']}회 (생략 {carousel['skipped_moves']}회), "
+          f"총 {carousel['steps_moved']} 스텝, 모터 동작 {report['motor_time_s']:.2f}s")
+    if report["virtual_pi"]["drop_s_avg"] is not None:
+        print(f"Pi 투입당 {report['virtual_pi']['drop_s_avg']:.2f}s (서보 + 측정, 실제 시간 기준)")
+    for name, j in report["journal"].items():
+        if name == "drain_after_s":
+            continue
+        print(f"이벤트 저널 [{name}] 전송 {j['synced']}건 / 묶음 {j['batches']}회 (중복 {j['duplicates']}), "
+              f"미전송 {j['backlog']}건, 마지막 지연 {j['last_lag_s']}s, gzip {j['bytes_raw']} → {j['bytes_sent']}B")
+    print(f"EC2 반영 채움도 {ec2.stats()['levels']} (부하 종료 후 {synced_after:.2f}s 에 전송 완료)")
+    if report["classification_accuracy"] is not None:
+        print(f"분류 정확도 {report['classification_accuracy'] * 100:.1f}%")
+    if empty_check:
+        print(f"비움 확인: {empty_check['status']} {empty_check['body']} ({empty_check['elapsed_s']:.2f}s)")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+        print(f"보고서 저장: {args.report}")
+
+    jetson.startup.stop()
+    jetson.pipeline.stop()
+    jetson.cleanup_vision()
+    jetson.uploader.stop()
+    jetson.syncer.stop()
+    jetson.arduino.stop()
+    jetson.pi.stop()
+    jetson.level_sync.stop()
+    pi.stop()
+    ec2.stop()
+
+
+if __name__ == "__main__":
+    main()
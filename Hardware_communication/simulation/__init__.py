@@ -0,0 +1,7 @@
+# 하드웨어 없이 젯슨 오케스트레이션 전체를 실행하기 위한 시뮬레이션 계층
+#
+#   fake_modules   : Jetson.GPIO / serial 대체 모듈 설치
+#   virtual_arduino: 스케치 명령을 실제 스텝 타이밍으로 재현하는 가상 아두이노
+#   virtual_pi     : 서보 + 초음파(채움 곡선) 를 흉내 내는 가상 라즈베리파이 서버
+#   fake_camera    : 저장된 이미지를 재생하는 카메라
+#   fake_ec2       : EC2 API 로컬 대체 서버
@@ -0,0 +1,104 @@
+import glob
+import time
+
+import cv2
+import numpy as np
+
+from inference_backends import Detection, InferenceBackend
+from inference_engine import CameraStream, VALID_CLASSES
+
+
+class FakeCamera(CameraStream):
+    """저장된 이미지(또는 합성 프레임)를 fps 에 맞춰 재생하는 카메라
+
+    현재 투입 중인 물체의 클래스 번호를 프레임 (0, 0) 픽셀에 기록해 두어
+    ScriptedBackend 가 정답 클래스를 알 수 있게 한다.
+    draw_items=True 면 물체가 있는 동안 중앙에 사각형을 그려 도착 감지를 흉내 낸다
+    (떨어지는 동안 slide_time 초 움직이다 멈춤, clear() 로 사라짐).
+    """
+
+    def __init__(self, image_glob=None, fps=30, size=(480, 640), buffer_size=8,
+                 draw_items=False, slide_time=0.3):
+        super().__init__(pipeline=None, buffer_size=buffer_size)
+        self.fps = fps
+        self.draw_items = draw_items
+        self.slide_time = slide_time
+        self.item_since = None
+        self.images = []
+        if image_glob:
+            for path in sorted(glob.glob(image_glob)):
+                if path.endswith("_result.jpg"):
+                    continue
+                img = cv2.imread(path)
+                if img is not None:
+                    self.images.append(cv2.resize(img, (size[1], size[0])))
+        if not self.images:
+            self.images = [np.full((size[0], size[1], 3), 90, dtype=np.uint8)]
+        self.index = 0
+        self.item_class = 0
+
+    def set_item(self, class_index):
+        """다음 물체로 교체 - 재생 이미지도 다음 장으로 넘김"""
+        self.item_class = class_index
+        self.index = (self.index + 1) % len(self.images)
+        self.item_since = time.time()
+
+    def clear(self):
+        """물체가 통으로 떨어짐"""
+        self.item_since = None
+
+    def _draw_item(self, frame, since):
+        h, w = frame.shape[:2]
+        progress = min(1.0, (time.time() - since) / self.slide_time) if self.slide_time else 1.0
+        top = int(h * (0.05 + 0.3 * progress))  # 위에서 미끄러져 내려와 멈춤
+        color = (40 + 50 * self.item_class, 200, 255 - 50 * self.item_class)
+        frame[top:top + h // 3, w // 3:2 * w // 3] = color
+
+    def _open(self):
+        self.open_time = 0.0
+
+    def _reader(self):
+        period = 1.0 / self.fps
+        next_at = time.time()
+        while self.running:
+            frame = self.images[self.index].copy()
+            since = self.item_since
+            if self.draw_items and since is not None:
+                self._draw_item(frame, since)
+            frame[0, 0, 0] = self.item_class
+            self._publish(time.time(), frame)
+            next_at += period
+            time.sleep(max(0.0, next_at - time.time()))
+
+
+class ScriptedBackend(InferenceBackend):
+    """프레임에 기록된 정답 클래스를 반환하는 가짜 추론 백엔드 (GPU 없이 부하 테스트용)
+
+    miss_rate 비율의 프레임은 검출 없음으로 처리해 흐린 프레임을 흉내 낸다.
+    """
+
+    name = "scripted"
+
+    def __init__(self, latency_ms=25.0, per_frame_ms=5.0, confidence=0.85, miss_rate=0.1, **kwargs):
+        super().__init__(**kwargs)
+        self.latency_ms = latency_ms
+        self.per_frame_ms = per_frame_ms
+        self.confidence = confidence
+        self.miss_rate = miss_rate
+        self.rng = np.random.default_rng(0)
+
+    def load(self):
+        self.names = dict(enumerate(VALID_CLASSES))
+
+    def predict_batch(self, frames):
+        time.sleep((self.latency_ms + self.per_frame_ms * (len(frames) - 1)) / 1000.0)
+        out = []
+        for frame in frames:
+            if self.rng.random() < self.miss_rate:
+                out.append([])
+                continue
+            cls = int(frame[0, 0, 0]) % len(VALID_CLASSES)
+            h, w = frame.shape[:2]
+            xyxy = np.array([w * 0.3, h * 0.3, w * 0.7, h * 0.7], dtype=np.float32)
+            out.append([Detection(cls, self.names[cls], self.confidence, xyxy)])
+        return out
@@ -0,0 +1,158 @@
+import gzip
+import json
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeEC2:
+    """ec2_server.js 의 장치용 API 만 흉내 내는 로컬 서버 (DB 대신 메모리)"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, fail_rate=0.0, seed=0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.latest = {"plastic": 0, "metal": 0, "glass": 0, "general trash": 0}
+        self.last_update = 0
+        self.updated_at = {}
+        self.reset_at = {}
+        self.begin_time = 0
+        self.requests = {}
+        self.uploads = 0
+        self.down_until = 0  # 이 시각까지 모든 요청에 503 (장애 흉내)
+        self.event_ids = set()
+        self.events = {"accepted": 0, "duplicates": 0, "bytes": 0}
+
+        ec2 = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def log_message(self, *args):
+                pass
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length", 0))
+                data = self.rfile.read(length) if length else b""
+                if data and self.headers.get("Content-Encoding") == "gzip":
+                    ec2.events["bytes"] += len(data)
+                    data = gzip.decompress(data)
+                return data
+
+            def _send(self, status, payload=None):
+                data = json.dumps(payload if payload is not None else {}).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                ec2.handle(self, "GET")
+
+            def do_POST(self):
+                ec2.handle(self, "POST")
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, req, method):
+        path = req.path.split("?", 1)[0]
+        body = req._body() if method == "POST" else b""
+        with self.lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+        if time.time() < self.down_until or (self.fail_rate and self.rng.random() < self.fail_rate):
+            return req._send(503, {"message": "simulated outage"})
+
+        if method == "POST" and path == "/begin":
+            self.begin_time = int(time.time() * 1000)
+            return req._send(200, {"beginTime": self.begin_time})
+        if method == "POST" and path == "/upload":
+            self.uploads += 1
+            return req._send(200, {"message": "업로드 성공"})
+        if method == "POST" and path == "/upload/batch":
+            self.uploads += body.count(b'name="images"')
+            return req._send(200, {"message": "업로드 성공"})
+        if method == "POST" and path == "/update":
+            data = json.loads(body or b"{}")
+            if data.get("class") and isinstance(data.get("level"), (int, float)):
+                self._apply_level(data["class"], data["level"])
+                return req._send(200)
+            return req._send(400)
+        if method == "POST" and path == "/events/batch":
+            return req._send(200, self._apply_events(json.loads(body or b"{}").get("events", [])))
+        if method == "GET" and path == "/data":
+            with self.lock:
+                return req._send(200, {**self.latest, "lastUpdated": self.last_update,
+                                       "updatedAt": dict(self.updated_at),
+                                       "resetAt": dict(self.reset_at),
+                                       "lastBegin": self.begin_time})
+        if method == "POST" and path == "/api/levels/reset":
+            self.reset_levels()
+            return req._send(200, {"success": True})
+        if method == "GET" and path == "/api/levels":
+            with self.lock:
+                return req._send(200, [{"type": k, "level": v} for k, v in self.latest.items()])
+        return req._send(404, {"message": "not found"})
+
+    def _apply_level(self, class_name, level):
+        """받은 순서대로 반영 (장치 시계는 비교하지 않음)"""
+        with self.lock:
+            self.latest[class_name] = level
+            self.last_update = int(time.time() * 1000)
+            self.updated_at[class_name] = self.last_update
+
+    def reset_levels(self):
+        """관리자 초기화 - 모든 통 0%"""
+        with self.lock:
+            now = int(time.time() * 1000)
+            for class_name in self.latest:
+                self.latest[class_name] = 0
+                self.updated_at[class_name] = now
+                self.reset_at[class_name] = now
+            self.last_update = now
+
+    def _apply_events(self, events):
+        """ec2_server.js 의 /events/batch 와 같음 - 이벤트 ID 로 중복 제거"""
+        reply = {"accepted": [], "duplicates": [], "rejected": []}
+        for event in events:
+            event_id, payload = event.get("id"), event.get("payload") or {}
+            with self.lock:
+                duplicate = event_id in self.event_ids
+                self.event_ids.add(event_id)
+            if duplicate:
+                reply["duplicates"].append(event_id)
+            elif event.get("kind") == "level" and payload.get("class") and \
+                    isinstance(payload.get("level"), (int, float)):
+                self._apply_level(payload["class"], payload["level"])
+                reply["accepted"].append(event_id)
+            elif event.get("kind") == "begin":
+                self.begin_time = int(time.time() * 1000)
+                reply["accepted"].append(event_id)
+            else:
+                reply["rejected"].append(event_id)
+        self.events["accepted"] += len(reply["accepted"])
+        self.events["duplicates"] += len(reply["duplicates"])
+        return reply
+
+    def stats(self):
+        return {"requests": dict(self.requests), "uploads": self.uploads, "levels": dict(self.latest),
+                "events": dict(self.events)}
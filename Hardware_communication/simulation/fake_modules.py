@@ -0,0 +1,48 @@
+import sys
+import types
+
+from simulation.virtual_arduino import VirtualArduino
+
+
+def _gpio_module():
+    gpio = types.ModuleType("Jetson.GPIO")
+    gpio.BCM = "BCM"
+    gpio.OUT = "OUT"
+    gpio.IN = "IN"
+    gpio.HIGH = 1
+    gpio.LOW = 0
+    gpio.state = {}
+    gpio.setmode = lambda mode: None
+    gpio.setup = lambda pin, mode: gpio.state.setdefault(pin, 0)
+    gpio.output = lambda pin, value: gpio.state.__setitem__(pin, value)
+    gpio.cleanup = lambda: gpio.state.clear()
+    return gpio
+
+
+def _serial_module(time_scale):
+    serial = types.ModuleType("serial")
+
+    class SerialException(OSError):
+        pass
+
+    serial.SerialException = SerialException
+    serial.devices = []
+
+    def Serial(port, baudrate=9600, timeout=None, **kwargs):
+        device = VirtualArduino(port, baudrate, timeout=timeout, time_scale=time_scale)
+        serial.devices.append(device)
+        return device
+
+    serial.Serial = Serial
+    return serial
+
+
+def install(time_scale=1.0):
+    """젯슨 스크립트를 import 하기 전에 하드웨어 모듈을 가상 모듈로 교체"""
+    jetson = types.ModuleType("Jetson")
+    gpio = _gpio_module()
+    jetson.GPIO = gpio
+    sys.modules["Jetson"] = jetson
+    sys.modules["Jetson.GPIO"] = gpio
+    sys.modules["serial"] = _serial_module(time_scale)
+    return sys.modules["serial"]
@@ -0,0 +1,119 @@
+import time
+import queue
+import threading
+
+# arduino_with_jet.ino 와 같은 값
+PULSE_DELAY_US = 200
+DIR_SETTLE_S = 0.05
+BOOT_TIME_S = 1.6  # 포트 오픈 시 리셋 + 부트로더
+FULL_ROTATION_STEPS = 6400
+
+# 명령 → 회전 스텝 (+ 반시계 / - 시계), 스케치의 loop() 와 동일 ("move:<스텝>" 은 steps_for 에서 처리)
+COMMAND_STEPS = {
+    "ping": 0,
+    "test": 0,
+    "check:general trash": 0,
+    "check:plastic": 1600,
+    "check:metal": 1600,
+    "check:glass": 1600,
+    "empty_check_home": -4800,
+    "plastic": 1600,
+    "metal": 3200,
+    "glass": 4800,
+    "general trash": 0,
+    "return:plastic": -1600,
+    "return:metal": -3200,
+    "return:glass": -4800,
+    "return:general trash": 0,
+    "return_home": -4800,
+    "block_entrance": 1600,
+    "unblock_entrance": -1600,
+}
+
+
+def motion_time(steps):
+    """rotateSteps() 실행 시간 (방향 전환 대기 + 펄스)"""
+    if steps == 0:
+        return 0.0
+    return DIR_SETTLE_S + abs(steps) * 2 * PULSE_DELAY_US / 1e6
+
+
+class VirtualArduino:
+    """serial.Serial 과 같은 인터페이스로 동작하는 가상 아두이노"""
+
+    def __init__(self, port="virtual", baudrate=9600, timeout=None, time_scale=1.0, **kwargs):
+        self.port = port
+        self.timeout = timeout
+        self.time_scale = time_scale
+        self.is_open = True
+        self.position_steps = 0
+        self.commands = []  # (명령, 소요 시간) 기록
+
+        self._rx = b""
+        self._out = queue.Queue()
+        self._cmds = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def in_waiting(self):
+        return self._out.qsize()
+
+    def write(self, data):
+        if not self.is_open:
+            raise OSError("포트 닫힘")
+        self._rx += data
+        while b"\n" in self._rx:
+            line, self._rx = self._rx.split(b"\n", 1)
+            self._cmds.put(line.decode("utf-8").strip().lower())
+        return len(data)
+
+    def readline(self):
+        try:
+            return self._out.get(timeout=self.timeout)
+        except queue.Empty:
+            return b""
+
+    def cancel_read(self):
+        self._out.put(b"")
+
+    def close(self):
+        self.is_open = False
+        self._cmds.put(None)
+
+    def _emit(self, text):
+        self._out.put((text + "\n").encode("utf-8"))
+
+    def _run(self):
+        time.sleep(BOOT_TIME_S * self.time_scale)
+        self._emit("READY")
+        while self.is_open:
+            line = self._cmds.get()
+            if line is None:
+                break
+            if not line:
+                continue
+            seq, cmd = "0", line
+            head, sep, rest = line.partition(":")
+            if sep and head.isdigit():
+                seq, cmd = head, rest
+
+            self._emit(f"{seq}:STARTED")
+            steps = self.steps_for(cmd)
+            if steps is None:
+                self._emit(f"{seq}:ERR:unknown command")
+                continue
+            duration = motion_time(steps)
+            time.sleep(duration * self.time_scale)
+            self.position_steps += steps
+            self.commands.append((cmd, duration))
+            self._emit(f"{seq}:DONE")
+
+    def steps_for(self, cmd):
+        if cmd.startswith("move:"):
+            try:
+                steps = int(cmd[5:])
+            except ValueError:
+                return None
+            return steps if abs(steps) <= FULL_ROTATION_STEPS else None
+        return COMMAND_STEPS.get(cmd)
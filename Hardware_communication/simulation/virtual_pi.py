@@ -0,0 +1,132 @@
+import time
+import random
+
+from event_journal import EventJournal, JournalSyncer
+from pi_server import PiCommandServer
+from servo_motion import DEFAULT_CALIBRATION, plan_drop
+
+EMPTY_DISTANCE = 28.0  # rpi_ec2.convert_distance_to_percentage 기준
+FULL_DISTANCE = 5.0
+
+
+def level_from_distance(dist):
+    if dist == -1:
+        return -1
+    if dist >= EMPTY_DISTANCE:
+        return 0
+    if dist <= FULL_DISTANCE:
+        return 100
+    return max(0, min(100, int(100 - ((dist - FULL_DISTANCE) / (EMPTY_DISTANCE - FULL_DISTANCE)) * 100)))
+
+
+class FillCurve:
+    """통 하나의 채움 곡선 - 투입마다 per_drop % 증가, 측정 잡음 / 실패율 포함"""
+
+    def __init__(self, initial=0.0, per_drop=4.0, noise_cm=0.5, fail_rate=0.0, seed=None):
+        self.level = initial
+        self.per_drop = per_drop
+        self.noise_cm = noise_cm
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+
+    def drop(self):
+        self.level = min(100.0, self.level + self.per_drop)
+
+    def empty(self):
+        self.level = 0.0
+
+    def measure(self):
+        """(거리 cm, 채움도 %) - 측정 실패 시 (-1, -1)"""
+        if self.rng.random() < self.fail_rate:
+            return -1, -1
+        dist = EMPTY_DISTANCE - self.level / 100.0 * (EMPTY_DISTANCE - FULL_DISTANCE)
+        dist = round(dist + self.rng.gauss(0, self.noise_cm), 2)
+        return dist, level_from_distance(dist)
+
+
+class VirtualPi:
+    """rpi_ec2.py 와 같은 명령 서버(PiCommandServer)로 응답하는 가상 라즈베리파이
+
+    servo_time 이 None 이면 rpi_ec2.drop_and_measure 와 같은 프로파일 (측정이 복귀와 겹침),
+    숫자면 그 시간만큼 서보 동작 후 측정 (기존 고정 sleep 방식 비교용, 4.5초).
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, curves=None, servo_time=None,
+                 measure_time=0.1, time_scale=1.0, api=None, max_queue=4, journal_path=":memory:"):
+        self.curves = curves or {name: FillCurve(seed=i) for i, name in
+                                 enumerate(["general trash", "plastic", "metal", "glass"])}
+        self.servo_time = servo_time
+        self.measure_time = measure_time
+        self.time_scale = time_scale
+        self.api = api
+        # rpi_ec2 와 같이 채움도는 저널에 기록 → 묶어서 전송
+        self.journal = EventJournal(journal_path, device_id="pi") if api is not None else None
+        self.syncer = JournalSyncer(self.journal, api) if api is not None else None
+        self.drops = 0
+        self.checks = 0
+        self.drop_time = 0.0
+        self.server = PiCommandServer(self.execute, host=host, port=port, max_queue=max_queue,
+                                      report=self._report if api is not None else None,
+                                      extra_status=self._journal_status if api is not None else None)
+
+    @property
+    def address(self):
+        return self.server.address
+
+    def start(self):
+        self.server.start()
+        if self.syncer:
+            self.syncer.start()
+
+    def stop(self):
+        self.server.stop()
+        if self.syncer:
+            self.syncer.stop()
+            self.journal.close()
+
+    def execute(self, cmd):
+        """rpi_ec2.handle_class 와 같은 결과 - 하드웨어 스레드에서 호출"""
+        if cmd.startswith("check:"):
+            name = cmd.split(":", 1)[1]
+        else:
+            name = cmd
+        curve = self.curves.get(name)
+        if curve is None:
+            raise ValueError(f"unknown class: {name}")
+        if cmd.startswith("check:"):
+            self.checks += 1
+            time.sleep(self.measure_time * self.time_scale)
+            dist, level = curve.measure()
+            return {"class": name, "level": level, "distance": dist}
+
+        self.drops += 1
+        if self.servo_time is not None:
+            timing = {"servo": self.servo_time, "measure": self.measure_time,
+                      "total": self.servo_time + self.measure_time}
+            time.sleep(self.servo_time * self.time_scale)
+            curve.drop()
+            time.sleep(self.measure_time * self.time_scale)
+        else:
+            timing = plan_drop(DEFAULT_CALIBRATION, self.measure_time)
+            time.sleep((timing["open"] + timing["hold"] + timing["to_clear"]) * self.time_scale)
+            curve.drop()
+            time.sleep(self.measure_time * self.time_scale)
+            time.sleep(max(0.0, timing["return"] - timing["to_clear"] - self.measure_time) * self.time_scale)
+        self.drop_time += timing["total"]
+        dist, level = curve.measure()
+        return {"class": name, "level": level, "distance": dist, "timing": timing}
+
+    def _report(self, result):
+        self.journal.append("level", {"class": result["class"], "level": result["level"]})
+
+    def _journal_status(self):
+        return {"journal": self.syncer.stats()}
+
+    def stats(self):
+        return {
+            "drops": self.drops,
+            "checks": self.checks,
+            "drop_s_avg": round(self.drop_time / self.drops, 3) if self.drops else None,
+            "server": self.server.status(),
+            "levels": {name: round(c.level, 1) for name, c in self.curves.items()},
+        }
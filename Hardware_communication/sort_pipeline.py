@@ -0,0 +1,171 @@
+import logging
+import time
+import queue
+import itertools
+import threading
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+
+class SortJob:
+    """분류 한 건 - 단계를 거치며 결과가 채워짐"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, requested_at=None):
+        self.id = next(self._ids)
+        self.requested_at = requested_at or time.time()
+        self.data = {}
+        self.stage_times = {}  # 단계별 (대기, 처리) 시간
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def pop(self, key, default=None):
+        return self.data.pop(key, default)
+
+
+class Stage:
+    """큐 하나 + 워커 스레드로 구성된 파이프라인 단계"""
+
+    def __init__(self, name, handler, maxsize=2, window=60.0):
+        self.name = name
+        self.handler = handler
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.next = None
+        self.window = window
+        self.thread = None
+
+        self.active = 0
+        self.processed = 0
+        self.failed = 0
+        self.busy_time = 0.0
+        self.finished = deque()  # 처리량 계산용 완료 시각
+        self.lock = threading.Lock()
+
+    def depth(self):
+        return self.queue.qsize()
+
+    def stats(self):
+        now = time.time()
+        with self.lock:
+            while self.finished and now - self.finished[0] > self.window:
+                self.finished.popleft()
+            recent = len(self.finished)
+            return {
+                "queue_depth": self.queue.qsize(),
+                "active": self.active,
+                "processed": self.processed,
+                "failed": self.failed,
+                "avg_service_s": self.busy_time / self.processed if self.processed else None,
+                "throughput_per_min": recent * 60.0 / self.window,
+            }
+
+
+class SortPipeline:
+    """캡처/분류 → 구동(아두이노+Pi) → 보고(업로드) 단계별 큐로 작업을 겹쳐 실행
+
+    각 단계는 단일 워커라 같은 하드웨어를 두 작업이 동시에 쓰지 않지만,
+    다음 물체의 분류는 이전 물체가 투입되는 동안 진행된다.
+    """
+
+    def __init__(self):
+        self.stages = []
+        self.running = False
+        self.rejected = 0
+
+    def add_stage(self, name, handler, maxsize=2):
+        stage = Stage(name, handler, maxsize)
+        if self.stages:
+            self.stages[-1].next = stage
+        self.stages.append(stage)
+        return stage
+
+    def start(self):
+        self.running = True
+        for stage in self.stages:
+            stage.thread = threading.Thread(target=self._worker, args=(stage,),
+                                            name=f"stage-{stage.name}", daemon=True)
+            stage.thread.start()
+
+    def stop(self):
+        self.running = False
+        for stage in self.stages:
+            if stage.thread:
+                stage.thread.join(timeout=2)
+
+    def submit(self, job):
+        """첫 단계 큐에 넣음 - 가득 차면 False"""
+        try:
+            job.stage_times["_enqueued"] = time.time()
+            self.stages[0].queue.put_nowait(job)
+            return True
+        except queue.Full:
+            self.rejected += 1
+            return False
+
+    def can_accept(self):
+        """첫 단계 큐에 자리가 있는지 (submit 이 바로 성공할지)"""
+        return not self.stages[0].queue.full()
+
+    def busy(self):
+        # unfinished_tasks: 큐에 들어온 뒤 아직 task_done 되지 않은 작업 (처리 중 포함)
+        return any(stage.queue.unfinished_tasks for stage in self.stages)
+
+    def wait_idle(self, timeout):
+        deadline = time.time() + timeout
+        while self.busy():
+            if time.time() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stats(self):
+        return {
+            "stages": {stage.name: stage.stats() for stage in self.stages},
+            "rejected": self.rejected,
+        }
+
+    def _worker(self, stage):
+        while self.running:
+            try:
+                job = stage.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            started = time.time()
+            wait = started - job.stage_times.pop("_enqueued", started)
+            with stage.lock:
+                stage.active += 1
+            try:
+                keep = stage.handler(job)
+                ok = True
+            except Exception as e:
+                log.exception(f"[파이프라인] {stage.name} 단계 실패 (job {job.id}): {e}")
+                keep = False
+                ok = False
+
+            elapsed = time.time() - started
+            job.stage_times[stage.name] = (wait, elapsed)
+
+            # handler 가 False 를 반환하면 이후 단계 생략
+            if keep is not False and stage.next is not None:
+                job.stage_times["_enqueued"] = time.time()
+                stage.next.queue.put(job)  # 다음 단계가 밀리면 여기서 대기 (역압)
+
+            with stage.lock:
+                stage.active -= 1
+                stage.busy_time += elapsed
+                if ok:
+                    stage.processed += 1
+                    stage.finished.append(time.time())
+                else:
+                    stage.failed += 1
+            stage.queue.task_done()
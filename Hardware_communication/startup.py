@@ -0,0 +1,129 @@
+import logging
+import time
+import threading
+
+import metrics
+
+log = logging.getLogger(__name__)
+
+# 구성 요소 상태
+PENDING = "pending"    # 아직 시작 전
+STARTING = "starting"  # 초기화 중
+READY = "ready"
+FAILED = "failed"      # 초기화 실패 (재시도 중일 수 있음)
+
+
+class Component:
+    """초기화할 구성 요소 1개 - init 함수와 (선택) 실시간 상태 확인 함수
+
+    init 은 백그라운드 스레드에서 한 번 실행되고, 실패하면 retry 초 후 다시 시도한다.
+    check 가 있으면 초기화 후에도 매 조회마다 실제 연결 상태를 반영한다 (예: 아두이노 재연결).
+    """
+
+    def __init__(self, name, init, check=None, required=True, retry=None):
+        self.name = name
+        self.init = init
+        self.check = check
+        self.required = required
+        self.retry = retry
+        self.state = PENDING
+        self.started_at = None
+        self.ready_at = None
+        self.duration = None
+        self.attempts = 0
+        self.error = None
+
+    @property
+    def ready(self):
+        if self.state != READY:
+            return False
+        return self.check() if self.check else True
+
+    def as_dict(self):
+        state = self.state
+        if state == READY and self.check and not self.check():
+            state = "disconnected"
+        return {"state": state, "required": self.required, "attempts": self.attempts,
+                "init_s": round(self.duration, 3) if self.duration is not None else None,
+                "error": self.error}
+
+
+class Startup:
+    """구성 요소를 병렬로 초기화하고 준비 상태 / 준비까지 걸린 시간을 기록
+
+    HTTP 서버를 먼저 띄운 뒤 start() 를 부르면 /health, /ready 로 진행 상황을 볼 수 있다.
+    """
+
+    def __init__(self, started_at=None):
+        self.started_at = started_at or time.time()
+        self.components = {}
+        self.threads = []
+        self.ready_at = None
+        self.ready_event = threading.Event()
+        self.running = False
+
+    def add(self, name, init, check=None, required=True, retry=None):
+        self.components[name] = Component(name, init, check, required, retry)
+
+    def start(self):
+        self.running = True
+        for component in self.components.values():
+            thread = threading.Thread(target=self._run, args=(component,),
+                                      name=f"init-{component.name}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        self.running = False
+
+    @property
+    def ready(self):
+        return all(c.ready for c in self.components.values() if c.required)
+
+    def wait_ready(self, timeout=None):
+        return self.ready_event.wait(timeout)
+
+    def status(self):
+        now = time.time()
+        return {
+            "ready": self.ready,
+            "uptime": round(now - self.started_at, 1),
+            "time_to_ready_s": round(self.ready_at - self.started_at, 3) if self.ready_at else None,
+            "components": {name: c.as_dict() for name, c in self.components.items()},
+        }
+
+    def _run(self, component):
+        while self.running:
+            component.state = STARTING
+            component.attempts += 1
+            component.started_at = time.time()
+            try:
+                ok = component.init()
+                if ok is False:
+                    raise RuntimeError("초기화 실패")
+            except Exception as e:
+                component.state = FAILED
+                component.error = str(e)
+                log.warning(f"[시작] {component.name} 초기화 실패 ({component.attempts}회): {e}")
+                if component.retry is None:
+                    return
+                time.sleep(component.retry)
+                continue
+
+            component.ready_at = time.time()
+            component.duration = component.ready_at - component.started_at
+            component.state = READY
+            component.error = None
+            metrics.observe("startup_init", component.duration, component=component.name)
+            log.info(f"[시작] {component.name} 준비 완료 ({component.duration:.2f}초)")
+            self._check_all_ready()
+            return
+
+    def _check_all_ready(self):
+        if self.ready_at is None and all(c.state == READY for c in self.components.values()
+                                         if c.required):
+            self.ready_at = time.time()
+            total = self.ready_at - self.started_at
+            metrics.observe("time_to_ready", total)
+            log.info(f"[시작] 모든 구성 요소 준비 완료 - 프로세스 시작 후 {total:.2f}초")
+            self.ready_event.set()
@@ -0,0 +1,214 @@
+import logging
+import os
+import math
+import time
+
+log = logging.getLogger(__name__)
+
+# 설정값 (환경 변수로 변경 가능)
+#   STEPPER_BACKEND : pigpio (DMA 타이밍 파형) | software (순수 파이썬 기준 구현)
+STEPPER_BACKENDS = ("pigpio", "software")
+PULSE_WIDTH_US = 10  # TB6600 최소 펄스 폭 2.2us 이상
+
+
+def trapezoid_profile(steps, max_rate=10000.0, accel=50000.0, start_rate=1000.0):
+    """사다리꼴 가감속 스텝 간격 목록(초) - 짧은 이동은 삼각형 프로파일이 됨
+
+    step k 의 속도 = min(max_rate, sqrt(start_rate² + 2·accel·k)),
+    k 는 양 끝에서의 거리라 가속/감속 구간이 대칭이다.
+    """
+    intervals = []
+    for i in range(steps):
+        k = min(i, steps - 1 - i)
+        rate = min(max_rate, math.sqrt(start_rate ** 2 + 2.0 * accel * k))
+        intervals.append(1.0 / rate)
+    return intervals
+
+
+def profile_duration(intervals):
+    return sum(intervals)
+
+
+class MoveResult:
+    """이동 1회 결과 - 계획 시간과 실제 소요 시간"""
+
+    def __init__(self, steps, direction, planned, actual, backend):
+        self.steps = steps
+        self.direction = direction
+        self.planned = planned
+        self.actual = actual
+        self.backend = backend
+
+    def as_dict(self):
+        return {"steps": self.steps, "direction": self.direction, "backend": self.backend,
+                "planned_s": round(self.planned, 4), "actual_s": round(self.actual, 4)}
+
+    def __repr__(self):
+        return (f"MoveResult({self.steps} steps {self.direction}, 계획 {self.planned:.3f}s, "
+                f"실제 {self.actual:.3f}s, {self.backend})")
+
+
+class StepperBackend:
+    """스텝 펄스 출력 공통 인터페이스"""
+
+    name = "base"
+
+    def __init__(self, pul_pin, dir_pin):
+        self.pul_pin = pul_pin
+        self.dir_pin = dir_pin
+
+    def run(self, intervals, forward):
+        """간격 목록대로 펄스를 내보내고 끝날 때까지 대기"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SoftwareBackend(StepperBackend):
+    """순수 파이썬 기준 구현 - 절대 시각 기준으로 펄스를 내보내 누적 지연이 없음
+
+    gpio 는 output(pin, value) 를 가진 객체 (RPi.GPIO 또는 장치 밖 테스트용 가짜).
+    마지막 spin 구간만 바쁜 대기라 정확도는 스케줄러 지터 수준.
+    """
+
+    name = "software"
+
+    def __init__(self, gpio, pul_pin, dir_pin, spin=0.0002):
+        super().__init__(pul_pin, dir_pin)
+        self.gpio = gpio
+        self.spin = spin
+
+    def _wait_until(self, deadline):
+        remaining = deadline - time.perf_counter()
+        if remaining > self.spin:
+            time.sleep(remaining - self.spin)
+        while time.perf_counter() < deadline:
+            pass
+
+    def run(self, intervals, forward):
+        self.gpio.output(self.dir_pin, 0 if forward else 1)
+        t = time.perf_counter()
+        for interval in intervals:
+            self.gpio.output(self.pul_pin, 1)
+            self._wait_until(t + PULSE_WIDTH_US / 1e6)
+            self.gpio.output(self.pul_pin, 0)
+            t += interval
+            self._wait_until(t)
+
+
+class PigpioBackend(StepperBackend):
+    """pigpio DMA 파형 - 미리 계산한 펄스열을 하드웨어 타이밍으로 출력 (CPU 사용 없음)
+
+    가감속 구간은 구간별 파형으로, 등속 구간은 1스텝 파형을 wave_chain 반복으로 보낸다.
+    """
+
+    name = "pigpio"
+
+    def __init__(self, pul_pin, dir_pin, host=None, chunk=500):
+        super().__init__(pul_pin, dir_pin)
+        self.host = host
+        self.chunk = chunk  # 파형 하나에 담을 스텝 수 (DMA 제어 블록 한도 이내)
+        self.pi = None
+
+    def load(self):
+        import pigpio
+        self.pigpio = pigpio
+        self.pi = pigpio.pi(self.host) if self.host else pigpio.pi()
+        if not self.pi.connected:
+            raise RuntimeError("pigpiod 연결 실패 (sudo pigpiod 실행 필요)")
+        self.pi.set_mode(self.pul_pin, pigpio.OUTPUT)
+        self.pi.set_mode(self.dir_pin, pigpio.OUTPUT)
+
+    def _wave(self, intervals):
+        mask = 1 << self.pul_pin
+        pulses = []
+        for interval in intervals:
+            period = max(int(round(interval * 1e6)), PULSE_WIDTH_US * 2)
+            pulses.append(self.pigpio.pulse(mask, 0, PULSE_WIDTH_US))
+            pulses.append(self.pigpio.pulse(0, mask, period - PULSE_WIDTH_US))
+        self.pi.wave_add_generic(pulses)
+        return self.pi.wave_create()
+
+    def run(self, intervals, forward):
+        if not intervals:
+            return
+        self.pi.write(self.dir_pin, 0 if forward else 1)
+        self.pi.wave_clear()
+
+        # 등속 구간(같은 간격이 이어지는 가운데 부분) 분리
+        cruise = min(intervals)
+        start = next(i for i, v in enumerate(intervals) if v == cruise)
+        end = len(intervals) - next(i for i, v in enumerate(reversed(intervals)) if v == cruise)
+        repeat = end - start
+
+        chain, waves = [], []
+        for i in range(0, start, self.chunk):
+            waves.append(self._wave(intervals[i:min(i + self.chunk, start)]))
+            chain.append(waves[-1])
+        if repeat:
+            waves.append(self._wave([cruise]))
+            while repeat:
+                count = min(repeat, 65535)
+                chain += [255, 0, waves[-1], 255, 1, count & 0xFF, count >> 8]
+                repeat -= count
+        for i in range(end, len(intervals), self.chunk):
+            waves.append(self._wave(intervals[i:i + self.chunk]))
+            chain.append(waves[-1])
+
+        try:
+            self.pi.wave_chain(chain)
+            while self.pi.wave_tx_busy():
+                time.sleep(0.002)
+        finally:
+            for wid in waves:
+                self.pi.wave_delete(wid)
+
+    def close(self):
+        if self.pi is not None:
+            self.pi.wave_tx_stop()
+            self.pi.stop()
+
+
+class StepperMotor:
+    """가감속 프로파일로 이동하고 계획/실제 소요 시간을 보고"""
+
+    def __init__(self, backend, max_rate=10000.0, accel=50000.0, start_rate=1000.0):
+        self.backend = backend
+        self.max_rate = max_rate
+        self.accel = accel
+        self.start_rate = start_rate
+        self.moves = 0
+        self.last = None
+
+    def profile(self, steps):
+        return trapezoid_profile(steps, self.max_rate, self.accel, self.start_rate)
+
+    def predict(self, steps):
+        """steps 이동에 걸릴 시간(초)"""
+        return profile_duration(self.profile(steps))
+
+    def move(self, steps, direction="forward"):
+        intervals = self.profile(abs(steps))
+        planned = profile_duration(intervals)
+        t0 = time.perf_counter()
+        self.backend.run(intervals, direction == "forward")
+        result = MoveResult(abs(steps), direction, planned, time.perf_counter() - t0, self.backend.name)
+        self.moves += 1
+        self.last = result
+        return result
+
+
+def create_stepper_backend(gpio, pul_pin, dir_pin, kind=None):
+    """설정(인자 또는 STEPPER_BACKEND)에 맞는 백엔드 - pigpio 를 못 쓰면 software 로 대체"""
+    kind = (kind or os.environ.get("STEPPER_BACKEND", "pigpio")).lower()
+    if kind not in STEPPER_BACKENDS:
+        raise ValueError(f"알 수 없는 스텝 백엔드: {kind} (가능: {', '.join(STEPPER_BACKENDS)})")
+    if kind == "pigpio":
+        backend = PigpioBackend(pul_pin, dir_pin)
+        try:
+            backend.load()
+            return backend
+        except Exception as e:
+            log.warning(f"pigpio 사용 불가 → software 백엔드 사용: {e}")
+    return SoftwareBackend(gpio, pul_pin, dir_pin)
@@ -0,0 +1,97 @@
+import time
+
+from inference_engine import ClassificationResult, DEFAULT_CLASS, normalize_class
+
+
+class VoteResult:
+    """투표 분류 결과 - 최종 결과 + 사용한 프레임 / 점수 / 조기 종료 여부"""
+
+    def __init__(self, result, frame, scores, frames_used, early_exit, elapsed):
+        self.result = result
+        self.frame = frame
+        self.scores = scores
+        self.frames_used = frames_used
+        self.early_exit = early_exit
+        self.elapsed = elapsed
+
+
+class TemporalVoter:
+    """짧은 연속 프레임을 배치로 추론하고 클래스별 신뢰도를 누적해 결정
+
+    - chunk 장씩 배치 추론 → 누적 점수 갱신
+    - 1위와 2위의 프레임당 점수 차가 margin 이상이면 조기 종료
+    - latency_budget 을 넘기면 그 시점의 1위로 결정
+    - 아무것도 검출되지 않은 프레임은 일반쓰레기에 empty_weight 만큼만 투표
+      (흐린 프레임 한 장이 결정을 뒤집지 못하도록)
+    """
+
+    def __init__(self, engine, burst_size=6, chunk=2, min_frames=2, margin=0.35,
+                 empty_weight=0.3, latency_budget=0.4, frame_timeout=0.5):
+        self.engine = engine
+        self.burst_size = burst_size
+        self.chunk = chunk
+        self.min_frames = min_frames
+        self.margin = margin
+        self.empty_weight = empty_weight
+        self.latency_budget = latency_budget
+        self.frame_timeout = frame_timeout
+
+    def _clear_winner(self, scores, frames_used):
+        if frames_used < self.min_frames or not scores:
+            return False
+        ranked = sorted(scores.values(), reverse=True)
+        second = ranked[1] if len(ranked) > 1 else 0.0
+        return (ranked[0] - second) / frames_used >= self.margin
+
+    def classify(self, camera, after):
+        """after 이후 캡처된 프레임으로 투표 분류 - 프레임이 없으면 None"""
+        t0 = time.time()
+        scores = {}
+        best = {}  # 클래스별 (신뢰도, Detection, 프레임)
+        frames_used = 0
+        last_frame = None
+        early_exit = False
+
+        while frames_used < self.burst_size:
+            count = min(self.chunk, self.burst_size - frames_used)
+            burst = camera.read_burst(count, after, timeout=self.frame_timeout)
+            if not burst:
+                break
+            after = burst[-1][0]
+            frames = [frame for _, frame in burst]
+            last_frame = frames[-1]
+
+            for frame, detections in zip(frames, self.engine.detect_batch(frames)):
+                frames_used += 1
+                if not detections:
+                    scores[DEFAULT_CLASS] = scores.get(DEFAULT_CLASS, 0.0) + self.empty_weight
+                    continue
+                # 프레임마다 클래스별 최고 신뢰도 1개만 반영
+                per_class = {}
+                for det in detections:
+                    name = normalize_class(det.class_name)
+                    if det.confidence > per_class.get(name, (0.0,))[0]:
+                        per_class[name] = (det.confidence, det)
+                for name, (conf, det) in per_class.items():
+                    scores[name] = scores.get(name, 0.0) + conf
+                    if conf > best.get(name, (0.0,))[0]:
+                        best[name] = (conf, det, frame)
+
+            if self._clear_winner(scores, frames_used):
+                early_exit = frames_used < self.burst_size
+                break
+            if time.time() - t0 >= self.latency_budget:
+                break
+
+        elapsed = time.time() - t0
+        if frames_used == 0:
+            return None
+
+        winner = max(scores, key=scores.get)
+        if winner in best:
+            conf, det, frame = best[winner]
+            result = ClassificationResult(winner, det.class_name, conf, det.xyxy, elapsed)
+        else:
+            result = ClassificationResult(DEFAULT_CLASS, latency=elapsed)
+            frame = last_frame
+        return VoteResult(result, frame, scores, frames_used, early_exit, elapsed)
@@ -0,0 +1,44 @@
+import socket
+import time
+
+import pi_protocol
+from pi_server import PiCommandServer
+
+
+def test_worker_survives_clients_that_close_after_reply():
+    """요청 → 응답 읽기 → 바로 닫는 예전 젯슨 방식 연결이 반복돼도 하드웨어 스레드가 계속 동작"""
+    server = PiCommandServer(lambda cmd: (time.sleep(0.001), {"class": cmd, "level": 1})[1],
+                             host="127.0.0.1", port=0)
+    server.start()
+    try:
+        for _ in range(100):
+            with socket.create_connection(server.address, timeout=5) as sock:
+                sock.sendall(b"plastic\n")
+                sock.makefile("rb").readline()
+        # 응답을 읽지 않고 닫음 - 응답은 handler 가 끝난 뒤(닫힌 wfile) 도착
+        with socket.create_connection(server.address, timeout=5) as sock:
+            sock.sendall(b"plastic\n")
+            sock.close()
+        time.sleep(0.2)
+
+        with socket.create_connection(server.address, timeout=5) as sock:
+            sock.sendall(pi_protocol.encode({"id": "last", "cmd": "metal"}))
+            reply = pi_protocol.decode(sock.makefile("rb").readline())
+        assert reply["id"] == "last" and reply["ok"] and reply["class"] == "metal"
+        assert server.threads[1].is_alive()
+    finally:
+        server.stop()
+
+
+
+def test_non_object_request_is_malformed(monkeypatch):
+    """디코딩 결과가 객체가 아니어도 (예: [1], "x") 예외 없이 malformed 응답"""
+    server = PiCommandServer(lambda cmd: {"class": cmd, "level": 1}, host="127.0.0.1", port=0)
+    replies = []
+    try:
+        for value in ([1], "x", 3):
+            monkeypatch.setattr(pi_protocol, "decode", lambda line, value=value: value)
+            server.dispatch(b"line\n", replies.append)
+    finally:
+        server.server.server_close()
+    assert replies == [{"id": None, "ok": False, "error": "malformed request"}] * 3
@@ -0,0 +1,146 @@
+import time
+import statistics
+import threading
+
+CM_PER_SECOND = 17150  # 음속 34300cm/s 의 절반 (왕복 → 편도)
+
+
+class EchoTimer:
+    """ECHO 핀 에지 인터럽트로 펄스 폭을 재는 HC-SR04 드라이버 (스핀 루프 없음)
+
+    gpio 는 RPi.GPIO 모듈 (장치 밖에서는 같은 인터페이스의 가짜 모듈).
+    트리거 후 첫 에지를 상승, 두 번째 에지를 하강으로 본다.
+    """
+
+    def __init__(self, gpio, trig, echo, timeout=0.03):
+        self.gpio = gpio
+        self.trig = trig
+        self.echo = echo
+        self.timeout = timeout
+        self.armed = False
+        self.rise = None
+        self.width = None
+        self.done = threading.Event()
+
+    def start(self):
+        self.gpio.output(self.trig, False)
+        self.gpio.add_event_detect(self.echo, self.gpio.BOTH, callback=self._edge)
+
+    def stop(self):
+        self.gpio.remove_event_detect(self.echo)
+
+    def _edge(self, channel):
+        now = time.perf_counter()
+        if not self.armed:
+            return
+        if self.rise is None:
+            self.rise = now
+        else:
+            self.width = now - self.rise
+            self.armed = False
+            self.done.set()
+
+    def ping(self):
+        """1회 측정 - 거리(cm), 에코가 없으면 -1"""
+        self.rise = None
+        self.width = None
+        self.done.clear()
+        self.armed = True
+        self.gpio.output(self.trig, True)
+        time.sleep(0.00001)
+        self.gpio.output(self.trig, False)
+        if not self.done.wait(self.timeout):
+            self.armed = False
+            return -1
+        return round(self.width * CM_PER_SECOND, 2)
+
+
+class Measurement:
+    """필터링된 측정 결과"""
+
+    def __init__(self, distance, attempts, used, spread, elapsed):
+        self.distance = distance  # 이상치 제거 후 중앙값 (실패 시 -1)
+        self.attempts = attempts  # 발사 횟수
+        self.used = used          # 채택된 샘플 수
+        self.spread = spread      # 채택된 샘플의 최대-최소 (cm)
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.distance >= 0
+
+    def __repr__(self):
+        return (f"Measurement({self.distance}cm, {self.used}/{self.attempts}개, "
+                f"편차 {self.spread}cm, {self.elapsed * 1000:.0f}ms)")
+
+
+def reject_outliers(values, tolerance):
+    """중앙값에서 max(tolerance, 3·MAD) 보다 먼 값 제거"""
+    med = statistics.median(values)
+    mad = statistics.median(abs(v - med) for v in values) * 1.4826
+    limit = max(tolerance, 3 * mad)
+    return [v for v in values if abs(v - med) <= limit]
+
+
+class UltrasonicRanger:
+    """적응형 다중 샘플 측정 - 값이 일치하면 조기 종료, 흔들리면 max_samples 까지 추가 발사"""
+
+    def __init__(self, ping, min_samples=3, max_samples=9, agree_cm=1.0, interval=0.06,
+                 min_cm=2.0, max_cm=400.0):
+        self.ping = ping
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.agree_cm = agree_cm
+        self.interval = interval  # 이전 에코 잔향이 사라질 때까지 대기 (HC-SR04 권장 측정 주기 60ms 이상)
+        self.min_cm = min_cm
+        self.max_cm = max_cm
+
+    def measure(self):
+        t0 = time.time()
+        readings = []
+        inliers = []
+        attempts = 0
+        while attempts < self.max_samples:
+            if attempts:
+                time.sleep(self.interval)
+            attempts += 1
+            d = self.ping()
+            if self.min_cm <= d <= self.max_cm:
+                readings.append(d)
+            if len(readings) >= self.min_samples:
+                inliers = reject_outliers(readings, self.agree_cm)
+                if len(inliers) >= self.min_samples and max(inliers) - min(inliers) <= self.agree_cm:
+                    break
+
+        if readings and not inliers:
+            inliers = reject_outliers(readings, self.agree_cm)
+        if len(inliers) < 2:  # 단일 값은 신뢰하지 않음
+            return Measurement(-1, attempts, 0, None, time.time() - t0)
+        return Measurement(round(statistics.median(inliers), 2), attempts, len(inliers),
+                           round(max(inliers) - min(inliers), 2), time.time() - t0)
+
+
+class LevelFilter:
+    """통별 거리 평활화 - 작은 흔들림은 지수 평활, 큰 변화(투입/비움)는 바로 반영"""
+
+    def __init__(self, alpha=0.5, jump_cm=3.0):
+        self.alpha = alpha
+        self.jump_cm = jump_cm
+        self.values = {}
+
+    def update(self, key, distance):
+        if distance < 0:
+            return distance
+        prev = self.values.get(key)
+        if prev is None or abs(distance - prev) > self.jump_cm:
+            value = distance
+        else:
+            value = self.alpha * distance + (1 - self.alpha) * prev
+        self.values[key] = value
+        return round(value, 2)
+
+    def reset(self, key=None):
+        if key is None:
+            self.values.clear()
+        else:
+            self.values.pop(key, None)
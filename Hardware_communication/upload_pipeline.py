@@ -0,0 +1,275 @@
+import logging
+import os
+import json
+import time
+import queue
+import threading
+
+import metrics
+
+log = logging.getLogger(__name__)
+
+
+class DiskBudget:
+    """디렉터리 용량 한도 - 넘으면 가장 오래된 파일부터 삭제"""
+
+    def __init__(self, directory, max_bytes, suffixes=(".jpg", ".json")):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffixes = suffixes
+        self._used = None  # 사용량 캐시 (한도 초과 시에만 디렉터리 재스캔)
+        os.makedirs(directory, exist_ok=True)
+
+    def files(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(self.suffixes) and os.path.isfile(path):
+                st = os.stat(path)
+                entries.append((st.st_mtime, path, st.st_size))
+        entries.sort()
+        return entries
+
+    def used(self):
+        return sum(size for _, _, size in self.files())
+
+    def write(self, name, data):
+        path = os.path.join(self.directory, name)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        if self._used is None:
+            self._used = self.used()
+        else:
+            self._used += len(data)
+        if self._used > self.max_bytes:
+            self.enforce()
+        return path
+
+    def remove(self, path):
+        if os.path.exists(path):
+            os.remove(path)
+            self._used = None
+
+    def enforce(self):
+        entries = self.files()
+        total = sum(size for _, _, size in entries)
+        removed = 0
+        for _, path, size in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        self._used = total
+        return removed
+
+
+class UploadPipeline:
+    """이미지 저장/업로드를 분류 경로 밖에서 처리하는 백그라운드 파이프라인
+
+    - JPEG 인코딩은 메모리에서 한 번만 (로컬 저장과 업로드가 같은 바이트 사용)
+    - /upload/batch 로 묶어서 업로드 (구버전 서버면 /upload 단건으로 대체)
+    - 업로드 실패 시 용량 제한이 있는 스풀 디렉터리에 보관 후 재전송
+    - 로컬 image/ 디렉터리도 용량 한도 유지
+    """
+
+    def __init__(self, api, image_dir="image", spool_dir="image/spool",
+                 image_max_bytes=500 * 1024 * 1024, spool_max_bytes=200 * 1024 * 1024,
+                 batch_size=4, batch_wait=0.5, max_queue=32, retry_interval=10.0,
+                 jpeg_quality=90):
+        self.api = api
+        self.images = DiskBudget(image_dir, image_max_bytes)
+        self.spool = DiskBudget(spool_dir, spool_max_bytes)
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.retry_interval = retry_interval
+        self.jpeg_quality = jpeg_quality
+        self.batch_supported = True
+
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.running = False
+        self.thread = None
+        self.next_retry = 0
+
+        self.uploaded = 0
+        self.failed = 0
+        self.spooled = 0
+        self.dropped = 0
+        self.batches = 0
+        self.last_error = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="image-upload", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=5.0):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=timeout)
+
+    def submit(self, name, image, meta=None, upload=True, render=None):
+        """프레임을 큐에 넣고 즉시 반환 - 큐가 가득 차면 버리고 False
+
+        render 가 있으면 인코딩 직전에 업로드 스레드에서 render(image) 적용 (주석 그리기 등 -
+        버려지는 프레임은 그리지 않음)
+        """
+        try:
+            self.queue.put_nowait((name, image, meta or {}, upload, render))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            log.warning(f"업로드 큐 가득 참 - 이미지 버림: {name}")
+            return False
+
+    def stats(self):
+        spool_files = [p for _, p, _ in self.spool.files() if p.endswith(".jpg")]
+        return {
+            "queued": self.queue.qsize(),
+            "uploaded": self.uploaded,
+            "failed": self.failed,
+            "spooled": self.spooled,
+            "spool_pending": len(spool_files),
+            "spool_bytes": self.spool.used(),
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "last_error": self.last_error,
+        }
+
+    # ------------------ 워커 스레드 ------------------
+    def _run(self):
+        while self.running or not self.queue.empty():
+            batch = self._collect()
+            if batch:
+                self._process(batch)
+            elif time.time() >= self.next_retry:
+                self._drain_spool()
+
+    def _collect(self):
+        """첫 항목을 기다린 뒤 batch_wait 동안 추가 항목을 모음"""
+        try:
+            batch = [self.queue.get(timeout=1.0)]
+        except queue.Empty:
+            return []
+        deadline = time.time() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _encode(self, image):
+        import cv2  # 업로드 스레드에서 처음 쓸 때 불러옴 (서비스 시작을 늦추지 않도록)
+        ok, buf = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            raise ValueError("JPEG 인코딩 실패")
+        return buf.tobytes()
+
+    def _process(self, batch):
+        items = []
+        for name, image, meta, upload, render in batch:
+            try:
+                if render is not None:
+                    image = render(image)
+                data = self._encode(image)
+                self.images.write(f"{name}.jpg", data)
+            except Exception as e:
+                log.error(f"이미지 저장 실패: {name} - {e}")
+                continue
+            if upload:
+                items.append((name, data, meta))
+
+        if not items:
+            return
+        done = self._upload(items)
+        for item in items[done:]:
+            self._spool(*item)
+        if done == len(items) and time.time() >= self.next_retry:
+            self._drain_spool()
+
+    def _upload(self, items):
+        """업로드 - 앞에서부터 성공한 개수 반환 (묶음은 전부 성공 또는 0)"""
+        done = 0
+        res = None
+        t0 = time.time()
+        try:
+            if self.batch_supported and len(items) > 1:
+                res = self.api.post(
+                    "/upload/batch",
+                    files=[("images", (f"{name}.jpg", data, "image/jpeg")) for name, data, _ in items],
+                    data={"meta": json.dumps([meta for _, _, meta in items])},
+                )
+                if res.status_code == 404:
+                    log.info("서버가 /upload/batch 미지원 - 단건 업로드로 전환")
+                    self.batch_supported = False
+                    return self._upload(items)
+                if res.status_code == 200:
+                    done = len(items)
+            else:
+                for name, data, meta in items:
+                    res = self.api.post("/upload", files={"image": (f"{name}.jpg", data, "image/jpeg")},
+                                        data=meta)
+                    if res.status_code != 200:
+                        break
+                    done += 1
+            if done < len(items):
+                self.last_error = f"{res.status_code} - {res.text[:200]}"
+        except Exception as e:
+            self.last_error = str(e)
+
+        metrics.observe("upload", time.time() - t0)
+        if done:
+            self.uploaded += done
+            self.batches += 1
+            log.debug("이미지 업로드 성공: %d장", done)
+        if done < len(items):
+            self.failed += len(items) - done
+            log.warning(f"이미지 업로드 실패: {self.last_error}")
+            self.next_retry = time.time() + self.retry_interval
+        return done
+
+    def _spool(self, name, data, meta):
+        """업로드 실패분을 스풀에 보관 (용량 초과 시 오래된 것부터 삭제)"""
+        try:
+            self.spool.write(f"{name}.json", json.dumps(meta).encode("utf-8"))
+            self.spool.write(f"{name}.jpg", data)
+            self.spooled += 1
+        except OSError as e:
+            log.error(f"스풀 저장 실패: {name} - {e}")
+
+    def _drain_spool(self):
+        """스풀된 이미지를 묶음 단위로 재전송"""
+        entries = [p for _, p, _ in self.spool.files() if p.endswith(".jpg")]
+        for i in range(0, len(entries), self.batch_size):
+            items = []
+            for jpg in entries[i:i + self.batch_size]:
+                base = jpg[:-len(".jpg")]
+                try:
+                    with open(jpg, "rb") as f:
+                        data = f.read()
+                    with open(base + ".json", "rb") as f:
+                        meta = json.loads(f.read())
+                except (OSError, ValueError):
+                    # 짝이 맞지 않는 스풀 파일은 정리
+                    for path in (jpg, base + ".json"):
+                        self.spool.remove(path)
+                    continue
+                items.append((os.path.basename(base), data, meta, base))
+
+            if not items:
+                continue
+            done = self._upload([(name, data, meta) for name, data, meta, _ in items])
+            for _, _, _, base in items[:done]:
+                for path in (base + ".jpg", base + ".json"):
+                    self.spool.remove(path)
+            if done < len(items):
+                return
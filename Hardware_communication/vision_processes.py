@@ -0,0 +1,428 @@
+import time
+import logging
+import itertools
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from device_logging import child_logging, forward_child_logs
+
+log = logging.getLogger(__name__)
+
+# 캡처 / 추론을 별도 프로세스로 분리 (GIL 경쟁 제거)
+#   캡처 프로세스 : GStreamer → 공유 메모리 링 버퍼에 직접 기록
+#   추론 프로세스 : 링 버퍼 슬롯을 복사 없이 읽어 추론, 검출 결과만 큐로 반환
+#   메인 프로세스 : Flask / 아두이노 / 라즈베리파이 / 업로드 (SharedCameraStream, RemoteEngine 로 접근)
+# CUDA / GStreamer 스레드가 있는 프로세스를 fork 하지 않도록 spawn 사용
+CONTEXT = "spawn"
+
+
+class RingFrame(np.ndarray):
+    """링 버퍼 슬롯을 가리키는 프레임 뷰 - seq 로 덮어쓰기 여부를 확인"""
+
+    seq = None
+
+    def __array_finalize__(self, obj):
+        self.seq = getattr(obj, "seq", None)
+
+
+class FrameRing:
+    """공유 메모리 프레임 링 버퍼 - 캡처 프로세스 1개가 쓰고 나머지는 뷰로 읽음
+
+    슬롯마다 (seq, 캡처 시각) 헤더를 두는 seqlock 방식:
+    쓰기 전에 seq 를 -1 로, 다 쓴 뒤 새 seq 로 바꾼다. 읽는 쪽은 사용 전후 seq 가 같으면 유효.
+    """
+
+    def __init__(self, shape, slots=32, name=None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        frame_bytes = int(np.prod(self.shape))
+        header = 8 * (1 + 2 * slots)
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=header + frame_bytes * slots)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        buf = self.shm.buf
+        self.head = np.ndarray((1,), np.int64, buf, 0)  # 마지막으로 쓴 seq
+        self.seqs = np.ndarray((slots,), np.int64, buf, 8)
+        self.stamps = np.ndarray((slots,), np.float64, buf, 8 + 8 * slots)
+        self.data = np.ndarray((slots,) + self.shape, np.uint8, buf, header)
+        if self.owner:
+            self.head[0] = 0
+            self.seqs[:] = -1
+            self.stamps[:] = 0.0
+
+    def spec(self):
+        """다른 프로세스에서 attach 할 때 넘기는 정보"""
+        return self.name, self.shape, self.slots
+
+    @classmethod
+    def attach(cls, spec):
+        name, shape, slots = spec
+        return cls(shape, slots, name=name)
+
+    def write(self, frame, captured):
+        seq = int(self.head[0]) + 1
+        slot = seq % self.slots
+        self.seqs[slot] = -1
+        self.data[slot] = frame
+        self.stamps[slot] = captured
+        self.seqs[slot] = seq
+        self.head[0] = seq
+        return seq
+
+    @property
+    def latest(self):
+        return int(self.head[0])
+
+    def valid(self, seq):
+        return int(self.seqs[seq % self.slots]) == seq
+
+    def view(self, seq):
+        """seq 프레임의 공유 메모리 뷰 (복사 없음) - 이미 덮어써졌으면 None"""
+        if seq <= 0 or not self.valid(seq):
+            return None
+        frame = self.data[seq % self.slots].view(RingFrame)
+        frame.seq = seq
+        return frame
+
+    def stamp(self, seq):
+        return float(self.stamps[seq % self.slots])
+
+    def since(self, after):
+        """after 이후 캡처된 유효 프레임 seq 목록 (오래된 순)"""
+        seqs = self.seqs.copy()
+        stamps = self.stamps.copy()
+        fresh = sorted(int(s) for s, t in zip(seqs, stamps) if s > 0 and t > after)
+        return [s for s in fresh if self.valid(s)]
+
+    def copy(self, frame):
+        """뷰를 일반 배열로 복사 - 복사하는 동안 덮어써졌으면 None"""
+        seq = getattr(frame, "seq", None)
+        if seq is None:
+            return frame
+        out = np.array(frame)
+        return out if self.valid(seq) else None
+
+    def close(self):
+        self.head = self.seqs = self.stamps = self.data = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # 아직 살아 있는 뷰가 있으면 프로세스 종료 시 정리됨
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+# ------------------ 자식 프로세스 ------------------
+def capture_main(spec, camera_factory, stop, status, log_queue):
+    """캡처 프로세스 - camera_factory() 로 만든 CameraStream 의 프레임을 링 버퍼에 기록"""
+    child_logging(log_queue)
+    ring = FrameRing.attach(spec)
+    warned = []
+
+    def sink(captured, frame):
+        if frame.shape != ring.shape:
+            import cv2
+            if not warned:
+                log.warning(f"카메라 프레임 {frame.shape} ≠ 슬롯 {ring.shape} - 크기 맞춰 기록")
+                warned.append(True)
+            frame = cv2.resize(frame, (ring.shape[1], ring.shape[0]))
+        ring.write(frame, captured)
+
+    camera = camera_factory()
+    camera.sink = sink
+    try:
+        camera.start()
+    except Exception as e:
+        status.put(("error", str(e)))
+        ring.close()
+        return
+    status.put(("ready", camera.open_time))
+    stop.wait()
+    camera.stop()
+    ring.close()
+
+
+def inference_main(spec, backend_factory, requests, replies, log_queue):
+    """추론 프로세스 - (요청 ID, [seq 또는 배열]) 를 받아 검출 결과만 돌려줌"""
+    child_logging(log_queue)
+    from inference_engine import InferenceEngine
+
+    ring = FrameRing.attach(spec)
+    engine = InferenceEngine(backend_factory())
+    try:
+        engine.load(warmup_shape=ring.shape)
+    except Exception as e:
+        replies.put(("error", str(e)))
+        ring.close()
+        return
+    replies.put(("ready", engine.stats()))
+
+    while True:
+        message = requests.get()
+        if message is None:
+            break
+        request_id, items = message
+        t0 = time.time()
+        frames, index = [], []
+        for i, item in enumerate(items):
+            frame = ring.view(item) if isinstance(item, int) else item
+            if frame is not None:
+                frames.append(frame)
+                index.append(i)
+        try:
+            detections = engine.detect_batch(frames) if frames else []
+        except Exception as e:
+            replies.put((request_id, "error", str(e), time.time() - t0))
+            continue
+        # 추론 중 덮어써진 슬롯은 검출 없음(None)으로
+        out = [None] * len(items)
+        for i, dets in zip(index, detections):
+            if isinstance(items[i], int) and not ring.valid(items[i]):
+                continue
+            out[i] = [(d.class_id, d.class_name, float(d.confidence),
+                       None if d.xyxy is None else [float(v) for v in d.xyxy]) for d in dets]
+        replies.put((request_id, "ok", out, time.time() - t0))
+    ring.close()
+
+
+# ------------------ 메인 프로세스 대리자 ------------------
+class SharedCameraStream:
+    """캡처 프로세스 대리자 - CameraStream 과 같은 읽기 인터페이스, 프레임은 공유 메모리 뷰
+
+    camera_factory 는 spawn 으로 넘어가므로 pickle 가능해야 함 (functools.partial(CameraStream, ...)).
+    """
+
+    def __init__(self, camera_factory, ring, log_queue, poll=0.002, start_timeout=30.0):
+        self.camera_factory = camera_factory
+        self.ring = ring
+        self.log_queue = log_queue
+        self.poll = poll
+        self.start_timeout = start_timeout
+        self.ctx = mp.get_context(CONTEXT)
+        self.process = None
+        self.stop_event = None
+        self.open_time = None
+        self.started_at = None
+
+    @property
+    def running(self):
+        return self.process is not None and self.process.is_alive() and not self.stop_event.is_set()
+
+    def start(self):
+        self.stop_event = self.ctx.Event()
+        status = self.ctx.Queue()
+        self.process = self.ctx.Process(target=capture_main, name="capture", daemon=True,
+                                        args=(self.ring.spec(), self.camera_factory, self.stop_event,
+                                              status, self.log_queue))
+        t0 = time.time()
+        self.process.start()
+        try:
+            state, value = status.get(timeout=self.start_timeout)
+        except Exception:
+            state, value = "error", "캡처 프로세스 응답 없음"
+        if state != "ready":
+            self.stop()
+            raise RuntimeError(f"카메라 열기 실패: {value}")
+        self.open_time = time.time() - t0
+        self.started_at = time.time()
+        log.info(f"캡처 프로세스 시작 (pid {self.process.pid}, {self.open_time:.2f}초)")
+
+    def read_fresh(self, after=None, timeout=1.0):
+        """after 시각 이후에 캡처된 최신 프레임 뷰 (없으면 None)"""
+        if after is None:
+            after = time.time()
+        deadline = time.time() + timeout
+        while True:
+            seq = self.ring.latest
+            if seq > 0 and self.ring.stamp(seq) >= after:
+                frame = self.ring.view(seq)
+                if frame is not None:
+                    return frame
+            if time.time() >= deadline or not self.running:
+                return None
+            time.sleep(self.poll)
+
+    def read_burst(self, count, after, timeout=1.0):
+        """after 시각 이후 캡처된 프레임 뷰를 최대 count 장 - [(캡처 시각, 프레임)]"""
+        deadline = time.time() + timeout
+        while True:
+            seqs = self.ring.since(after)
+            if len(seqs) >= count or time.time() >= deadline or not self.running:
+                fresh = []
+                for seq in seqs[:count]:
+                    captured = self.ring.stamp(seq)
+                    frame = self.ring.view(seq)
+                    if frame is not None:
+                        fresh.append((captured, frame))
+                return fresh
+            time.sleep(self.poll)
+
+    def keep(self, frame):
+        """업로드/주석용으로 남길 프레임만 복사 - 이미 덮어써졌으면 None"""
+        return self.ring.copy(frame)
+
+    def stats(self):
+        elapsed = time.time() - self.started_at if self.started_at else 0.0
+        return {"frames": self.ring.latest, "fps": round(self.ring.latest / elapsed, 1) if elapsed else None,
+                "slots": self.ring.slots, "shape": list(self.ring.shape),
+                "pid": self.process.pid if self.process else None}
+
+    def stop(self):
+        if self.stop_event is not None:
+            self.stop_event.set()
+        if self.process is not None:
+            self.process.join(timeout=3)
+            if self.process.is_alive():
+                self.process.terminate()
+
+
+class RemoteEngine:
+    """추론 프로세스 대리자 - InferenceEngine 과 같은 인터페이스 (load / detect / detect_batch / classify / stats)
+
+    링 버퍼 프레임은 seq 번호만, 그 밖의 배열은 그대로 보낸다. 요청은 한 번에 하나 (InferenceEngine 의 lock 과 같음).
+    """
+
+    def __init__(self, backend_factory, ring, log_queue, timeout=10.0, load_timeout=300.0):
+        self.backend_factory = backend_factory
+        self.ring = ring
+        self.log_queue = log_queue
+        self.timeout = timeout
+        self.load_timeout = load_timeout
+        self.ctx = mp.get_context(CONTEXT)
+        self.process = None
+        self.requests = None
+        self.replies = None
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.loaded = False
+        self.remote_stats = {}
+        self.load_time = None
+        self.cold_latency = None
+        self.warm_count = 0
+        self.warm_total = 0.0
+        self.warm_last = None
+        self.remote_total = 0.0
+        self.stale = 0
+
+    @property
+    def ready(self):
+        return self.loaded and self.process is not None and self.process.is_alive()
+
+    def load(self, warmup_shape=None):
+        """추론 프로세스 시작 - 모델 로드 + 워밍업이 끝날 때까지 대기"""
+        self.requests = self.ctx.Queue()
+        self.replies = self.ctx.Queue()
+        self.process = self.ctx.Process(target=inference_main, name="inference", daemon=True,
+                                        args=(self.ring.spec(), self.backend_factory, self.requests,
+                                              self.replies, self.log_queue))
+        t0 = time.time()
+        self.process.start()
+        try:
+            reply = self.replies.get(timeout=self.load_timeout)
+        except Exception:
+            reply = ("error", "추론 프로세스 응답 없음")
+        if reply[0] != "ready":
+            self.close()
+            raise RuntimeError(f"모델 로드 실패: {reply[1]}")
+        self.remote_stats = reply[1]
+        self.load_time = time.time() - t0
+        ms = self.remote_stats.get("cold_inference_ms")
+        self.cold_latency = ms / 1000.0 if ms is not None else None
+        self.loaded = True
+        log.info(f"추론 프로세스 시작 (pid {self.process.pid}, {self.load_time:.2f}초)")
+
+    def detect(self, frame):
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, frames):
+        from inference_backends import Detection
+        items = [frame.seq if isinstance(frame, RingFrame) and frame.seq else np.asarray(frame)
+                 for frame in frames]
+        with self.lock:
+            request_id = next(self.ids)
+            self.requests.put((request_id, items))
+            deadline = time.time() + self.timeout
+            while True:
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self.process.is_alive():
+                    raise RuntimeError("추론 프로세스 응답 없음")
+                try:
+                    reply = self.replies.get(timeout=min(remaining, 0.5))
+                except Exception:
+                    continue
+                if reply[0] == request_id:
+                    break  # 이전 요청(시간 초과)의 늦은 응답은 버림
+        _, state, payload, elapsed = reply
+        if state != "ok":
+            raise RuntimeError(f"추론 실패: {payload}")
+        self.remote_total += elapsed
+        out = []
+        for dets in payload:
+            if dets is None:
+                self.stale += 1
+                out.append([])
+                continue
+            out.append([Detection(cid, name, conf, None if xyxy is None else np.array(xyxy, dtype=np.float32))
+                        for cid, name, conf, xyxy in dets])
+        return out
+
+    def classify(self, frame):
+        from inference_engine import to_result
+        t0 = time.time()
+        detections = self.detect(frame)
+        latency = time.time() - t0
+        self.warm_count += 1
+        self.warm_total += latency
+        self.warm_last = latency
+        return to_result(detections, latency)
+
+    def stats(self):
+        return {
+            **self.remote_stats,
+            "process": True,
+            "pid": self.process.pid if self.process else None,
+            "model_load_s": self.load_time,
+            "warm_inference_ms_avg": (self.warm_total / self.warm_count) * 1000 if self.warm_count else None,
+            "warm_inference_ms_last": self.warm_last * 1000 if self.warm_last is not None else None,
+            "warm_count": self.warm_count,
+            "stale_frames": self.stale,
+        }
+
+    def close(self):
+        self.loaded = False
+        if self.process is None:
+            return
+        try:
+            self.requests.put(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=3)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+class VisionProcesses:
+    """링 버퍼 + 캡처 프로세스 + 추론 프로세스 묶음 - camera / engine 을 기존 객체 대신 사용"""
+
+    def __init__(self, camera_factory, backend_factory, shape, slots=32):
+        self.ring = FrameRing(shape, slots)
+        self.log_queue = mp.get_context(CONTEXT).Queue()
+        self.logs = forward_child_logs(self.log_queue)
+        self.logs.start()
+        self.engine = RemoteEngine(backend_factory, self.ring, self.log_queue)
+        self.camera = SharedCameraStream(camera_factory, self.ring, self.log_queue)
+
+    def close(self):
+        self.camera.stop()
+        self.engine.close()
+        self.logs.stop()
+        self.ring.close()
@@ -21,4 +21,14 @@ CREATE TABLE levels (
   level INT,
   measured_at DATETIME DEFAULT CURRENT_TIMESTAMP
 );
-select * from levels;
\ No newline at end of file
+select * from levels;
+
+# 장치 이벤트 테이블 (젯슨/라즈베리파이 저널 → /events/batch, event_id 로 중복 반영 방지)
+CREATE TABLE device_events (
+  event_id VARCHAR(64) PRIMARY KEY,
+  device_id VARCHAR(50),
+  kind VARCHAR(30),
+  payload JSON,
+  created_at DATETIME(3),
+  received_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
@@ -38,6 +38,8 @@ let latestData = {
   "general trash": 0,
 };
 let lastUpdateTime = 0;
+let updatedAt = {}; // 클래스별 마지막 갱신 시각 (젯슨 채움도 동기화용)
+let resetAt = {}; // 클래스별 마지막 관리자 초기화 시각 (젯슨은 값이 바뀌면 초기화 이벤트로 반영)
 let beginTime = 0;
 
 //  Jetson → 처리 시작 알림
@@ -94,38 +96,80 @@ app.post("/upload", upload.single("image"), async (req, res) => {
   }
 });
 
+//  Jetson → 이미지 묶음 업로드 (images[] + meta: [{class, angle, device_id}, ...] 같은 순서)
+app.post("/upload/batch", upload.array("images", 16), async (req, res) => {
+  try {
+    const metas = JSON.parse(req.body.meta || "[]");
+
+    if (!req.files || req.files.length === 0 || req.files.length !== metas.length) {
+      return res.status(400).json({ message: "필수 필드 누락" });
+    }
+
+    const filenames = [];
+    for (let i = 0; i < req.files.length; i++) {
+      const file = req.files[i];
+      const { class: className, angle, device_id = "jetson" } = metas[i];
+      if (!className || angle === undefined) {
+        return res.status(400).json({ message: "필수 필드 누락", index: i });
+      }
+
+      await db.query(
+        `INSERT INTO images (original_name, stored_name, path, class, angle, device_id)
+         VALUES (?, ?, ?, ?, ?, ?)`,
+        [file.originalname, file.filename, `/var/data/${file.filename}`, className, parseInt(angle), device_id]
+      );
+      filenames.push(file.filename);
+    }
+
+    console.log(`[📸 묶음 업로드] ${filenames.length}장`);
+    alertNamespace.emit("log_update");
+    alertNamespace.emit("stat_update");
+
+    res.status(200).json({ message: "업로드 성공", filenames });
+  } catch (err) {
+    console.error("❌ 묶음 업로드 오류:", err);
+    res.status(500).json({ message: "서버 에러" });
+  }
+});
+
+// 채움률 반영 - DB 기록 + 현재 값 갱신 + 관리자 알림
+// 순서는 서버가 받은 순서 (장치 저널은 기록 순서대로 보내므로 재전송분도 오래된 것부터 도착).
+// 장치 시계는 RTC 없이 틀릴 수 있어 서버 시각과 비교하지 않음
+async function applyLevel(className, level, deviceId) {
+  await db.query(
+    "INSERT INTO levels (device_id, class, level) VALUES (?, ?, ?)",
+    [deviceId, className, level]
+  );
+  latestData[className] = level;
+  lastUpdateTime = Date.now();
+  updatedAt[className] = lastUpdateTime;
+
+  // 80% 이상일 때 관리자 알림 전송
+  if (level >= 80) {
+    const koreanName = getKoreanClassName(className);
+    const alertMessage = `${koreanName} 쓰레기통이 ${level}%로 가득 찼습니다!`;
+
+    console.log(`🚨 관리자 알림: ${alertMessage}`);
+    alertNamespace.emit("admin_alert", {
+      type: className,
+      level: level,
+      message: alertMessage,
+      timestamp: new Date().toISOString()
+    });
+  }
+}
+
 //  Raspberry Pi → 채움률 업데이트
 app.post("/update", async (req, res) => {
   const { class: className, level, device_id = "jetson" } = req.body;
 
   if (className && typeof level === "number") {
-    latestData[className] = level;
-    lastUpdateTime = Date.now();
-
     try {
-      await db.query(
-        "INSERT INTO levels (device_id, class, level) VALUES (?, ?, ?)",
-        [device_id, className, level]
-      );
+      await applyLevel(className, level, device_id);
       console.log(`[📩 업데이트] ${className}: ${level}% → DB 저장 완료`);
-      
+
       // 실시간 알림 전송
-      alertNamespace.emit("level_update"); 
-      
-      // 80% 이상일 때 관리자 알림 전송
-      if (level >= 80) {
-        const koreanName = getKoreanClassName(className);
-        const alertMessage = `${koreanName} 쓰레기통이 ${level}%로 가득 찼습니다!`;
-        
-        console.log(`🚨 관리자 알림: ${alertMessage}`);
-        alertNamespace.emit("admin_alert", { 
-          type: className, 
-          level: level,
-          message: alertMessage,
-          timestamp: new Date().toISOString()
-        });
-      }
-      
+      alertNamespace.emit("level_update");
       res.sendStatus(200);
     } catch (err) {
       console.error("❌ levels DB 저장 실패:", err);
@@ -137,6 +181,62 @@ app.post("/update", async (req, res) => {
   }
 });
 
+//  Jetson / Raspberry Pi → 로컬 저널의 이벤트 묶음 (gzip JSON: { device_id, events: [{ id, kind, created, payload }] })
+//  이벤트 ID 로 한 번만 반영 - 응답을 못 받아 다시 보낸 이벤트는 duplicates 로 알려 줌
+app.post("/events/batch", async (req, res) => {
+  const { device_id = "unknown", events } = req.body;
+
+  if (!Array.isArray(events)) {
+    return res.status(400).json({ message: "필수 필드 누락" });
+  }
+
+  const accepted = [];
+  const duplicates = [];
+  const rejected = [];
+  let levelsChanged = false;
+  try {
+    for (const event of events) {
+      const { id, kind, created, payload = {} } = event;
+      // created 는 장치 시계 - 기록용으로만 저장하고 순서 판단에는 쓰지 않음
+      const createdMs = Math.round((created || Date.now() / 1000) * 1000);
+      const valid = id && ((kind === "level" && payload.class && typeof payload.level === "number")
+        || kind === "begin");
+      if (!valid) {
+        rejected.push(id);
+        continue;
+      }
+
+      const [result] = await db.query(
+        `INSERT IGNORE INTO device_events (event_id, device_id, kind, payload, created_at)
+         VALUES (?, ?, ?, ?, FROM_UNIXTIME(? / 1000))`,
+        [id, device_id, kind, JSON.stringify(payload), createdMs]
+      );
+      if (result.affectedRows === 0) {
+        duplicates.push(id);
+        continue;
+      }
+
+      if (kind === "level") {
+        await applyLevel(payload.class, payload.level, device_id);
+        levelsChanged = true;
+      } else if (kind === "begin") {
+        beginTime = Date.now();
+      }
+      accepted.push(id);
+    }
+
+    if (levelsChanged) {
+      alertNamespace.emit("level_update");
+    }
+    console.log(`[📩 이벤트] ${device_id}: ${accepted.length}건 반영, 중복 ${duplicates.length}건`);
+    res.json({ accepted, duplicates, rejected });
+  } catch (err) {
+    // 처리한 이벤트는 device_events 에 남아 있으므로 재전송되면 duplicates 로 응답됨
+    console.error("❌ 이벤트 묶음 처리 실패:", err);
+    res.status(500).json({ message: "서버 에러" });
+  }
+});
+
 // 한글 클래스명 변환 함수 추가
 function getKoreanClassName(className) {
   const classNameMap = {
@@ -153,6 +253,8 @@ app.get("/data", (req, res) => {
   res.json({
     ...latestData,
     lastUpdated: lastUpdateTime,
+    updatedAt,
+    resetAt,
     lastBegin: beginTime,
   });
 });
@@ -373,7 +475,13 @@ app.post("/api/levels/reset", async (req, res) => {
         "INSERT INTO levels (device_id, class, level) VALUES (?, ?, ?)",
         ["admin", type, 0]
       );
+      const now = Date.now();
+      latestData[type] = 0;
+      updatedAt[type] = now;
+      resetAt[type] = now;
     }
+    lastUpdateTime = Date.now();
+    alertNamespace.emit("level_update");
     res.json({ success: true });
   } catch (err) {
     res.status(500).json({ message: "초기화 실패" });
@@ -106,7 +106,16 @@
           throw new Error(`HTTP error! status: ${res.status}`);
         }
         
-        const data = await res.json();
+        // 비움 확인은 백그라운드 작업 - 끝날 때까지 진행 상황 조회
+        let data = await res.json();
+        while (data.state === "running") {
+          await new Promise((resolve) => setTimeout(resolve, 500));
+          const poll = await fetch(`${JETSON_URL}/empty_check/${data.job_id}`);
+          if (!poll.ok) {
+            throw new Error(`HTTP error! status: ${poll.status}`);
+          }
+          data = await poll.json();
+        }
         console.log("비움 확인 결과:", data);
 
         const ordered = [